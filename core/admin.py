@@ -5,7 +5,8 @@ from django.contrib import admin
 from .models import (
     Address, Image, Vendor, Coupon, CouponUser,
     Category, Product, ProductReview, ReturnRequest,
-    CartOrder, CartOrderProducts, wishlist_model
+    CartOrder, CartOrderProducts, wishlist_model, Cart, CartLine, OutboxEmail, ExportJob,
+    OrderStatusHistory,
 )
 @admin.register(Address)
 class AddressAdmin(admin.ModelAdmin):
@@ -70,11 +71,27 @@ class ReturnRequestAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'order_product__item')
 
 
+class PaymentIssueFilter(admin.SimpleListFilter):
+    """Đơn có IPN PayPal không khớp số tiền/tiền tệ (core.payments)."""
+    title = 'payment issue'
+    parameter_name = 'payment_issue'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Yes'), ('no', 'No'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.exclude(payment_issue='')
+        if self.value() == 'no':
+            return queryset.filter(payment_issue='')
+        return queryset
+
+
 @admin.register(CartOrder)
 class CartOrderAdmin(admin.ModelAdmin):
-    list_display = ('user', 'vendor', 'amount', 'paid_status', 'order_status', 'order_date')
-    list_filter = ('paid_status', 'order_status')
-    search_fields = ('user__username', 'vendor__title')
+    list_display = ('user', 'vendor', 'amount', 'paid_status', 'order_status', 'order_date', 'payment_issue')
+    list_filter = ('paid_status', 'order_status', PaymentIssueFilter)
+    search_fields = ('user__username', 'vendor__title', 'checkout_ref', 'paypal_txn_id')
 
 
 @admin.register(CartOrderProducts)
@@ -88,3 +105,39 @@ class WishlistAdmin(admin.ModelAdmin):
     list_select_related = ("user", "product")
     ordering = ("-date",)
 
+
+class CartLineInline(admin.TabularInline):
+    model = CartLine
+    extra = 0
+    raw_id_fields = ('product',)
+
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'date')
+    search_fields = ('user__username', 'user__email')
+    inlines = [CartLineInline]
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'vendor', 'kind', 'file_format', 'status', 'rows', 'created', 'finished_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('vendor__title', 'user__username')
+
+
+@admin.register(OrderStatusHistory)
+class OrderStatusHistoryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'order', 'vendor', 'from_status', 'to_status', 'changed_by', 'changed_at')
+    list_filter = ('to_status',)
+    search_fields = ('order__id', 'vendor__title')
+
+    def has_change_permission(self, request, obj=None):
+        return False
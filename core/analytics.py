@@ -0,0 +1,176 @@
+"""Số liệu bán hàng cho trang quản trị vendor.
+
+Các KPI được tính bằng một aggregate có điều kiện trên bảng doanh số theo
+ngày (VendorDailySales, xem core.rollups) nên chỉ quét số ngày chứ không quét
+số đơn, và được cache theo vendor vài giây. Doanh số chỉ gồm các đơn trong
+SALES_ORDER_STATUSES (không tính đơn pending, đã huỷ hay hoàn tiền).
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Min, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from core.constants import (
+    DASHBOARD_CACHE_TTL, DASHBOARD_NEW_CUSTOMERS, ORDER_STATUS_CHOICES, ORDER_STATUS_PENDING, ORDER_STATUS_SHIPPED,
+    SERIES_CACHE_TTL, SERIES_GRANULARITIES, SERIES_MAX_BUCKETS,
+)
+from core.models import CartOrder, OrderStatusHistory, Product, VendorDailySales
+from userauths.models import User
+
+
+PLACED_ORDER_STATUSES = [status for status, _ in ORDER_STATUS_CHOICES if status != ORDER_STATUS_PENDING]
+
+
+def placed_orders(vendor):
+    return CartOrder.objects.filter(vendor=vendor, order_status__in=PLACED_ORDER_STATUSES)
+
+
+def month_range(now=None):
+    """[đầu tháng, đầu tháng sau) theo giờ địa phương, để lọc theo khoảng trên index."""
+    now = timezone.localtime(now)
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start, end
+
+
+def _kpi_cache_key(vendor):
+    return f"dashboard:kpis:{vendor.pk}"
+
+
+def dashboard_kpis(vendor):
+    """{revenue, orders_count, monthly_revenue, products_count} của vendor."""
+    key = _kpi_cache_key(vendor)
+    kpis = cache.get(key)
+    if kpis is not None:
+        return kpis
+
+    start, end = month_range()
+    this_month = Q(day__gte=start.date(), day__lt=end.date())
+    totals = VendorDailySales.objects.filter(vendor=vendor).aggregate(
+        revenue=Sum("gross"),
+        orders_count=Sum("orders"),
+        monthly_revenue=Sum("gross", filter=this_month),
+    )
+    kpis = {
+        "revenue": totals["revenue"] or Decimal("0"),
+        "orders_count": totals["orders_count"] or 0,
+        "monthly_revenue": totals["monthly_revenue"] or Decimal("0"),
+        "products_count": Product.objects.filter(vendor=vendor).count(),
+    }
+    cache.set(key, kpis, DASHBOARD_CACHE_TTL)
+    return kpis
+
+
+def new_customers(vendor, limit=DASHBOARD_NEW_CUSTOMERS):
+    """Khách mua hàng của vendor, xếp theo đơn đầu tiên gần nhất."""
+    # filter trước annotate: Min chỉ tính trên các đơn vừa lọc (cùng một join)
+    return (
+        User.objects.filter(cart_orders__vendor=vendor, cart_orders__order_status__in=PLACED_ORDER_STATUSES)
+        .annotate(first_order=Min("cart_orders__order_date"))
+        .order_by("-first_order")[:limit]
+    )
+
+
+def paid_totals(vendor):
+    """{revenue, units} của các đơn đã thanh toán (từ rollup)."""
+    totals = VendorDailySales.objects.filter(vendor=vendor).aggregate(
+        revenue=Sum("paid_gross"), units=Sum("paid_units"),
+    )
+    return {"revenue": totals["revenue"] or Decimal("0"), "units": totals["units"] or 0}
+
+
+_BUCKET_EXPRESSIONS = {
+    "day": F("day"),
+    "week": TruncWeek("day"),
+    "month": TruncMonth("day"),
+}
+
+
+def bucket_start(day, granularity):
+    """Ngày bắt đầu của bucket chứa `day` (tuần bắt đầu từ thứ Hai, như TruncWeek)."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, granularity):
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(start, end, granularity):
+    current = bucket_start(start, granularity)
+    while current <= end:
+        yield current
+        current = next_bucket(current, granularity)
+
+
+def revenue_series(vendor, start, end, granularity="day"):
+    """Doanh thu/số đơn/số sản phẩm theo bucket trong [start, end] (ngày, tính cả hai đầu).
+
+    Đọc từ rollup bằng một query GROUP BY bucket; các bucket không có đơn vẫn có
+    mặt với giá trị 0 để vẽ biểu đồ trực tiếp. Kết quả cache theo
+    (vendor, khoảng, granularity). Raise ValueError nếu tham số không hợp lệ.
+    """
+    if granularity not in SERIES_GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(SERIES_GRANULARITIES)}")
+    if start > end:
+        raise ValueError("start must not be after end")
+    starts = []
+    for bucket in bucket_starts(start, end, granularity):
+        starts.append(bucket)
+        if len(starts) > SERIES_MAX_BUCKETS:
+            raise ValueError(f"range has more than {SERIES_MAX_BUCKETS} buckets")
+
+    key = f"analytics:series:{vendor.pk}:{start.isoformat()}:{end.isoformat()}:{granularity}"
+    series = cache.get(key)
+    if series is not None:
+        return series
+
+    rows = (
+        VendorDailySales.objects.filter(vendor=vendor, day__gte=start, day__lte=end)
+        .annotate(bucket=_BUCKET_EXPRESSIONS[granularity])
+        .values("bucket")
+        .annotate(revenue=Sum("gross"), orders_sum=Sum("orders"), units_sum=Sum("units"))
+        .order_by()
+    )
+    totals = {row["bucket"]: row for row in rows}
+    series = []
+    for bucket in starts:
+        row = totals.get(bucket, {})
+        series.append({
+            "start": bucket,
+            "revenue": row.get("revenue") or Decimal("0"),
+            "orders": row.get("orders_sum") or 0,
+            "units": row.get("units_sum") or 0,
+        })
+    cache.set(key, series, SERIES_CACHE_TTL)
+    return series
+
+
+def fulfillment_latency(vendor, to_status=ORDER_STATUS_SHIPPED, since=None):
+    """Thời gian trung bình từ lúc đặt đơn tới lúc đơn chuyển sang `to_status`.
+
+    Đọc từ OrderStatusHistory theo index (vendor, to_status, changed_at); `since`
+    giới hạn theo thời điểm chuyển trạng thái. Trả về {"orders", "average"}
+    (average là timedelta, None nếu chưa có đơn nào).
+    """
+    history = OrderStatusHistory.objects.filter(vendor=vendor, to_status=to_status)
+    if since is not None:
+        history = history.filter(changed_at__gte=since)
+    row = history.aggregate(
+        orders=Count("order_id", distinct=True),
+        average=Avg(ExpressionWrapper(F("changed_at") - F("order__order_date"), output_field=DurationField())),
+    )
+    return {"orders": row["orders"], "average": row["average"]}
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        # Đăng ký signal gộp giỏ hàng khi đăng nhập, xoá cache giá/coupon khi sửa product/coupon
+        # hoàn tất thanh toán khi nhận IPN PayPal, xoá cache vendor khi sửa vendor/user
+        # cập nhật rollup doanh số khi đơn đổi trạng thái và thống kê sao khi review thay đổi
+        from core import cart, coupons, payments, pricing, reviews, rollups, vendors  # noqa: F401
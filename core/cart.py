@@ -0,0 +1,190 @@
+"""Giỏ hàng lưu trong bảng cart/cart_line thay cho dict trong session.
+
+Session (ẩn danh) chỉ giữ `cart_id`; user đã đăng nhập tìm giỏ theo `user`.
+Mỗi thao tác thêm/sửa/xoá chỉ ghi đúng một dòng `CartLine`, không phụ thuộc
+kích thước giỏ.
+"""
+import hashlib
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.signals import user_logged_in
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from core import pricing
+from core.constants import CART_EXPIRY_DAYS, DEFAULT_CATEGORY_IMAGE
+from core.models import Cart, CartLine, Image
+
+CART_SESSION_KEY = "cart_id"
+
+
+def get_cart(request, create=False):
+    """Trả về giỏ của request hiện tại (None nếu chưa có và create=False)."""
+    if request.user.is_authenticated:
+        cart = Cart.objects.filter(user=request.user).first()
+        if cart is None and create:
+            cart = Cart.objects.create(user=request.user)
+        return cart
+
+    cart_id = request.session.get(CART_SESSION_KEY)
+    cart = Cart.objects.filter(id=cart_id, user__isnull=True).first() if cart_id else None
+    if cart is None and create:
+        cart = Cart.objects.create()
+        request.session[CART_SESSION_KEY] = cart.id
+    return cart
+
+
+def add_line(cart, product_id, qty):
+    """Thêm sản phẩm vào giỏ; nếu đã có thì chỉ cập nhật số lượng."""
+    if update_line_qty(cart, product_id, qty):
+        return
+    try:
+        with transaction.atomic():
+            CartLine.objects.create(cart=cart, product_id=product_id, qty=qty)
+    except IntegrityError:
+        # Request song song vừa tạo dòng này -> cập nhật số lượng
+        update_line_qty(cart, product_id, qty)
+
+
+def update_line_qty(cart, product_id, qty):
+    """Cập nhật số lượng một dòng; trả về True nếu dòng tồn tại."""
+    return CartLine.objects.filter(cart=cart, product_id=product_id).update(
+        qty=qty, updated=timezone.now()
+    ) > 0
+
+
+def remove_line(cart, product_id):
+    CartLine.objects.filter(cart=cart, product_id=product_id).delete()
+
+
+def clear_cart(cart):
+    if cart is not None:
+        cart.lines.all().delete()
+
+
+def get_lines(cart):
+    if cart is None:
+        return []
+    return list(cart.lines.select_related("product"))
+
+
+def cart_items(cart):
+    """Dữ liệu giỏ theo dạng template đang dùng: {pid: {title, qty, price, image, pid, subtotal}}.
+
+    Giá luôn lấy từ pricing (Product.amount), không lưu trong giỏ.
+    """
+    lines = get_lines(cart)
+    titles = {line.product_id: line.product.title for line in lines}
+    priced, _ = pricing.price_lines((line.product_id, line.qty) for line in lines)
+    images = Image.primary_url_map("Product", titles.keys(), default=DEFAULT_CATEGORY_IMAGE)
+    return {
+        line.product_id: {
+            "title": titles[line.product_id],
+            "qty": line.qty,
+            "price": line.unit_price,
+            "image": images[line.product_id],
+            "pid": line.product_id,
+            "subtotal": line.subtotal,
+        }
+        for line in priced
+    }
+
+
+def cart_total(items):
+    return sum((item["subtotal"] for item in items.values()), Decimal("0"))
+
+
+def cart_summary(cart):
+    """([PricedLine], total) chỉ từ pid + qty, không join bảng product."""
+    if cart is None:
+        return [], Decimal("0")
+    return pricing.price_lines(cart.lines.values_list("product_id", "qty"))
+
+
+def cart_version(priced_lines):
+    """Hash nội dung giỏ (pid, qty, giá); đổi khi bất kỳ dòng hoặc giá nào đổi."""
+    raw = "|".join(
+        f"{line.product_id}:{line.qty}:{line.unit_price}"
+        for line in sorted(priced_lines, key=lambda l: l.product_id)
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def items_version(items):
+    """cart_version tính từ kết quả cart_items (không cần query thêm)."""
+    return cart_version(
+        pricing.PricedLine(product_id=pid, qty=item["qty"], unit_price=item["price"])
+        for pid, item in items.items()
+    )
+
+
+def cart_state(cart, product_id=None):
+    """Phản hồi gọn cho các endpoint sửa giỏ: tổng tiền, số dòng, version và dòng vừa đổi."""
+    priced, total = cart_summary(cart)
+    state = {
+        "totalcartitems": len(priced),
+        "cart_total": total,
+        "version": cart_version(priced),
+    }
+    if product_id is not None:
+        line = next((l for l in priced if l.product_id == product_id), None)
+        state["line"] = None if line is None else {
+            "pid": line.product_id,
+            "qty": line.qty,
+            "price": line.unit_price,
+            "subtotal": line.subtotal,
+        }
+    return state
+
+
+def line_count(request):
+    """Số dòng trong giỏ (badge ở header); không tạo giỏ mới."""
+    if not request.user.is_authenticated and not request.session.get(CART_SESSION_KEY):
+        return 0
+    cart = get_cart(request)
+    return cart.lines.count() if cart else 0
+
+
+def merge_carts(source, target):
+    """Gộp giỏ ẩn danh vào giỏ của user: cộng dồn số lượng các sản phẩm trùng."""
+    with transaction.atomic():
+        existing = {
+            line.product_id: line
+            for line in target.lines.filter(product_id__in=source.lines.values("product_id"))
+        }
+        for line in source.lines.filter(product_id__in=existing.keys()):
+            target_line = existing[line.product_id]
+            target_line.qty += line.qty
+            target_line.save(update_fields=["qty", "updated"])
+        source.lines.exclude(product_id__in=existing.keys()).update(cart=target)
+        source.delete()
+
+
+def merge_cart_on_login(sender, request, user, **kwargs):
+    if request is None or not hasattr(request, "session"):
+        return
+    cart_id = request.session.pop(CART_SESSION_KEY, None)
+    if not cart_id:
+        return
+    session_cart = Cart.objects.filter(id=cart_id, user__isnull=True).first()
+    if session_cart is None:
+        return
+    user_cart = Cart.objects.filter(user=user).first()
+    if user_cart is None:
+        session_cart.user = user
+        session_cart.save(update_fields=["user"])
+    else:
+        merge_carts(session_cart, user_cart)
+
+
+def expired_carts(now=None):
+    """Giỏ không có thay đổi nào trong CART_EXPIRY_DAYS ngày."""
+    cutoff = (now or timezone.now()) - timedelta(days=CART_EXPIRY_DAYS)
+    return Cart.objects.annotate(last_activity=Max("lines__updated")).filter(
+        Q(last_activity__lt=cutoff) | Q(last_activity__isnull=True, date__lt=cutoff)
+    )
+
+
+user_logged_in.connect(merge_cart_on_login, dispatch_uid="core.cart.merge_cart_on_login")
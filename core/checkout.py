@@ -0,0 +1,224 @@
+"""Tách giỏ hàng thành các CartOrder theo vendor.
+
+Mỗi vendor trong giỏ có đúng một đơn `pending`; các đơn cùng lần checkout dùng
+chung `checkout_ref`, được cấp mới mỗi khi version giỏ đổi. Dòng giỏ được nhóm theo vendor trong bộ nhớ và toàn bộ
+việc ghi (tạo/cập nhật đơn, thay CartOrderProducts) nằm trong một transaction.
+
+Việc tạo đơn gắn với version của giỏ (`cart.cart_version`): khi giỏ chưa đổi
+kể từ lần tạo đơn trước thì `materialize` chỉ đọc, không ghi gì.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+import shortuuid
+from django.db import transaction
+from django.db.models import Count, F
+
+from core import cart as cart_service, pricing
+from core.constants import ORDER_STATUS_PENDING
+from core.models import CartOrder, CartOrderProducts, Product
+
+
+def pending_orders(user, ref=None):
+    qs = CartOrder.objects.filter(user=user, order_status=ORDER_STATUS_PENDING)
+    if ref is not None:
+        qs = qs.filter(checkout_ref=ref)
+    return qs.select_related("vendor", "coupon").order_by("id")
+
+
+def current_orders(user, cart):
+    """Đơn pending đã tạo cho đúng version giỏ hiện tại; chỉ đọc, không ghi gì.
+
+    Trả về [] khi giỏ rỗng, chưa qua proceed_to_checkout hoặc giỏ đã đổi kể từ đó.
+    """
+    priced, _ = cart_service.cart_summary(cart)
+    if not priced:
+        return []
+    return _orders_for_version(user, cart_service.cart_version(priced))
+
+
+def _orders_for_version(user, version):
+    orders = list(pending_orders(user).prefetch_related("order_products"))
+    if not orders or any(o.cart_version != version for o in orders):
+        return []
+    for order in orders:
+        order.items = [
+            {
+                "title": p.item,
+                "image": p.image,
+                "qty": p.qty,
+                "price": p.price,
+                "subtotal": p.total,
+            }
+            for p in sorted(order.order_products.all(), key=lambda p: p.id)
+        ]
+    return orders
+
+
+def materialize(user, cart):
+    """Đơn pending cho giỏ hiện tại; chỉ gọi split_cart khi version giỏ đã đổi.
+
+    Trả về (orders, dropped_coupons) giống split_cart. Gọi lại nhiều lần với
+    cùng một giỏ là idempotent và không sinh câu lệnh ghi nào.
+    """
+    priced, _ = cart_service.cart_summary(cart)
+    version = cart_service.cart_version(priced)
+    if priced:
+        orders = _orders_for_version(user, version)
+        if orders:
+            return orders, 0
+    elif not pending_orders(user).exists():
+        return [], 0
+    return split_cart(user, cart, version)
+
+
+def split_cart(user, cart, version=""):
+    """Đồng bộ các đơn pending của user với giỏ hiện tại, mỗi vendor một đơn.
+
+    Trả về (orders, dropped_coupons): danh sách đơn theo thứ tự id và số coupon
+    bị gỡ do nội dung đơn đã thay đổi. Đơn nào không đổi nội dung thì giữ nguyên
+    coupon và không ghi lại dòng hàng.
+    """
+    items = cart_service.cart_items(cart)
+    vendor_of = dict(cart.lines.values_list("product_id", "product__vendor_id")) if items else {}
+
+    groups = defaultdict(list)
+    for pid, item in items.items():
+        groups[vendor_of[pid]].append(item)
+
+    with transaction.atomic():
+        existing = list(
+            CartOrder.objects.select_for_update().select_related("vendor", "coupon")
+            .filter(user=user, order_status=ORDER_STATUS_PENDING)
+            .order_by("id")
+        )
+        by_vendor = {}
+        stale = []
+        for order in existing:
+            if order.vendor_id in groups and order.vendor_id not in by_vendor:
+                by_vendor[order.vendor_id] = order
+            else:
+                stale.append(order.id)
+        if stale:
+            CartOrder.objects.filter(id__in=stale).delete()
+        if not groups:
+            return [], 0
+
+        # checkout_ref (và invoice PayPal) gắn với một snapshot giỏ: giỏ đổi thì cấp ref
+        # mới, để IPN của snapshot cũ không tìm thấy và hoàn tất các đơn đã đổi nội dung
+        refs = {o.checkout_ref for o in existing}
+        if existing and not stale and len(refs) == 1 and all(o.cart_version == version for o in existing):
+            ref = refs.pop() or shortuuid.uuid()
+        else:
+            ref = shortuuid.uuid()
+
+        current = defaultdict(set)
+        for order_id, item, qty, price in CartOrderProducts.objects.filter(
+            order__in=by_vendor.values()
+        ).values_list("order_id", "item", "qty", "price"):
+            current[order_id].add((item, qty, price))
+
+        orders, changed, dropped = [], [], 0
+        for vendor_id, vendor_items in groups.items():
+            subtotal = sum((i["subtotal"] for i in vendor_items), Decimal("0"))
+            wanted = {(i["title"], i["qty"], i["price"]) for i in vendor_items}
+            order = by_vendor.get(vendor_id)
+            if order is None:
+                # MySQL không trả PK cho bulk_create nên đơn mới tạo từng cái
+                order = CartOrder.objects.create(
+                    user=user, vendor_id=vendor_id, amount=subtotal, subtotal=subtotal,
+                    order_status=ORDER_STATUS_PENDING, checkout_ref=ref,
+                    cart_version=version,
+                )
+                changed.append(order)
+            elif current[order.id] != wanted:
+                if order.coupon_id:
+                    dropped += 1
+                order.coupon = None
+                changed.append(order)
+            order.checkout_ref = ref
+            order.cart_version = version
+            pricing.order_totals(subtotal, order.coupon).apply_to(order)
+            order.items = vendor_items
+            orders.append(order)
+
+        CartOrder.objects.bulk_update(
+            orders, ["coupon", "checkout_ref", "cart_version", *pricing.ORDER_TOTAL_FIELDS]
+        )
+        if changed:
+            CartOrderProducts.objects.filter(order__in=changed).delete()
+            CartOrderProducts.objects.bulk_create([
+                CartOrderProducts(
+                    order=order,
+                    item=item["title"],
+                    image=item["image"],
+                    qty=item["qty"],
+                    price=item["price"],
+                    total=item["subtotal"],
+                )
+                for order in changed
+                for item in order.items
+            ])
+
+    orders.sort(key=lambda o: o.id)
+    return orders, dropped
+
+
+def apply_coupon(orders, coupon):
+    """Gắn coupon vào đơn của đúng vendor phát hành coupon.
+
+    Trả về đơn đã áp dụng, hoặc None nếu giỏ không có sản phẩm của vendor đó.
+    """
+    order = next((o for o in orders if o.vendor_id == coupon.vendor_id), None)
+    if order is None:
+        return None
+    order.coupon = coupon
+    pricing.order_totals(order.subtotal, coupon).apply_to(order)
+    order.save(update_fields=["coupon", *pricing.ORDER_TOTAL_FIELDS])
+    return order
+
+
+def remove_coupon(order):
+    order.coupon = None
+    pricing.order_totals(order.subtotal).apply_to(order)
+    order.save(update_fields=["coupon", *pricing.ORDER_TOTAL_FIELDS])
+
+
+def reserve_stock(orders):
+    """Trừ tồn kho theo dòng hàng của các đơn; hết hàng thì chuyển sản phẩm về draft."""
+    for order in orders:
+        for item in order.order_products.all():
+            try:
+                # Map từ tên sản phẩm (item) sang Product của vendor này
+                product = Product.objects.get(title=item.item, vendor_id=order.vendor_id)
+            except (Product.DoesNotExist, Product.MultipleObjectsReturned):
+                continue  # bỏ qua nếu không tìm thấy
+
+            if product.stock_count is not None:
+                current_stock = int(product.stock_count or 0)
+                new_stock = max(0, current_stock - item.qty)
+                product.stock_count = new_stock
+                if new_stock == 0:
+                    product.in_stock = False
+                    product.product_status = 'draft'
+                product.save(update_fields=["stock_count", "in_stock", "product_status"])
+
+
+def release_stock(orders):
+    """Hoàn lại tồn kho đã trừ bởi reserve_stock (đơn bị huỷ); không tự publish lại sản phẩm."""
+    qty = defaultdict(int)
+    for vendor_id, title, item_qty in CartOrderProducts.objects.filter(order__in=orders).values_list(
+        "order__vendor_id", "item", "qty"
+    ):
+        qty[vendor_id, title] += item_qty
+    if not qty:
+        return
+    # Giống reserve_stock: bỏ qua tên sản phẩm không tìm thấy hoặc trùng trong cùng vendor
+    matches = (
+        Product.objects.filter(vendor_id__in={v for v, _ in qty}, title__in={t for _, t in qty})
+        .values("vendor_id", "title").annotate(n=Count("pid")).order_by()
+    )
+    for row in matches:
+        key = (row["vendor_id"], row["title"])
+        if row["n"] == 1 and key in qty:
+            Product.objects.filter(vendor_id=key[0], title=key[1]).update(stock_count=F("stock_count") + qty[key])
@@ -1,4 +1,5 @@
 # Constants and Choices for E-commerce Models
+from decimal import Decimal
 
 # Order Status Choices
 STATUS_CHOICE = (
@@ -86,6 +87,7 @@ MAX_LENGTH_LIFE = 100
 MAX_LENGTH_PRODUCT_STATUS = 20
 MAX_LENGTH_ORDER_STATUS = 50
 MAX_DIGITS_AMOUNT = 10
+MAX_DIGITS_DISCOUNT_PERCENT = 5
 MAX_LENGTH_CID=100
 MAX_LENGTH_PID = 20
 MAX_LENGTH_VID=100
@@ -110,3 +112,113 @@ PRODUCT_STATUS_PUBLISHED = "published"
 PRODUCT_STATUS_DELETED = "deleted"
 PRODUCTS_PER_PAGE = 15
 DEFAULT_PAGE= 1
+CART_EXPIRY_DAYS = 30
+PRICE_CACHE_TTL = 30  # giây
+PRICE_CACHE_MAX_ENTRIES = 10000
+MAX_LENGTH_CHECKOUT_REF = 32
+ORDER_STATUS_PENDING = "pending"
+ORDER_STATUS_PROCESSING = "processing"
+ORDER_STATUS_SHIPPED = "shipped"
+ORDER_STATUS_DELIVERED = "delivered"
+ORDER_STATUS_CANCELLED = "cancelled"
+ORDER_STATUS_REFUNDED = "refunded"
+MAX_LENGTH_CART_VERSION = 16
+COUPON_CACHE_TTL = 300  # giây, không vượt quá expiry_date của coupon
+COUPON_CACHE_MISS_TTL = 30  # giây, cho mã không tồn tại/không active
+ORDER_TAX_RATE = Decimal("0")
+ORDER_SHIPPING_FEE = Decimal("0")
+MAX_LENGTH_TXN_ID = 255
+MAX_LENGTH_PAYMENT_ISSUE = 255
+PAYPAL_INVOICE_PREFIX = "INV-"
+MAX_LENGTH_EMAIL_SUBJECT = 255
+MAX_LENGTH_EMAIL_STATUS = 20
+EMAIL_STATUS_PENDING = "pending"
+EMAIL_STATUS_SENT = "sent"
+EMAIL_STATUS_FAILED = "failed"
+EMAIL_STATUS_CHOICES = (
+    (EMAIL_STATUS_PENDING, 'Pending'),
+    (EMAIL_STATUS_SENT, 'Sent'),
+    (EMAIL_STATUS_FAILED, 'Failed'),
+)
+EMAIL_BATCH_SIZE = 50
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_BASE_SECONDS = 60  # lần thử lại thứ n chờ base * 2^(n-1) giây
+EMAIL_RETRY_MAX_SECONDS = 3600
+EMAIL_CLAIM_SECONDS = 300  # lô đã nhận bị bỏ dở (worker chết) được gửi lại sau chừng này giây
+MAX_LENGTH_EMAIL_CHECK_KEY = 330  # "domain:"/"address:" + email tối đa 320 ký tự
+MAX_LENGTH_EMAIL_VERDICT = 10
+EMAIL_VERDICT_VALID = "valid"
+EMAIL_VERDICT_INVALID = "invalid"
+EMAIL_VERDICT_UNKNOWN = "unknown"
+EMAIL_VERDICT_CHOICES = (
+    (EMAIL_VERDICT_VALID, 'Valid'),
+    (EMAIL_VERDICT_INVALID, 'Invalid'),
+    (EMAIL_VERDICT_UNKNOWN, 'Unknown'),
+)
+EMAIL_CHECK_VALID_TTL = 30 * 24 * 3600  # giây
+EMAIL_CHECK_INVALID_TTL = 24 * 3600
+EMAIL_CHECK_UNKNOWN_TTL = 3600
+EMAIL_VALIDATOR_TIMEOUT = 2  # giây
+EMAIL_BREAKER_THRESHOLD = 5  # số lỗi liên tiếp trước khi ngắt
+EMAIL_BREAKER_COOLDOWN = 60  # giây
+DISPOSABLE_EMAIL_DOMAINS = frozenset({
+    "mailinator.com", "guerrillamail.com", "10minutemail.com", "tempmail.com",
+    "trashmail.com", "yopmail.com", "sharklasers.com", "getnada.com",
+})
+VENDOR_CACHE_TTL = 60  # giây, cache vendor theo user
+DASHBOARD_CACHE_TTL = 5  # giây, cache KPI dashboard theo vendor
+DASHBOARD_NEW_CUSTOMERS = 6
+MAX_DIGITS_ROLLUP_AMOUNT = 14
+# Đơn được tính vào doanh số (rollup): đã đặt, chưa huỷ/hoàn tiền
+SALES_ORDER_STATUSES = ("processing", "shipped", "delivered")
+SERIES_GRANULARITIES = ("day", "week", "month")
+SERIES_DEFAULT_DAYS = 30
+SERIES_MAX_BUCKETS = 400
+SERIES_CACHE_TTL = 60  # giây, cache chuỗi doanh số theo (vendor, khoảng, granularity)
+EXPORT_CHUNK_SIZE = 2000  # số dòng đọc mỗi lần khi export (QuerySet.iterator)
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_XLSX = "xlsx"
+EXPORT_FORMAT_CHOICES = (
+    (EXPORT_FORMAT_CSV, 'CSV'),
+    (EXPORT_FORMAT_XLSX, 'Excel (XLSX)'),
+)
+EXPORT_KIND_CHOICES = (
+    ("orders", 'Orders'),
+    ("order_items", 'Order items'),
+    ("products", 'Products'),
+)
+MAX_LENGTH_EXPORT_KIND = 20
+MAX_LENGTH_EXPORT_FORMAT = 10
+MAX_LENGTH_JOB_STATUS = 10
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+JOB_STATUS_CHOICES = (
+    (JOB_STATUS_PENDING, 'Pending'),
+    (JOB_STATUS_RUNNING, 'Running'),
+    (JOB_STATUS_DONE, 'Done'),
+    (JOB_STATUS_FAILED, 'Failed'),
+)
+IMPORT_BATCH_SIZE = 1000  # số dòng validate + bulk_create mỗi lô khi import product
+IMPORT_MAX_REPORTED_ERRORS = 200
+MAX_LENGTH_IMAGE_URL_IMPORT = 1000
+IMAGE_IMPORT_BATCH_SIZE = 20
+IMAGE_IMPORT_MAX_ATTEMPTS = 3
+IMAGE_IMPORT_RETRY_BASE_SECONDS = 60  # lần thử lại thứ n chờ base * 2^(n-1) giây
+IMAGE_IMPORT_RETRY_MAX_SECONDS = 3600
+IMAGE_IMPORT_CLAIM_SECONDS = 600  # lô đã nhận bị bỏ dở được xử lý lại sau chừng này giây
+BULK_ADJUST_PERCENT_MIN = Decimal("-99")
+BULK_ADJUST_PERCENT_MAX = Decimal("1000")
+BULK_ACTION_MAX_PRODUCTS = 5000
+MAX_LENGTH_COUPON_STATUS = 10
+COUPON_STATUS_ACTIVE = "active"
+COUPON_STATUS_INACTIVE = "inactive"
+COUPON_STATUS_EXPIRED = "expired"
+COUPON_STATUS_CHOICES = (
+    (COUPON_STATUS_ACTIVE, 'Active'),
+    (COUPON_STATUS_INACTIVE, 'Inactive'),
+    (COUPON_STATUS_EXPIRED, 'Expired'),
+)
+COUPON_EXPIRY_SWEEP_INTERVAL = 60  # giây giữa hai lần quét của `expire_coupons --loop`
+BULK_ACTION_MAX_ORDERS = 500
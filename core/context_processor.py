@@ -1,4 +1,5 @@
 from core.models import *
+from core.cart import line_count
 from django.db.models import Min, Max
 
 def default(request):
@@ -16,3 +17,6 @@ def wishlist_count(request):
     else:
         count = 0
     return {"wishlist_count": count}
+
+def cart_count(request):
+    return {"cart_count": line_count(request)}
@@ -0,0 +1,236 @@
+"""Kiểm tra và ghi nhận sử dụng coupon.
+
+Mã coupon luôn được lưu dạng chữ hoa (Coupon.save), nên tra cứu là so khớp
+chính xác trên unique index thay cho `code__iexact`. Coupon đang active được
+cache theo mã với TTL không vượt quá thời điểm hết hạn; sửa/xoá coupon sẽ xoá
+cache ngay. Lượt dùng của từng user được ghi vào CouponUser trong transaction,
+unique constraint (coupon, user) đảm bảo coupon `apply_once_per_user` không thể
+dùng hai lần kể cả khi hai request chạy song song. Cùng transaction đó tăng
+Coupon.usage_count/orders_count bằng F(), nên trang coupon không phải đếm lại.
+"""
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+from django.utils.translation import gettext as _, gettext_lazy
+
+from core.constants import (
+    COUPON_CACHE_MISS_TTL,
+    COUPON_CACHE_TTL,
+    COUPON_STATUS_ACTIVE,
+    COUPON_STATUS_EXPIRED,
+    ORDER_STATUS_PENDING,
+)
+from core.models import CartOrder, Coupon, CouponUser
+
+_MISSING = "missing"
+
+
+class CouponUsageError(Exception):
+    """User đã dùng coupon chỉ cho phép dùng một lần."""
+
+    message = gettext_lazy("You have already used this coupon.")
+
+    def __init__(self, coupon):
+        super().__init__(coupon.code)
+        self.coupon = coupon
+
+
+class CouponUnavailableError(CouponUsageError):
+    """Coupon đã bị tắt hoặc hết hạn sau khi được áp vào đơn (cache có thể còn bản cũ)."""
+
+    message = gettext_lazy("This coupon is no longer available.")
+
+
+@dataclass
+class CouponCheck:
+    code: str
+    coupon: Optional[Coupon] = None
+    order: Optional[object] = None
+    error: str = ""
+
+    @property
+    def valid(self):
+        return not self.error
+
+
+def normalize_code(code):
+    return (code or "").strip().upper()
+
+
+def _cache_key(code):
+    return f"coupon:{code}"
+
+
+def _cache_timeout(coupon):
+    remaining = (coupon.expiry_date - timezone.now()).total_seconds()
+    if remaining <= 0:
+        return COUPON_CACHE_MISS_TTL
+    return max(1, min(COUPON_CACHE_TTL, int(remaining)))
+
+
+def get_active_coupons(codes):
+    """{code: Coupon} cho các mã đang active (1 query cho các mã chưa có trong cache)."""
+    codes = {normalize_code(c) for c in codes} - {""}
+    cached = cache.get_many([_cache_key(c) for c in codes])
+    found = {}
+    missing = []
+    for code in codes:
+        value = cached.get(_cache_key(code))
+        if value is None:
+            missing.append(code)
+        elif value != _MISSING:
+            found[code] = value
+
+    if missing:
+        fetched = {c.code: c for c in Coupon.objects.filter(code__in=missing, active=True)}
+        for code in missing:
+            coupon = fetched.get(code)
+            if coupon is None:
+                cache.set(_cache_key(code), _MISSING, COUPON_CACHE_MISS_TTL)
+            else:
+                cache.set(_cache_key(code), coupon, _cache_timeout(coupon))
+        found.update(fetched)
+    return found
+
+
+def get_active_coupon(code):
+    return get_active_coupons([code]).get(normalize_code(code))
+
+
+def used_coupon_ids(user, coupons):
+    if not coupons:
+        return set()
+    return set(
+        CouponUser.objects.filter(user=user, coupon__in=coupons).values_list("coupon_id", flat=True)
+    )
+
+
+def validate_codes(codes, user, orders):
+    """Kiểm tra nhiều mã cùng lúc cho các đơn pending của user.
+
+    Trả về {mã đã chuẩn hoá: CouponCheck} theo thứ tự đầu vào; tổng cộng tối đa
+    2 query bất kể số mã.
+    """
+    normalized = list(dict.fromkeys(normalize_code(c) for c in codes if normalize_code(c)))
+    coupons = get_active_coupons(normalized)
+    used = used_coupon_ids(user, [c for c in coupons.values() if c.apply_once_per_user])
+    now = timezone.now()
+
+    results = {}
+    for code in normalized:
+        coupon = coupons.get(code)
+        check = CouponCheck(code=code, coupon=coupon)
+        results[code] = check
+        if coupon is None:
+            check.error = _("Invalid coupon code.")
+            continue
+        order = next((o for o in orders if o.vendor_id == coupon.vendor_id), None)
+        check.order = order
+        if coupon.expiry_date < now:
+            check.error = _("Coupon has expired.")
+        elif order is None:
+            check.error = _("This coupon is not valid for any item in your cart.")
+        elif order.subtotal < coupon.min_order_amount:
+            check.error = _("Minimum order amount should be $%(amount)s") % {"amount": coupon.min_order_amount}
+        elif order.coupon_id == coupon.id and coupon.apply_once_per_user:
+            check.error = _("You have already applied this coupon.")
+        elif coupon.id in used:
+            check.error = _("You have already used this coupon.")
+    return results
+
+
+def record_usage(user, orders, strict=True):
+    """Ghi CouponUser cho các đơn có coupon; raise CouponUsageError nếu vượt giới hạn.
+
+    Phải gọi bên trong transaction của bước đặt hàng để lỗi rollback cả đơn (kể
+    cả bộ đếm usage_count/orders_count).
+    strict=False chỉ ghi nhận (dùng khi tiền đã được thanh toán, ví dụ IPN PayPal).
+    Coupon được đọc lại từ DB (khoá dòng) vì cache theo process có thể còn bản
+    đã bị tắt/hết hạn; raise CouponUnavailableError nếu coupon không còn dùng được.
+    """
+    if strict:
+        _check_available(o.coupon for o in orders if o.coupon_id)
+    placed = Counter()
+    new_users = Counter()
+    for order in orders:
+        coupon = order.coupon
+        if coupon is None:
+            continue
+        placed[coupon.id] += 1
+        if not strict or not coupon.apply_once_per_user:
+            _, created = CouponUser.objects.get_or_create(coupon=coupon, user=user)
+            new_users[coupon.id] += created
+            continue
+        try:
+            with transaction.atomic():
+                CouponUser.objects.create(coupon=coupon, user=user)
+        except IntegrityError:
+            raise CouponUsageError(coupon)
+        new_users[coupon.id] += 1
+
+    for coupon_id, count in placed.items():
+        Coupon.objects.filter(pk=coupon_id).update(
+            orders_count=F("orders_count") + count, usage_count=F("usage_count") + new_users[coupon_id],
+        )
+
+
+def _check_available(coupons):
+    coupons = {c.id: c for c in coupons}
+    if not coupons:
+        return
+    now = timezone.now()
+    available = set(
+        Coupon.objects.select_for_update()
+        .filter(pk__in=coupons, active=True, status=COUPON_STATUS_ACTIVE, expiry_date__gt=now)
+        .values_list("pk", flat=True)
+    )
+    for coupon_id, coupon in coupons.items():
+        if coupon_id not in available:
+            raise CouponUnavailableError(coupon)
+
+
+def expire_due(now=None):
+    """Chuyển mọi coupon active đã quá hạn sang expired bằng một câu UPDATE. Trả về số coupon.
+
+    Cache coupon không cần xoá: TTL của cache không vượt quá expiry_date.
+    """
+    return Coupon.objects.filter(
+        status=COUPON_STATUS_ACTIVE, expiry_date__lte=now or timezone.now()
+    ).update(status=COUPON_STATUS_EXPIRED)
+
+
+def invalidate(codes):
+    cache.delete_many([_cache_key(normalize_code(c)) for c in codes])
+
+
+def _invalidate_coupon(sender, instance, **kwargs):
+    invalidate([instance.code])
+
+
+def _invalidate_old_code(sender, instance, **kwargs):
+    # Đổi mã coupon: xoá luôn cache của mã cũ
+    if instance.pk:
+        invalidate(Coupon.objects.filter(pk=instance.pk).values_list("code", flat=True))
+
+
+def _uncount_user(sender, instance, **kwargs):
+    Coupon.objects.filter(pk=instance.coupon_id, usage_count__gt=0).update(usage_count=F("usage_count") - 1)
+
+
+def _uncount_order(sender, instance, **kwargs):
+    # Đơn pending chưa được record_usage đếm
+    if instance.coupon_id and instance.order_status != ORDER_STATUS_PENDING:
+        Coupon.objects.filter(pk=instance.coupon_id, orders_count__gt=0).update(orders_count=F("orders_count") - 1)
+
+
+pre_save.connect(_invalidate_old_code, sender=Coupon, dispatch_uid="core.coupons.invalidate_old_code")
+post_save.connect(_invalidate_coupon, sender=Coupon, dispatch_uid="core.coupons.invalidate_on_save")
+post_delete.connect(_invalidate_coupon, sender=Coupon, dispatch_uid="core.coupons.invalidate_on_delete")
+post_delete.connect(_uncount_user, sender=CouponUser, dispatch_uid="core.coupons.uncount_user")
+post_delete.connect(_uncount_order, sender=CartOrder, dispatch_uid="core.coupons.uncount_order")
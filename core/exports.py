@@ -0,0 +1,193 @@
+"""Export đơn hàng/sản phẩm của vendor ra CSV hoặc XLSX.
+
+Các dòng được đọc bằng `values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)`
+nên bộ nhớ không phụ thuộc số dòng: CSV được stream thẳng qua
+StreamingHttpResponse, XLSX được ghi bằng openpyxl ở chế độ write-only ra file
+tạm rồi trả về. Export rất lớn chạy nền qua ExportJob: lệnh `run_exports` ghi
+file vào settings.EXPORT_ROOT và gửi email kèm link tải khi xong.
+"""
+import csv
+import logging
+import os
+import tempfile
+from datetime import datetime
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from core import constants as C
+from core.analytics import PLACED_ORDER_STATUSES
+from core.models import CartOrder, CartOrderProducts, ExportJob, Product
+from utils.email_service import queue_email
+
+logger = logging.getLogger(__name__)
+
+# kind -> (model, [(tiêu đề cột, field cho values_list)], hàm lọc theo vendor)
+EXPORTS = {
+    "orders": (
+        CartOrder,
+        [
+            ("Order ID", "id"), ("Date", "order_date"), ("Customer", "user__username"),
+            ("Email", "user__email"), ("Subtotal", "subtotal"), ("Discount", "discount"),
+            ("Tax", "tax"), ("Shipping", "shipping"), ("Total", "amount"),
+            ("Status", "order_status"), ("Paid", "paid_status"), ("Checkout ref", "checkout_ref"),
+        ],
+        lambda vendor: {"vendor": vendor, "order_status__in": PLACED_ORDER_STATUSES},
+    ),
+    "order_items": (
+        CartOrderProducts,
+        [
+            ("Order ID", "order_id"), ("Date", "order__order_date"), ("Item", "item"),
+            ("Qty", "qty"), ("Price", "price"), ("Total", "total"), ("Status", "order__order_status"),
+        ],
+        lambda vendor: {"order__vendor": vendor, "order__order_status__in": PLACED_ORDER_STATUSES},
+    ),
+    "products": (
+        Product,
+        [
+            ("Product ID", "pid"), ("Title", "title"), ("Category", "category__title"),
+            ("Price", "amount"), ("Old price", "old_price"), ("Stock", "stock_count"),
+            ("Status", "product_status"), ("Created", "date"),
+        ],
+        lambda vendor: {"vendor": vendor},
+    ),
+}
+
+
+def headers(kind):
+    return [title for title, _ in EXPORTS[kind][1]]
+
+
+def rows(kind, vendor, chunk_size=C.EXPORT_CHUNK_SIZE):
+    """Các dòng dữ liệu (tuple) của export, đọc theo từng chunk."""
+    model, columns, scope = EXPORTS[kind]
+    queryset = (
+        model.objects.filter(**scope(vendor))
+        .order_by("pk")
+        .values_list(*[name for _, name in columns])
+    )
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield tuple(_cell(value) for value in row)
+
+
+def _cell(value):
+    # XLSX không lưu được timezone: xuất giờ địa phương
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    return value
+
+
+def filename(kind, file_format, vendor):
+    return f"{vendor.vid}-{kind}-{timezone.localdate():%Y%m%d}.{file_format}"
+
+
+class _Echo:
+    """File giả cho csv.writer: trả lại dòng vừa ghi để stream."""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(kind, vendor):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers(kind))
+    for row in rows(kind, vendor):
+        yield writer.writerow(row)
+
+
+def write_csv(kind, vendor, path):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers(kind))
+        for row in rows(kind, vendor):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def xlsx_available():
+    """openpyxl là dependency tuỳ chọn: thiếu thì ẩn nút XLSX và từ chối export XLSX."""
+    return find_spec("openpyxl") is not None
+
+
+def write_xlsx(kind, vendor, path):
+    # openpyxl chỉ cần khi export XLSX
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(kind)
+    sheet.append(headers(kind))
+    count = 0
+    for row in rows(kind, vendor):
+        sheet.append(row)
+        count += 1
+    workbook.save(path)
+    return count
+
+
+WRITERS = {C.EXPORT_FORMAT_CSV: write_csv, C.EXPORT_FORMAT_XLSX: write_xlsx}
+
+
+def xlsx_tempfile(kind, vendor):
+    """Ghi XLSX ra file tạm (tự xoá khi đóng) và trả về file đã mở để stream."""
+    tmp = tempfile.NamedTemporaryFile(suffix=".xlsx")
+    write_xlsx(kind, vendor, tmp.name)
+    tmp.seek(0)
+    return tmp
+
+
+def _claim_job():
+    with transaction.atomic():
+        job = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .select_related("vendor", "user")
+            .filter(status=C.JOB_STATUS_PENDING)
+            .order_by("id")
+            .first()
+        )
+        if job is not None:
+            job.status = C.JOB_STATUS_RUNNING
+            job.save(update_fields=["status"])
+    return job
+
+
+def run_job(job):
+    os.makedirs(settings.EXPORT_ROOT, exist_ok=True)
+    path = os.path.join(settings.EXPORT_ROOT, f"{job.pk}-{filename(job.kind, job.file_format, job.vendor)}")
+    try:
+        job.rows = WRITERS[job.file_format](job.kind, job.vendor, path)
+    except Exception as e:
+        logger.exception("Export job %s failed", job.pk)
+        job.status = C.JOB_STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = C.JOB_STATUS_DONE
+        job.file_path = path
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "rows", "file_path", "error", "finished_at"])
+
+    if job.status == C.JOB_STATUS_DONE:
+        queue_email(
+            _("Your export is ready"),
+            _("Your %(kind)s export (%(rows)s rows) is ready: %(url)s") % {
+                "kind": job.get_kind_display(), "rows": job.rows, "url": job.download_url,
+            },
+            [job.user.email],
+        )
+    return job
+
+
+def run_pending_jobs(limit=None):
+    """Chạy các ExportJob đang chờ (từng job một, khoá SKIP LOCKED). Trả về số job đã chạy."""
+    done = 0
+    while limit is None or done < limit:
+        job = _claim_job()
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
@@ -0,0 +1,115 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from taggit.models import Tag
+
+from core.constants import PRODUCT_STATUS_PUBLISHED, PRODUCTS_PER_PAGE
+from core.models import Product, ProductTag, Vendor
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thời gian lọc sản phẩm theo tag trên bảng product_tag. "
+        "Dữ liệu giả được tạo trong một transaction và rollback khi xong."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--links", type=int, default=1_000_000, help="Số dòng product_tag cần tạo")
+        parser.add_argument("--products", type=int, default=100_000, help="Số product giả")
+        parser.add_argument("--tags", type=int, default=1_000, help="Số tag giả")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--runs", type=int, default=5, help="Số lần chạy mỗi truy vấn")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._seed(options)
+                self._benchmark(options["runs"])
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS("Benchmark finished, seeded data rolled back."))
+
+    def _seed(self, options):
+        batch_size = options["batch_size"]
+        vendor = Vendor.objects.create(
+            vid="v-bench-tags",
+            title="Benchmark vendor",
+            description="",
+            address="",
+            contact="",
+            chat_resp_time=0,
+            shipping_on_time=0,
+            authentic_rating=0,
+            days_return=0,
+            warranty_period=0,
+        )
+
+        tags = Tag.objects.bulk_create(
+            [Tag(name=f"bench-{i}", slug=f"bench-{i}") for i in range(options["tags"])],
+            batch_size=batch_size,
+        )
+        products = Product.objects.bulk_create(
+            [
+                # sku mặc định chỉ có 4 chữ số -> tự gán để không bị trùng khi tạo nhiều product
+                Product(
+                    title=f"Bench product {i}",
+                    sku=f"b{i:09d}",
+                    vendor=vendor,
+                    product_status=PRODUCT_STATUS_PUBLISHED,
+                )
+                for i in range(options["products"])
+            ],
+            batch_size=batch_size,
+        )
+
+        started = time.perf_counter()
+        pairs = set()
+        links = min(options["links"], len(products) * len(tags))
+        while len(pairs) < links:
+            pairs.add((random.randrange(len(products)), random.randrange(len(tags))))
+        batch = []
+        for product_idx, tag_idx in pairs:
+            batch.append(ProductTag(content_object_id=products[product_idx].pid, tag_id=tags[tag_idx].pk))
+            if len(batch) >= batch_size:
+                ProductTag.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            ProductTag.objects.bulk_create(batch)
+        self.stdout.write(f"Seeded {links} tag links in {time.perf_counter() - started:.2f}s")
+
+        self.tag = tags[0]
+
+    def _time(self, label, runs, func):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(f"{label}: median {timings[len(timings) // 2]:.1f} ms, max {timings[-1]:.1f} ms")
+
+    def _benchmark(self, runs):
+        published = Product.objects.filter(product_status=PRODUCT_STATUS_PUBLISHED)
+
+        self._time(
+            "filter by tag (first page)",
+            runs,
+            lambda: list(published.filter(tags__in=[self.tag]).order_by("-pid")[:PRODUCTS_PER_PAGE]),
+        )
+        self._time(
+            "count products by tag",
+            runs,
+            lambda: published.filter(tags__in=[self.tag]).count(),
+        )
+        self._time(
+            "page with prefetch_related('tags')",
+            runs,
+            lambda: list(published.order_by("-pid").prefetch_related("tags")[:PRODUCTS_PER_PAGE]),
+        )
+        self.stdout.write(f"SQL: {published.filter(tags__in=[self.tag]).query}")
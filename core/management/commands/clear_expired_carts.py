@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.cart import expired_carts
+from core.constants import CART_EXPIRY_DAYS
+
+
+class Command(BaseCommand):
+    help = f"Xoá các giỏ hàng không hoạt động quá {CART_EXPIRY_DAYS} ngày. Nên chạy định kỳ (cron)."
+
+    def handle(self, *args, **options):
+        deleted, _ = expired_carts().delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired cart rows."))
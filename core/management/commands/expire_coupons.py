@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import coupons
+from core.constants import COUPON_EXPIRY_SWEEP_INTERVAL
+
+
+class Command(BaseCommand):
+    help = "Chuyển các coupon đã quá hạn sang trạng thái expired (chạy định kỳ hoặc --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Chạy liên tục như một worker")
+        parser.add_argument(
+            "--sleep", type=float, default=COUPON_EXPIRY_SWEEP_INTERVAL, help="Số giây giữa hai lần quét (--loop)"
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            total += coupons.expire_due()
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Expired {total} coupons."))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Vendor
+from useradmin.product_import import ImportFileError, import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = "Import product hàng loạt cho một vendor từ file CSV/JSON (dùng cho catalog lớn)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("vendor", help="vid của vendor")
+        parser.add_argument("path", help="Đường dẫn file .csv hoặc .json")
+        parser.add_argument("--format", choices=("csv", "json"), help="Mặc định đoán theo đuôi file")
+        parser.add_argument("--publish", action="store_true", help="Publish các product đủ điều kiện")
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        vendor = Vendor.objects.filter(vid=options["vendor"]).first()
+        if vendor is None:
+            raise CommandError(f"Vendor {options['vendor']} does not exist.")
+        kwargs = {"publish": options["publish"]}
+        if options["batch_size"]:
+            kwargs["batch_size"] = options["batch_size"]
+        try:
+            with open(options["path"], "rb") as f:
+                result = import_products(vendor, read_rows(f, options["format"]), **kwargs)
+        except ImportFileError as e:
+            if e.result is not None and (e.result.created or e.result.failed):
+                raise CommandError(
+                    f"{e} (after row {e.result.created + e.result.failed}; "
+                    f"{e.result.created} products from earlier rows were imported)"
+                )
+            raise CommandError(str(e))
+        except OSError as e:
+            raise CommandError(str(e))
+        for row_number, errors in result.errors:
+            self.stdout.write(f"Row {row_number}: {errors}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result.created} products, {result.failed} rows failed, {result.images_queued} images queued."
+        ))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.constants import IMAGE_IMPORT_BATCH_SIZE, IMAGE_IMPORT_MAX_ATTEMPTS
+from core.product_images import ingest_pending
+
+
+class Command(BaseCommand):
+    help = "Tải ảnh của các product được import (product_image_import) lên Cloudinary theo lô."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=IMAGE_IMPORT_BATCH_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=IMAGE_IMPORT_MAX_ATTEMPTS)
+        parser.add_argument("--loop", action="store_true", help="Chạy liên tục như một worker")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Số giây chờ khi hàng đợi rỗng (--loop)")
+
+    def handle(self, *args, **options):
+        total_done = total_failed = 0
+        while True:
+            done, failed = ingest_pending(options["batch_size"], options["max_attempts"])
+            total_done += done
+            total_failed += failed
+            if done or failed:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Imported {total_done} images, {total_failed} failed."))
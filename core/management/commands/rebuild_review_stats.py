@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import reviews
+
+
+class Command(BaseCommand):
+    help = "Dựng lại bảng số review theo sao (product_rating_count) và Product.rating_avg."
+
+    def handle(self, *args, **options):
+        products = reviews.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt review stats for {products} products."))
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import rollups
+from core.models import Vendor
+
+
+class Command(BaseCommand):
+    help = "Dựng lại bảng doanh số theo ngày (vendor_daily_sales) từ CartOrder."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vendor", help="vid của vendor cần dựng lại (mặc định: tất cả)")
+        parser.add_argument("--since", help="Chỉ dựng lại từ ngày này (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        vendor = None
+        if options["vendor"]:
+            vendor = Vendor.objects.filter(vid=options["vendor"]).first()
+            if vendor is None:
+                raise CommandError(f"Vendor {options['vendor']} does not exist.")
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be YYYY-MM-DD.")
+        rows = rollups.rebuild(vendor=vendor, since=since)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily rollup rows."))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.exports import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Chạy các export đang chờ (ExportJob): ghi file vào EXPORT_ROOT và gửi email báo khi xong."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Số job tối đa mỗi lần chạy")
+        parser.add_argument("--loop", action="store_true", help="Chạy liên tục như một worker")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Số giây chờ khi không có job (--loop)")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            done = run_pending_jobs(options["limit"])
+            total += done
+            if not options["loop"]:
+                break
+            if not done:
+                time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Ran {total} export jobs."))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.constants import EMAIL_BATCH_SIZE, EMAIL_MAX_ATTEMPTS
+from utils.email_service import deliver_outbox
+
+
+class Command(BaseCommand):
+    help = "Gửi email trong outbox theo lô qua một kết nối SMTP, có thử lại với backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=EMAIL_BATCH_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=EMAIL_MAX_ATTEMPTS)
+        parser.add_argument("--loop", action="store_true", help="Chạy liên tục như một worker")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Số giây chờ khi outbox rỗng (--loop)")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver_outbox(options["batch_size"], options["max_attempts"])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                # Có thể còn lô tiếp theo đến hạn, gửi tiếp ngay
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Sent {total_sent} emails, {total_failed} failed."))
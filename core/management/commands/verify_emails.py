@@ -0,0 +1,43 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Lower
+
+from core.constants import EMAIL_VERDICT_INVALID
+from utils.email_validation import pending_addresses, verify_remote
+
+
+class Command(BaseCommand):
+    help = (
+        "Kiểm tra lại (qua validator từ xa) các email đang có kết quả unknown, ví dụ khi bật "
+        "EMAIL_VALIDATION_DEFERRED. Tài khoản (không phải staff) có email bị xác định sai "
+        "sẽ bị khoá (is_active=False), giống như khi đăng ký bị từ chối."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=500)
+
+    def handle(self, *args, **options):
+        # verify_remote lưu verdict vào email_check; lệnh này chỉ tổng hợp và khoá tài khoản
+        verdicts = Counter()
+        invalid = []
+        for email in pending_addresses(options["limit"]):
+            verdict = verify_remote(email)
+            verdicts[verdict] += 1
+            if verdict == EMAIL_VERDICT_INVALID:
+                invalid.append(email)
+                self.stdout.write(f"Invalid: {email}")
+
+        deactivated = 0
+        if invalid:
+            deactivated = (
+                get_user_model().objects.annotate(email_lower=Lower("email"))
+                .filter(email_lower__in=invalid, is_active=True, is_staff=False)
+                .update(is_active=False)
+            )
+        summary = ", ".join(f"{count} {verdict}" for verdict, count in sorted(verdicts.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {sum(verdicts.values())} emails ({summary or 'none pending'}); "
+            f"deactivated {deactivated} accounts."
+        ))
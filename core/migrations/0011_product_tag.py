@@ -0,0 +1,101 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:04
+
+import django.db.models.deletion
+import taggit.managers
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+
+def copy_uuid_tagged_items(apps, schema_editor):
+    """Chuyển các dòng UUIDTaggedItem của Product sang bảng product_tag (FK thật)."""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    UUIDTaggedItem = apps.get_model('core', 'UUIDTaggedItem')
+    ProductTag = apps.get_model('core', 'ProductTag')
+    Product = apps.get_model('core', 'Product')
+
+    product_ct = ContentType.objects.filter(app_label='core', model='product').first()
+    if product_ct is None:
+        return
+
+    # object_id không có FK nên có thể mồ côi -> chỉ lấy các dòng còn product
+    rows = (
+        UUIDTaggedItem.objects
+        .filter(content_type=product_ct, object_id__in=Product.objects.values('pid'))
+        .values_list('object_id', 'tag_id')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for object_id, tag_id in rows:
+        batch.append(ProductTag(content_object_id=object_id, tag_id=tag_id))
+        if len(batch) >= BATCH_SIZE:
+            ProductTag.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        ProductTag.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def copy_product_tags_back(apps, schema_editor):
+    """Chép ngược product_tag về UUIDTaggedItem, bỏ qua các cặp (object_id, tag_id) đã có.
+
+    Bước forward không xoá UUIDTaggedItem nên chạy lùi rồi tiến lại không được nhân đôi tag.
+    """
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    UUIDTaggedItem = apps.get_model('core', 'UUIDTaggedItem')
+    ProductTag = apps.get_model('core', 'ProductTag')
+
+    product_ct, _ = ContentType.objects.get_or_create(app_label='core', model='product')
+    existing = set(
+        UUIDTaggedItem.objects.filter(content_type=product_ct).values_list('object_id', 'tag_id')
+    )
+    batch = []
+    rows = ProductTag.objects.values_list('content_object_id', 'tag_id').iterator(chunk_size=BATCH_SIZE)
+    for object_id, tag_id in rows:
+        if (object_id, tag_id) in existing:
+            continue
+        existing.add((object_id, tag_id))
+        batch.append(UUIDTaggedItem(content_type=product_ct, object_id=object_id, tag_id=tag_id))
+        if len(batch) >= BATCH_SIZE:
+            UUIDTaggedItem.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        UUIDTaggedItem.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0010_merge_20250826_1651'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_object', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tagged_items', to='core.product')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_items', to='taggit.tag')),
+            ],
+            options={
+                'verbose_name': 'Product Tag',
+                'verbose_name_plural': 'Product Tags',
+                'db_table': 'product_tag',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='producttag',
+            constraint=models.UniqueConstraint(fields=('content_object', 'tag'), name='unique_product_tag'),
+        ),
+        migrations.RunPython(copy_uuid_tagged_items, copy_product_tags_back),
+        migrations.AlterField(
+            model_name='product',
+            name='tags',
+            field=taggit.managers.TaggableManager(blank=True, help_text='A comma-separated list of tags.', through='core.ProductTag', to='taggit.Tag', verbose_name='Tags'),
+        ),
+        migrations.AddIndex(
+            model_name='producttag',
+            index=models.Index(fields=['tag', 'content_object'], name='product_tag_tag_product_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_cart'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='cartline',
+            name='price',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_remove_cartline_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartorder',
+            name='checkout_ref',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=32),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_cartorder_checkout_ref'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartorder',
+            name='cart_version',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+    ]
@@ -0,0 +1,47 @@
+import logging
+
+from django.db import migrations
+
+CODE_MAX_LENGTH = 50
+
+logger = logging.getLogger(__name__)
+
+
+def _free_code(code, taken):
+    """Mã chữ hoa chưa dùng: `code` hoặc `code-2`, `code-3`, ... (cắt cho vừa max_length)."""
+    n = 2
+    while True:
+        suffix = f"-{n}"
+        candidate = code[:CODE_MAX_LENGTH - len(suffix)] + suffix
+        if candidate not in taken:
+            return candidate
+        n += 1
+
+
+def uppercase_codes(apps, schema_editor):
+    Coupon = apps.get_model("core", "Coupon")
+    taken = set(Coupon.objects.values_list("code", flat=True))
+    for coupon in Coupon.objects.only("id", "code").order_by("id").iterator():
+        code = coupon.code.strip().upper()
+        if code == coupon.code:
+            continue
+        taken.discard(coupon.code)
+        # Mã chỉ khác hoa/thường với một coupon khác: đổi sang mã có hậu tố thay vì
+        # bỏ qua (bỏ qua thì coupon không bao giờ tra cứu được nữa)
+        if code in taken:
+            renamed = _free_code(code, taken)
+            logger.warning("Coupon %s: code %r clashes with %r, renamed to %r", coupon.pk, coupon.code, code, renamed)
+            code = renamed
+        taken.add(code)
+        Coupon.objects.filter(pk=coupon.pk).update(code=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_cartorder_cart_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_codes, migrations.RunPython.noop),
+    ]
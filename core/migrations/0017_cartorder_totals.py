@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:21
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    """subtotal = tổng dòng hàng; discount = phần chênh với amount đã lưu (set-based)."""
+    CartOrder = apps.get_model("core", "CartOrder")
+    CartOrderProducts = apps.get_model("core", "CartOrderProducts")
+    line_sum = (
+        CartOrderProducts.objects.filter(order=OuterRef("pk"))
+        .values("order").annotate(s=Sum("total")).values("s")
+    )
+    CartOrder.objects.update(
+        subtotal=Coalesce(Subquery(line_sum), Value(0), output_field=models.DecimalField())
+    )
+    CartOrder.objects.filter(subtotal__gt=F("amount")).update(discount=F("subtotal") - F("amount"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_uppercase_coupon_codes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartorder',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='cartorder',
+            name='shipping',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='cartorder',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='cartorder',
+            name='tax',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
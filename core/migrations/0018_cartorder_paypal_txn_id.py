@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_cartorder_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartorder',
+            name='paypal_txn_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+    ]
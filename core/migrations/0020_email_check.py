@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailCheck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=330, unique=True)),
+                ('verdict', models.CharField(choices=[('valid', 'Valid'), ('invalid', 'Invalid'), ('unknown', 'Unknown')], max_length=10)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Email Check',
+                'verbose_name_plural': 'Email Checks',
+                'db_table': 'email_check',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_email_check'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartorder',
+            index=models.Index(fields=['vendor', 'order_date'], name='cart_order_vendor_date_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_cartorder_vendor_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('paid_orders', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('paid_units', models.PositiveIntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid_gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='core.vendor')),
+            ],
+            options={
+                'verbose_name': 'Vendor Daily Sales',
+                'verbose_name_plural': 'Vendor Daily Sales',
+                'db_table': 'vendor_daily_sales',
+                'constraints': [models.UniqueConstraint(fields=('vendor', 'day'), name='vendor_daily_sales_uniq')],
+            },
+        ),
+    ]
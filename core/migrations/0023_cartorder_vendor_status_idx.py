@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_vendor_daily_sales'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartorder',
+            index=models.Index(fields=['vendor', 'order_status', 'order_date'], name='cart_order_vendor_status_idx'),
+        ),
+    ]
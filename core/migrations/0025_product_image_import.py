@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_export_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductImageImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=1000)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_imports', to='core.product')),
+            ],
+            options={
+                'verbose_name': 'Product Image Import',
+                'verbose_name_plural': 'Product Image Imports',
+                'db_table': 'product_image_import',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'id'], name='product_image_import_due_idx')],
+            },
+        ),
+    ]
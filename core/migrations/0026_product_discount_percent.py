@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:48
+
+from django.db import migrations, models
+from django.db.models import F, Q
+from django.db.models.functions import Cast, Round
+
+
+def backfill_discount(apps, schema_editor):
+    """discount_percent cho product đã có, cùng công thức với Product.discount_percent_expression."""
+    Product = apps.get_model("core", "Product")
+    percent = models.DecimalField(max_digits=5, decimal_places=2)
+    Product.objects.filter(Q(old_price__gt=0) & Q(old_price__gt=F("amount"))).update(
+        discount_percent=Cast(Round((F("old_price") - F("amount")) * 100 / F("old_price"), 2), percent)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_product_image_import'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='discount_percent',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=5),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['vendor', 'title', 'pid'], name='product_vendor_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['vendor', 'amount', 'pid'], name='product_vendor_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['vendor', 'date', 'pid'], name='product_vendor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['vendor', 'discount_percent', 'pid'], name='product_vendor_discount_idx'),
+        ),
+        migrations.RunPython(backfill_discount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_product_discount_percent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveSmallIntegerField(choices=[(1, '★☆☆☆☆'), (2, '★★☆☆☆'), (3, '★★★☆☆'), (4, '★★★★☆'), (5, '★★★★★')])),
+                ('reviews', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Product Rating Count',
+                'verbose_name_plural': 'Product Rating Counts',
+                'db_table': 'product_rating_count',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', 'date'], name='review_product_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='productratingcount',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_counts', to='core.product'),
+        ),
+        migrations.AddConstraint(
+            model_name='productratingcount',
+            constraint=models.UniqueConstraint(fields=('product', 'rating'), name='product_rating_count_uniq'),
+        ),
+    ]
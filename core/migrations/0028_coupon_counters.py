@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:03
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    """usage_count = số CouponUser, orders_count = số đơn đã đặt (không tính pending)."""
+    Coupon = apps.get_model("core", "Coupon")
+    CouponUser = apps.get_model("core", "CouponUser")
+    CartOrder = apps.get_model("core", "CartOrder")
+    users = (
+        CouponUser.objects.filter(coupon=OuterRef("pk"))
+        .values("coupon").annotate(n=Count("id")).values("n")
+    )
+    orders = (
+        CartOrder.objects.filter(coupon=OuterRef("pk")).exclude(order_status="pending")
+        .values("coupon").annotate(n=Count("id")).values("n")
+    )
+    Coupon.objects.update(
+        usage_count=Coalesce(Subquery(users), Value(0)),
+        orders_count=Coalesce(Subquery(orders), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_product_rating_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coupon',
+            name='orders_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='coupon',
+            name='usage_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(fields=['vendor', 'code'], name='coupon_vendor_code_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_status(apps, schema_editor):
+    Coupon = apps.get_model("core", "Coupon")
+    Coupon.objects.filter(active=False).update(status="inactive")
+    Coupon.objects.filter(active=True, expiry_date__lte=timezone.now()).update(status="expired")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_coupon_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coupon',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('inactive', 'Inactive'), ('expired', 'Expired')], default='active', editable=False, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(fields=['vendor', 'status'], name='coupon_vendor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(fields=['status', 'expiry_date'], name='coupon_status_expiry_idx'),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+    ]
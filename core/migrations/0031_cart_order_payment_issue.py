@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_order_status_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartorder',
+            name='payment_issue',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_cart_order_payment_issue'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productimageimport',
+            name='product_image_import_due_idx',
+        ),
+        migrations.AddField(
+            model_name='productimageimport',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='productimageimport',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='product_image_import_due_idx'),
+        ),
+    ]
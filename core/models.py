@@ -1,9 +1,13 @@
+from decimal import ROUND_HALF_UP, Decimal
+
 from django.db import models
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.db.models.functions import Cast, Round
 from shortuuid.django_fields import ShortUUIDField
 from django.utils.html import mark_safe
 from django.conf import settings
 from taggit.managers import TaggableManager
-from taggit.models import GenericTaggedItemBase, TagBase, Tag
+from taggit.models import GenericTaggedItemBase, TaggedItemBase, TagBase, Tag
 from django_ckeditor_5.fields import CKEditor5Field
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -36,6 +40,26 @@ class UUIDTaggableManager(TaggableManager):
     def __init__(self, **kwargs):
         kwargs["through"] = kwargs.get("through", UUIDTaggedItem)
         super().__init__(**kwargs)
+
+
+# Bảng nối tag <-> product với FK thật tới Product.pid (thay cho object_id dạng chuỗi + content_type)
+class ProductTag(TaggedItemBase):
+    content_object = models.ForeignKey(
+        "Product",
+        on_delete=models.CASCADE,
+        related_name="tagged_items"
+    )
+
+    class Meta:
+        db_table = 'product_tag'
+        verbose_name = _("Product Tag")
+        verbose_name_plural = _("Product Tags")
+        constraints = [
+            models.UniqueConstraint(fields=['content_object', 'tag'], name='unique_product_tag')
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'content_object'], name='product_tag_tag_product_idx'),
+        ]
         
 # Create your models here.
 def user_directory_path(instance, filename):
@@ -73,6 +97,26 @@ class Image(models.Model):
     def __str__(self):
         return f"{self.object_type} - {self.object_id}"
 
+    @classmethod
+    def primary_url_map(cls, object_type, object_ids, default=None):
+        """Lấy URL ảnh chính cho nhiều object trong 1 query: {object_id: url}."""
+        object_ids = list(object_ids)
+        urls = dict.fromkeys(object_ids, default)
+        images = cls.objects.filter(
+            # dữ liệu cũ lưu cả 'product' lẫn 'Product'
+            object_type__in={object_type, object_type.lower()},
+            object_id__in=object_ids,
+            is_primary=True,
+        )
+        found = set()
+        for img in images:
+            # ordering '-uploaded_at' -> ảnh mới nhất thắng, giống .first()
+            if img.object_id in found:
+                continue
+            found.add(img.object_id)
+            urls[img.object_id] = img.image.url.replace("http://", "https://")
+        return urls
+
 class Vendor(models.Model):
     vid = models.CharField(max_length=C.MAX_LENGTH_VID, primary_key=True)
     title = models.CharField(max_length=C.MAX_LENGTH_TITLE)
@@ -246,6 +290,30 @@ class Coupon(models.Model):
     min_order_amount = models.DecimalField(max_digits=C.MAX_DIGITS_AMOUNT, decimal_places=2)
     max_discount_amount = models.DecimalField(max_digits=C.MAX_DIGITS_AMOUNT, decimal_places=2)
     apply_once_per_user = models.BooleanField(default=True)
+    # Cập nhật bởi core.coupons trong transaction đặt hàng: số user đã dùng / số đơn đã đặt với coupon
+    usage_count = models.PositiveIntegerField(default=0, editable=False)
+    orders_count = models.PositiveIntegerField(default=0, editable=False)
+    # Tính lại mỗi lần save(); lệnh `expire_coupons` chuyển coupon quá hạn sang expired
+    status = models.CharField(
+        max_length=C.MAX_LENGTH_COUPON_STATUS, choices=C.COUPON_STATUS_CHOICES,
+        default=C.COUPON_STATUS_ACTIVE, editable=False,
+    )
+
+    def compute_status(self, now=None):
+        if not self.active:
+            return C.COUPON_STATUS_INACTIVE
+        if self.expiry_date <= (now or timezone.now()):
+            return C.COUPON_STATUS_EXPIRED
+        return C.COUPON_STATUS_ACTIVE
+
+    def save(self, *args, **kwargs):
+        # Mã luôn lưu chữ hoa để tra cứu chính xác trên unique index
+        self.code = (self.code or "").strip().upper()
+        self.status = self.compute_status()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"active", "expiry_date"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "status"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.code} - {self.vendor.title}"
@@ -254,6 +322,13 @@ class Coupon(models.Model):
         db_table = 'coupon'
         verbose_name = "Coupon"
         verbose_name_plural = "Coupons"
+        indexes = [
+            # Tìm theo tiền tố mã trong trang coupon của vendor
+            models.Index(fields=['vendor', 'code'], name='coupon_vendor_code_idx'),
+            models.Index(fields=['vendor', 'status'], name='coupon_vendor_status_idx'),
+            # Lệnh expire_coupons: WHERE status = 'active' AND expiry_date <= now
+            models.Index(fields=['status', 'expiry_date'], name='coupon_status_expiry_idx'),
+        ]
 
 class CouponUser(models.Model):
     coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE)
@@ -363,8 +438,12 @@ class Product(models.Model):
     date = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     rating_avg = models.FloatField(default=0.0)
+    # (old_price - amount) / old_price * 100, tính lại mỗi lần save() để sắp xếp/lọc theo index
+    discount_percent = models.DecimalField(
+        max_digits=C.MAX_DIGITS_DISCOUNT_PERCENT, decimal_places=2, default=0, editable=False
+    )
     
-    tags = UUIDTaggableManager(blank=True)
+    tags = TaggableManager(through=ProductTag, blank=True)
 
     def __repr__(self):
         return f"{self.title} (ID: {self.pid})"
@@ -380,11 +459,49 @@ class Product(models.Model):
             return ((self.old_price - self.amount) / self.old_price) * 100
         return 0
 
+    @staticmethod
+    def compute_discount_percent(amount, old_price):
+        """Phần trăm giảm giá để lưu vào discount_percent (0 nếu không giảm)."""
+        amount = Decimal(amount or 0)
+        old_price = Decimal(old_price or 0)
+        if old_price <= 0 or amount >= old_price:
+            return Decimal("0")
+        return ((old_price - amount) * 100 / old_price).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    @staticmethod
+    def discount_percent_expression(amount=F("amount"), old_price=F("old_price")):
+        """Cùng công thức với compute_discount_percent dưới dạng biểu thức SQL, cho queryset.update()."""
+        return Case(
+            When(
+                Q(old_price__gt=0) & Q(old_price__gt=amount),
+                then=Cast(
+                    Round((old_price - amount) * 100 / old_price, 2),
+                    DecimalField(max_digits=C.MAX_DIGITS_DISCOUNT_PERCENT, decimal_places=2),
+                ),
+            ),
+            default=Value(Decimal("0")),
+            output_field=DecimalField(max_digits=C.MAX_DIGITS_DISCOUNT_PERCENT, decimal_places=2),
+        )
+
+    def save(self, *args, **kwargs):
+        self.discount_percent = self.compute_discount_percent(self.amount, self.old_price)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"amount", "old_price"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "discount_percent"}
+        super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'product'
         verbose_name = "Product"
         verbose_name_plural = "Products"
         ordering = ['-date']
+        indexes = [
+            # Các cột sắp xếp của bảng product trong trang vendor (PRODUCT_SORT_FIELDS)
+            models.Index(fields=['vendor', 'title', 'pid'], name='product_vendor_title_idx'),
+            models.Index(fields=['vendor', 'amount', 'pid'], name='product_vendor_amount_idx'),
+            models.Index(fields=['vendor', 'date', 'pid'], name='product_vendor_date_idx'),
+            models.Index(fields=['vendor', 'discount_percent', 'pid'], name='product_vendor_discount_idx'),
+        ]
     def __repr__(self):
         return f"<Product {self.title}>"
 
@@ -437,6 +554,9 @@ class ProductReview(models.Model):
         verbose_name = "Product Review"
         verbose_name_plural = "Product Reviews"
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['product', 'date'], name='review_product_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.product} ({self.rating}★)"
@@ -475,7 +595,12 @@ class ReturnRequest(models.Model):
 class CartOrder(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="cart_orders")
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name="cart_orders")
+    # Tổng tiền cuối cùng = subtotal - discount + tax + shipping (xem core.pricing.order_totals)
     amount = models.DecimalField(max_digits=C.MAX_DIGITS_AMOUNT, decimal_places=2)
+    subtotal = models.DecimalField(max_digits=C.MAX_DIGITS_AMOUNT, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=C.MAX_DIGITS_AMOUNT, decimal_places=2, default=0)
+    tax = models.DecimalField(max_digits=C.MAX_DIGITS_AMOUNT, decimal_places=2, default=0)
+    shipping = models.DecimalField(max_digits=C.MAX_DIGITS_AMOUNT, decimal_places=2, default=0)
     coupon = models.ForeignKey(Coupon, on_delete=models.SET_NULL, null=True, blank=True, related_name="cart_orders")
     paid_status = models.BooleanField(default=False)
     order_status = models.CharField(
@@ -484,15 +609,90 @@ class CartOrder(models.Model):
         default='processing'
     )
     order_date = models.DateTimeField(auto_now_add=True)
+    # Các đơn tách ra từ cùng một giỏ (mỗi vendor một đơn) dùng chung checkout_ref
+    checkout_ref = models.CharField(max_length=C.MAX_LENGTH_CHECKOUT_REF, blank=True, default="", db_index=True)
+    # Version của giỏ (cart.cart_version) tại lần tạo đơn gần nhất
+    cart_version = models.CharField(max_length=C.MAX_LENGTH_CART_VERSION, blank=True, default="")
+    # txn_id của giao dịch PayPal đã thanh toán đơn (IPN), dùng để xử lý idempotent
+    paypal_txn_id = models.CharField(max_length=C.MAX_LENGTH_TXN_ID, blank=True, default="", db_index=True)
+    # IPN hợp lệ nhưng số tiền/tiền tệ không khớp: đơn vẫn chưa thanh toán, cần người kiểm tra
+    payment_issue = models.CharField(max_length=C.MAX_LENGTH_PAYMENT_ISSUE, blank=True, default="")
 
     def __str__(self):
         return f"Order #{self.pk} - {self.user.username}"
 
+    @property
+    def total(self):
+        return self.amount
+
     class Meta:
         db_table = 'cart_order'
         verbose_name = "Cart Order"
         verbose_name_plural = "Cart Orders"
         ordering = ['-order_date']
+        indexes = [
+            models.Index(fields=['vendor', 'order_date'], name='cart_order_vendor_date_idx'),
+            models.Index(fields=['vendor', 'order_status', 'order_date'], name='cart_order_vendor_status_idx'),
+        ]
+
+class OrderStatusHistory(models.Model):
+    """Một lần đơn đổi trạng thái qua core.order_status; chỉ thêm, không sửa."""
+    order = models.ForeignKey(CartOrder, on_delete=models.CASCADE, related_name="status_history")
+    # Lưu lại vendor để thống kê theo vendor không cần join cart_order
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name="order_status_history")
+    from_status = models.CharField(max_length=C.MAX_LENGTH_ORDER_STATUS, choices=C.ORDER_STATUS_CHOICES)
+    to_status = models.CharField(max_length=C.MAX_LENGTH_ORDER_STATUS, choices=C.ORDER_STATUS_CHOICES)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Order status history is append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"#{self.order_id}: {self.from_status} -> {self.to_status}"
+
+    class Meta:
+        db_table = 'order_status_history'
+        verbose_name = "Order Status History"
+        verbose_name_plural = "Order Status History"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['vendor', 'to_status', 'changed_at'], name='order_history_vendor_idx'),
+        ]
+
+class VendorDailySales(models.Model):
+    """Doanh số theo ngày của từng vendor, cập nhật bởi core.rollups khi đơn đổi trạng thái."""
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name="daily_sales")
+    day = models.DateField()
+    orders = models.PositiveIntegerField(default=0)
+    paid_orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    paid_units = models.PositiveIntegerField(default=0)
+    gross = models.DecimalField(max_digits=C.MAX_DIGITS_ROLLUP_AMOUNT, decimal_places=2, default=0)
+    paid_gross = models.DecimalField(max_digits=C.MAX_DIGITS_ROLLUP_AMOUNT, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=C.MAX_DIGITS_ROLLUP_AMOUNT, decimal_places=2, default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.vendor_id} {self.day}: {self.gross}"
+
+    @property
+    def unpaid_orders(self):
+        return self.orders - self.paid_orders
+
+    @property
+    def unpaid_gross(self):
+        return self.gross - self.paid_gross
+
+    class Meta:
+        db_table = 'vendor_daily_sales'
+        verbose_name = "Vendor Daily Sales"
+        verbose_name_plural = "Vendor Daily Sales"
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'day'], name='vendor_daily_sales_uniq'),
+        ]
 
 class CartOrderProducts(models.Model):
     order = models.ForeignKey(CartOrder, on_delete=models.CASCADE, related_name='order_products')
@@ -520,6 +720,38 @@ class CartOrderProducts(models.Model):
         verbose_name = "Cart Order Product"
         verbose_name_plural = "Cart Order Products"
         ordering = ['-id']
+class Cart(models.Model):
+    """Giỏ hàng phía server: mỗi user (hoặc mỗi session ẩn danh) có một giỏ."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True, related_name="cart")
+    date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Cart #{self.pk} - {self.user or 'anonymous'}"
+
+    class Meta:
+        db_table = 'cart'
+        verbose_name = "Cart"
+        verbose_name_plural = "Carts"
+
+class CartLine(models.Model):
+    """Một dòng trong giỏ; thêm/sửa/xoá chỉ chạm đúng một dòng này."""
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="lines")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="cart_lines")
+    qty = models.PositiveIntegerField(default=1)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product_id} (x{self.qty})"
+
+    class Meta:
+        db_table = 'cart_line'
+        verbose_name = "Cart Line"
+        verbose_name_plural = "Cart Lines"
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product'], name='unique_cart_line')
+        ]
+
 class wishlist_model(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
@@ -530,3 +762,109 @@ class wishlist_model(models.Model):
 
     def __str__(self):
         return self.product.title
+
+class OutboxEmail(models.Model):
+    """Email chờ gửi; worker `send_queued_emails` gửi theo lô, request không chờ SMTP."""
+    subject = models.CharField(max_length=C.MAX_LENGTH_EMAIL_SUBJECT)
+    body = models.TextField()
+    from_email = models.CharField(max_length=C.MAX_LENGTH_TEXT)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=C.MAX_LENGTH_EMAIL_STATUS, choices=C.EMAIL_STATUS_CHOICES, default=C.EMAIL_STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+    class Meta:
+        db_table = 'email_outbox'
+        verbose_name = "Outbox Email"
+        verbose_name_plural = "Outbox Emails"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx'),
+        ]
+
+class ProductImageImport(models.Model):
+    """Ảnh cần tải về cho product đã import; worker `ingest_product_images` xử lý sau."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="image_imports")
+    url = models.URLField(max_length=C.MAX_LENGTH_IMAGE_URL_IMPORT)
+    status = models.CharField(max_length=C.MAX_LENGTH_JOB_STATUS, choices=C.JOB_STATUS_CHOICES, default=C.JOB_STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True, default="")
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.product_id}: {self.url} ({self.status})"
+
+    class Meta:
+        db_table = 'product_image_import'
+        verbose_name = "Product Image Import"
+        verbose_name_plural = "Product Image Imports"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='product_image_import_due_idx'),
+        ]
+
+class ExportJob(models.Model):
+    """Export lớn chạy nền: worker `run_exports` ghi file vào EXPORT_ROOT rồi gửi email báo."""
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name="export_jobs")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="export_jobs")
+    kind = models.CharField(max_length=C.MAX_LENGTH_EXPORT_KIND, choices=C.EXPORT_KIND_CHOICES)
+    file_format = models.CharField(max_length=C.MAX_LENGTH_EXPORT_FORMAT, choices=C.EXPORT_FORMAT_CHOICES)
+    status = models.CharField(max_length=C.MAX_LENGTH_JOB_STATUS, choices=C.JOB_STATUS_CHOICES, default=C.JOB_STATUS_PENDING)
+    file_path = models.CharField(max_length=C.MAX_LENGTH_TEXT, blank=True, default="")
+    download_url = models.CharField(max_length=C.MAX_LENGTH_TEXT, blank=True, default="")
+    rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    created = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind}.{self.file_format} ({self.status})"
+
+    class Meta:
+        db_table = 'export_job'
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'created'], name='export_job_status_idx'),
+        ]
+
+class EmailCheck(models.Model):
+    """Kết quả kiểm tra email (theo địa chỉ hoặc theo domain) được cache có thời hạn."""
+    key = models.CharField(max_length=C.MAX_LENGTH_EMAIL_CHECK_KEY, unique=True)
+    verdict = models.CharField(max_length=C.MAX_LENGTH_EMAIL_VERDICT, choices=C.EMAIL_VERDICT_CHOICES)
+    checked_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.verdict}"
+
+    class Meta:
+        db_table = 'email_check'
+        verbose_name = "Email Check"
+        verbose_name_plural = "Email Checks"
+
+
+class ProductRatingCount(models.Model):
+    """Số review theo từng mức sao của một product, cập nhật bởi core.reviews khi review thay đổi."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="rating_counts")
+    rating = models.PositiveSmallIntegerField(choices=C.RATING)
+    reviews = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_id} {self.rating}★: {self.reviews}"
+
+    class Meta:
+        db_table = 'product_rating_count'
+        verbose_name = "Product Rating Count"
+        verbose_name_plural = "Product Rating Counts"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rating'], name='product_rating_count_uniq'),
+        ]
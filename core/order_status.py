@@ -0,0 +1,113 @@
+"""Máy trạng thái của đơn hàng (CartOrder.order_status).
+
+TRANSITIONS liệt kê các bước chuyển hợp lệ. `transition` chuyển nhiều đơn cùng
+lúc bằng một câu UPDATE có điều kiện `order_status IN (các trạng thái được phép
+chuyển sang đích)`, nên đơn không hợp lệ hoặc đã được chuyển bởi request khác
+bị bỏ qua thay vì bị ghi đè. Mỗi đơn được chuyển có một dòng OrderStatusHistory
+(chỉ thêm) để tính thời gian xử lý đơn; hook của trạng thái đích (hoàn kho khi
+huỷ, email báo khách) chạy trong cùng transaction. queryset.update() không phát
+signal nên rollup doanh số được tính lại trực tiếp (rollups.refresh_orders).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from core import checkout as checkout_service, rollups
+from core.constants import (
+    ORDER_STATUS_CANCELLED,
+    ORDER_STATUS_DELIVERED,
+    ORDER_STATUS_PENDING,
+    ORDER_STATUS_PROCESSING,
+    ORDER_STATUS_REFUNDED,
+    ORDER_STATUS_SHIPPED,
+)
+from core.models import CartOrder, OrderStatusHistory
+from utils.email_service import send_order_status_email
+
+# pending là đơn nháp của checkout, chưa được đặt: chỉ checkout/thanh toán
+# (core.views.cod_checkout, core.payments) đưa đơn ra khỏi pending, nên ở đây
+# pending không có bước chuyển nào và luôn bị bỏ qua.
+TRANSITIONS = {
+    ORDER_STATUS_PENDING: set(),
+    ORDER_STATUS_PROCESSING: {ORDER_STATUS_SHIPPED, ORDER_STATUS_DELIVERED, ORDER_STATUS_CANCELLED},
+    ORDER_STATUS_SHIPPED: {ORDER_STATUS_DELIVERED, ORDER_STATUS_CANCELLED},
+    ORDER_STATUS_DELIVERED: {ORDER_STATUS_REFUNDED},
+    ORDER_STATUS_CANCELLED: set(),
+    ORDER_STATUS_REFUNDED: set(),
+}
+
+_hooks = defaultdict(list)
+
+
+class InvalidTransition(ValueError):
+    """Không có trạng thái nào được phép chuyển sang trạng thái đích."""
+
+
+def allowed_targets(status):
+    return TRANSITIONS.get(status, set())
+
+
+def allowed_sources(status):
+    return {source for source, targets in TRANSITIONS.items() if status in targets}
+
+
+def on_enter(status):
+    """Đăng ký hook `func(orders)` chạy khi đơn vào `status`.
+
+    Mỗi đơn có thêm `previous_status`; hook chạy trong transaction của bước chuyển.
+    """
+    def register(func):
+        _hooks[status].append(func)
+        return func
+    return register
+
+
+def transition(orders, status, changed_by=None):
+    """Chuyển các đơn trong queryset `orders` sang `status`. Trả về list đơn đã chuyển.
+
+    Đơn đang ở trạng thái không được phép chuyển sang `status` được bỏ qua.
+    """
+    sources = allowed_sources(status)
+    if not sources:
+        raise InvalidTransition(f"no order can move to {status!r}")
+
+    with transaction.atomic():
+        candidates = list(
+            orders.select_for_update().filter(order_status__in=sources)
+            .select_related("user").order_by("id")
+        )
+        if not candidates:
+            return []
+        CartOrder.objects.filter(id__in=[o.id for o in candidates], order_status__in=sources).update(
+            order_status=status
+        )
+        OrderStatusHistory.objects.bulk_create(
+            OrderStatusHistory(
+                order_id=o.id, vendor_id=o.vendor_id, from_status=o.order_status,
+                to_status=status, changed_by=changed_by,
+            )
+            for o in candidates
+        )
+        for order in candidates:
+            order.previous_status = order.order_status
+            order.order_status = status
+        for hook in _hooks[status]:
+            hook(candidates)
+        rollups.refresh_orders(candidates)
+    return candidates
+
+
+@on_enter(ORDER_STATUS_CANCELLED)
+def _release_stock(orders):
+    # Mọi đơn chuyển được đều đã đặt, tức đã trừ kho (reserve_stock khi đặt hàng/thanh toán)
+    checkout_service.release_stock(orders)
+
+
+@on_enter(ORDER_STATUS_SHIPPED)
+@on_enter(ORDER_STATUS_DELIVERED)
+@on_enter(ORDER_STATUS_CANCELLED)
+@on_enter(ORDER_STATUS_REFUNDED)
+def _notify_customer(orders):
+    # Email vào outbox cùng transaction, worker gửi sau
+    for order in orders:
+        send_order_status_email(order.user, order)
@@ -0,0 +1,99 @@
+"""Hoàn tất thanh toán PayPal qua IPN (paypal.standard.ipn), không dựa vào redirect của trình duyệt.
+
+Mỗi lần checkout gửi sang PayPal một invoice riêng (PAYPAL_INVOICE_PREFIX +
+checkout_ref) cho toàn bộ các đơn cùng checkout_ref. Khi PayPal gọi IPN hợp lệ,
+`finalize_paypal_payment` đánh dấu các đơn đã thanh toán trong một transaction.
+Xử lý là idempotent theo txn_id: IPN gửi lại (PayPal retry) không ghi gì thêm.
+"""
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from paypal.standard.models import ST_PP_COMPLETED
+from paypal.standard.ipn.signals import valid_ipn_received
+
+from core import cart as cart_service, checkout as checkout_service, coupons as coupon_service, rollups
+from core.constants import MAX_LENGTH_PAYMENT_ISSUE, ORDER_STATUS_PENDING, PAYPAL_INVOICE_PREFIX
+from core.models import Cart, CartOrder
+from utils.email_service import send_order_email
+
+logger = logging.getLogger(__name__)
+
+
+def invoice_for(checkout_ref):
+    return f"{PAYPAL_INVOICE_PREFIX}{checkout_ref}"
+
+
+def ref_from_invoice(invoice):
+    if not invoice or not invoice.startswith(PAYPAL_INVOICE_PREFIX):
+        return None
+    return invoice[len(PAYPAL_INVOICE_PREFIX):]
+
+
+def finalize_paypal_payment(checkout_ref, txn_id, gross, currency):
+    """Đánh dấu các đơn pending của checkout_ref là đã thanh toán.
+
+    Trả về danh sách đơn vừa được cập nhật ([] nếu txn_id đã xử lý, không có đơn
+    phù hợp hoặc số tiền/tiền tệ không khớp). Khi không khớp, đơn giữ nguyên
+    pending/chưa thanh toán, chỉ ghi `payment_issue`. Giỏ đổi thì checkout_ref
+    đổi theo (checkout.split_cart), nên IPN của snapshot cũ không tìm thấy đơn.
+    """
+    with transaction.atomic():
+        if CartOrder.objects.filter(paypal_txn_id=txn_id).exists():
+            return []
+        orders = list(
+            CartOrder.objects.select_for_update()
+            .select_related("coupon", "user")
+            .prefetch_related("order_products")
+            .filter(checkout_ref=checkout_ref, order_status=ORDER_STATUS_PENDING, paid_status=False)
+            .order_by("id")
+        )
+        if not orders:
+            logger.warning("PayPal IPN %s: no pending orders for %s", txn_id, checkout_ref)
+            return []
+
+        total = sum((o.amount for o in orders), Decimal("0"))
+        if currency != settings.PAYPAL_CURRENCY or Decimal(gross) != total:
+            logger.warning(
+                "PayPal IPN %s: %s %s does not match %s %s for %s",
+                txn_id, gross, currency, total, settings.PAYPAL_CURRENCY, checkout_ref,
+            )
+            # Ghi lên đơn để admin lọc được (CartOrderAdmin), không chỉ nằm trong log
+            issue = f"PayPal {txn_id}: received {gross} {currency}, expected {total} {settings.PAYPAL_CURRENCY}"
+            CartOrder.objects.filter(id__in=[o.id for o in orders]).update(
+                payment_issue=issue[:MAX_LENGTH_PAYMENT_ISSUE]
+            )
+            return []
+
+        user = orders[0].user
+        # Tiền đã trả nên chỉ ghi nhận lượt dùng coupon, không chặn
+        coupon_service.record_usage(user, orders, strict=False)
+        checkout_service.reserve_stock(orders)
+        CartOrder.objects.filter(id__in=[o.id for o in orders]).update(
+            paid_status=True, order_status="processing", paypal_txn_id=txn_id, payment_issue="",
+        )
+        rollups.refresh_orders(orders)
+        cart_service.clear_cart(Cart.objects.filter(user=user).first())
+
+        # Email vào outbox cùng transaction, worker gửi sau
+        for order in orders:
+            send_order_email(user, order, payment_method="PayPal")
+    return orders
+
+
+def handle_valid_ipn(sender, **kwargs):
+    ipn = sender
+    if ipn.payment_status != ST_PP_COMPLETED:
+        return
+    if ipn.receiver_email != settings.PAYPAL_RECEIVER_EMAIL:
+        logger.warning("PayPal IPN %s: unexpected receiver %s", ipn.txn_id, ipn.receiver_email)
+        return
+    checkout_ref = ref_from_invoice(ipn.invoice)
+    if checkout_ref is None:
+        logger.warning("PayPal IPN %s: unknown invoice %s", ipn.txn_id, ipn.invoice)
+        return
+    finalize_paypal_payment(checkout_ref, ipn.txn_id, ipn.mc_gross, ipn.mc_currency)
+
+
+valid_ipn_received.connect(handle_valid_ipn, dispatch_uid="core.payments.handle_valid_ipn")
@@ -0,0 +1,144 @@
+"""Giá bán của giỏ hàng luôn lấy từ Product.amount, không tin giá client gửi lên.
+
+Giá được đọc theo lô (1 query cho cả giỏ) và cache ngắn hạn trong từng process
+(PRICE_CACHE_TTL giây). Product.save() xoá cache của sản phẩm đó ngay trong
+process hiện tại; các process khác tự hết hạn theo TTL.
+
+Tổng tiền đơn hàng đi qua một pipeline duy nhất (subtotal -> discount -> tax ->
+shipping, xem `order_totals`) và được lưu vào các cột của CartOrder; trang đơn
+hàng và dashboard đọc cột đã lưu thay vì tự tính lại.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save
+
+from core.constants import ORDER_SHIPPING_FEE, ORDER_TAX_RATE, PRICE_CACHE_MAX_ENTRIES, PRICE_CACHE_TTL
+from core.models import CartOrder, CartOrderProducts, Product
+
+CENT = Decimal("0.01")
+ORDER_TOTAL_FIELDS = ["subtotal", "discount", "tax", "shipping", "amount"]
+
+_cache = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class PricedLine:
+    product_id: str
+    qty: int
+    unit_price: Decimal
+
+    @property
+    def subtotal(self):
+        return self.qty * self.unit_price
+
+
+def get_prices(product_ids):
+    """{pid: Decimal} cho các sản phẩm còn tồn tại; pid không tồn tại bị bỏ qua."""
+    now = time.monotonic()
+    prices = {}
+    missing = []
+    with _lock:
+        for pid in product_ids:
+            cached = _cache.get(pid)
+            if cached is not None and cached[1] > now:
+                prices[pid] = cached[0]
+            else:
+                missing.append(pid)
+
+    if missing:
+        fetched = dict(Product.objects.filter(pid__in=missing).values_list("pid", "amount"))
+        expires = now + PRICE_CACHE_TTL
+        with _lock:
+            if len(_cache) + len(fetched) > PRICE_CACHE_MAX_ENTRIES:
+                _cache.clear()
+            for pid, amount in fetched.items():
+                _cache[pid] = (amount, expires)
+        prices.update(fetched)
+    return prices
+
+
+def price_lines(lines):
+    """lines: iterable (pid, qty) -> ([PricedLine], total). Bỏ qua sản phẩm không còn tồn tại."""
+    lines = list(lines)
+    prices = get_prices([pid for pid, _ in lines])
+    priced = [
+        PricedLine(product_id=pid, qty=qty, unit_price=prices[pid])
+        for pid, qty in lines
+        if pid in prices
+    ]
+    return priced, sum((line.subtotal for line in priced), Decimal("0"))
+
+
+@dataclass(frozen=True)
+class OrderTotals:
+    subtotal: Decimal
+    discount: Decimal
+    tax: Decimal
+    shipping: Decimal
+
+    @property
+    def total(self):
+        return self.subtotal - self.discount + self.tax + self.shipping
+
+    def apply_to(self, order):
+        """Gán vào các cột của CartOrder (amount là tổng cuối cùng); chưa save."""
+        order.subtotal = self.subtotal
+        order.discount = self.discount
+        order.tax = self.tax
+        order.shipping = self.shipping
+        order.amount = self.total
+        return order
+
+
+def coupon_discount(coupon, subtotal):
+    """Số tiền giảm của coupon trên subtotal (đã chặn bởi max_discount_amount)."""
+    if coupon is None:
+        return Decimal("0")
+    discount = subtotal * Decimal(str(coupon.discount)) / Decimal("100")
+    return min(discount, coupon.max_discount_amount, subtotal).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def order_totals(subtotal, coupon=None):
+    """subtotal -> discount -> tax -> shipping cho một đơn."""
+    subtotal = Decimal(subtotal or 0).quantize(CENT, rounding=ROUND_HALF_UP)
+    discount = coupon_discount(coupon, subtotal)
+    tax = ((subtotal - discount) * ORDER_TAX_RATE).quantize(CENT, rounding=ROUND_HALF_UP)
+    shipping = ORDER_SHIPPING_FEE if subtotal > 0 else Decimal("0")
+    return OrderTotals(subtotal=subtotal, discount=discount, tax=tax, shipping=shipping)
+
+
+def reprice_orders(orders):
+    """Tính lại và lưu tổng tiền các đơn từ dòng hàng: 1 aggregate + 1 bulk_update."""
+    orders = list(orders)
+    subtotals = dict(
+        CartOrderProducts.objects.filter(order__in=orders)
+        .values("order_id").annotate(subtotal=Sum("total"))
+        .values_list("order_id", "subtotal")
+    )
+    for order in orders:
+        order_totals(subtotals.get(order.id), order.coupon).apply_to(order)
+    CartOrder.objects.bulk_update(orders, ORDER_TOTAL_FIELDS)
+    return orders
+
+
+def invalidate(product_ids=None):
+    """Xoá cache giá (toàn bộ nếu product_ids=None)."""
+    with _lock:
+        if product_ids is None:
+            _cache.clear()
+        else:
+            for pid in product_ids:
+                _cache.pop(pid, None)
+
+
+def _invalidate_product(sender, instance, **kwargs):
+    invalidate([instance.pk])
+
+
+post_save.connect(_invalidate_product, sender=Product, dispatch_uid="core.pricing.invalidate_on_save")
+post_delete.connect(_invalidate_product, sender=Product, dispatch_uid="core.pricing.invalidate_on_delete")
@@ -0,0 +1,82 @@
+"""Tải ảnh cho product được import (ProductImageImport) lên Cloudinary.
+
+Chạy tách khỏi request import: mỗi lô được nhận trong một transaction ngắn
+(SELECT ... FOR UPDATE SKIP LOCKED rồi đẩy next_attempt_at lên để worker khác
+bỏ qua), tải từng URL lên Cloudinary ngoài transaction và tạo Image chính cho
+product. Lỗi được thử lại với backoff luỹ thừa, tối đa IMAGE_IMPORT_MAX_ATTEMPTS lần.
+"""
+import logging
+from datetime import timedelta
+
+import cloudinary.uploader
+from django.db import transaction
+from django.utils import timezone
+
+from core import constants as C
+from core.models import Image, ProductImageImport
+
+logger = logging.getLogger(__name__)
+
+
+def upload(url):
+    """Upload ảnh từ URL lên Cloudinary, trả về CloudinaryResource."""
+    return cloudinary.uploader.upload_resource(url, folder="products")
+
+
+def retry_delay(attempts):
+    """Backoff luỹ thừa cho lần thử lại thứ `attempts`."""
+    return timedelta(seconds=min(
+        C.IMAGE_IMPORT_RETRY_BASE_SECONDS * 2 ** (attempts - 1), C.IMAGE_IMPORT_RETRY_MAX_SECONDS
+    ))
+
+
+def _claim_batch(batch_size, now):
+    with transaction.atomic():
+        batch = list(
+            ProductImageImport.objects.select_for_update(skip_locked=True)
+            .select_related("product")
+            .filter(status=C.JOB_STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        if batch:
+            ProductImageImport.objects.filter(id__in=[item.id for item in batch]).update(
+                next_attempt_at=now + timedelta(seconds=C.IMAGE_IMPORT_CLAIM_SECONDS)
+            )
+    return batch
+
+
+def ingest_pending(batch_size=C.IMAGE_IMPORT_BATCH_SIZE, max_attempts=C.IMAGE_IMPORT_MAX_ATTEMPTS):
+    """Xử lý một lô ảnh đến hạn. Trả về (số thành công, số lỗi)."""
+    now = timezone.now()
+    done = failed = 0
+    batch = _claim_batch(batch_size, now)
+    if not batch:
+        return 0, 0
+    images = []
+    for item in batch:
+        item.attempts += 1
+        try:
+            resource = upload(item.url)
+        except Exception as e:
+            logger.warning("Image import %s (%s) failed: %s", item.pk, item.url, e)
+            item.error = str(e)
+            if item.attempts >= max_attempts:
+                item.status = C.JOB_STATUS_FAILED
+            else:
+                item.next_attempt_at = now + retry_delay(item.attempts)
+            failed += 1
+            continue
+        images.append(Image(
+            image=resource,
+            alt_text=item.product.title,
+            object_type='product',
+            object_id=item.product_id,
+            is_primary=True,
+        ))
+        item.status = C.JOB_STATUS_DONE
+        item.error = ""
+        done += 1
+    with transaction.atomic():
+        Image.objects.bulk_create(images)
+        ProductImageImport.objects.bulk_update(batch, ["status", "attempts", "next_attempt_at", "error"])
+    return done, failed
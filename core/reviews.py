@@ -0,0 +1,93 @@
+"""Thống kê đánh giá theo số sao cho product và vendor (ProductRatingCount).
+
+Mỗi khi review được thêm/sửa/xoá, `refresh_products` đếm lại review theo mức
+sao của đúng các product đó (trên index (product, date)) và cập nhật
+Product.rating_avg. Histogram của vendor chỉ cộng tối đa 5 dòng mỗi product
+thay vì quét toàn bộ review. Lệnh `rebuild_review_stats` dựng lại toàn bộ.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from core.constants import RATING
+from core.models import Product, ProductRatingCount, ProductReview
+
+RATINGS = [value for value, _ in RATING]
+
+
+def refresh_products(product_ids):
+    """Đếm lại review theo sao và rating_avg cho các product `product_ids`."""
+    product_ids = {pid for pid in product_ids if pid is not None}
+    if not product_ids:
+        return
+    counts = (
+        ProductReview.objects.filter(product_id__in=product_ids, rating__isnull=False)
+        .values("product_id", "rating")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    totals = defaultdict(lambda: [0, 0])
+    rows = []
+    for r in counts:
+        rows.append(ProductRatingCount(product_id=r["product_id"], rating=r["rating"], reviews=r["n"]))
+        totals[r["product_id"]][0] += r["rating"] * r["n"]
+        totals[r["product_id"]][1] += r["n"]
+
+    with transaction.atomic():
+        ProductRatingCount.objects.filter(product_id__in=product_ids).delete()
+        ProductRatingCount.objects.bulk_create(rows)
+        # update() thay vì save(): không đụng tới updated/discount/cache giá của product
+        for pid in product_ids:
+            weighted, n = totals.get(pid, (0, 0))
+            Product.objects.filter(pk=pid).update(rating_avg=weighted / n if n else 0.0)
+
+
+def rebuild():
+    """Dựng lại ProductRatingCount cho mọi product có review. Trả về số product."""
+    product_ids = set(ProductReview.objects.values_list("product_id", flat=True).distinct())
+    product_ids |= set(ProductRatingCount.objects.values_list("product_id", flat=True).distinct())
+    refresh_products(product_ids)
+    return len(product_ids - {None})
+
+
+def vendor_summary(vendor):
+    """{total, average, histogram: [{rating, count, percent}, ...] từ 5 đến 1 sao} của vendor."""
+    counts = dict(
+        ProductRatingCount.objects.filter(product__vendor=vendor)
+        .values_list("rating")
+        .annotate(n=Sum("reviews"))
+        .order_by()
+    )
+    total = sum(counts.values())
+    return {
+        "total": total,
+        "average": sum(rating * n for rating, n in counts.items()) / total if total else 0.0,
+        "histogram": [
+            {
+                "rating": rating,
+                "count": counts.get(rating, 0),
+                "percent": round(counts.get(rating, 0) * 100 / total) if total else 0,
+            }
+            for rating in sorted(RATINGS, reverse=True)
+        ],
+    }
+
+
+def _remember_old_product(sender, instance, **kwargs):
+    # Review bị chuyển sang product khác: product cũ cũng phải đếm lại
+    instance._old_product_id = None
+    if instance.pk:
+        instance._old_product_id = (
+            ProductReview.objects.filter(pk=instance.pk).values_list("product_id", flat=True).first()
+        )
+
+
+def _refresh_review(sender, instance, **kwargs):
+    refresh_products([instance.product_id, getattr(instance, "_old_product_id", None)])
+
+
+pre_save.connect(_remember_old_product, sender=ProductReview, dispatch_uid="core.reviews.remember_old_product")
+post_save.connect(_refresh_review, sender=ProductReview, dispatch_uid="core.reviews.refresh_on_save")
+post_delete.connect(_refresh_review, sender=ProductReview, dispatch_uid="core.reviews.refresh_on_delete")
@@ -0,0 +1,138 @@
+"""Bảng tổng hợp doanh số theo ngày cho từng vendor (VendorDailySales).
+
+Mỗi khi đơn đổi trạng thái, `refresh_orders` tính lại đúng các ngày (theo giờ
+địa phương) của các đơn đó từ CartOrder/CartOrderProducts, trên index
+(vendor, order_date); các truy vấn thống kê chỉ cần cộng các dòng theo ngày.
+CartOrder.save() được xử lý qua signal; các chỗ cập nhật bằng queryset.update()
+phải tự gọi `refresh_orders`. Lệnh `rebuild_sales_rollups` dựng lại toàn bộ.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from core.constants import ORDER_STATUS_PENDING, SALES_ORDER_STATUSES
+from core.models import CartOrder, CartOrderProducts, VendorDailySales
+
+ROLLUP_FIELDS = ["orders", "paid_orders", "units", "paid_units", "gross", "paid_gross", "discount"]
+
+
+def day_bounds(day):
+    """[00:00 của ngày, 00:00 ngày hôm sau) theo timezone hiện tại."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def local_day(value):
+    return timezone.localtime(value).date()
+
+
+def aggregate_days(orders=Q(), lines=Q()):
+    """{(vendor_id, day): {field: value}} cho các đơn tính doanh số thoả điều kiện.
+
+    `orders` lọc CartOrder, `lines` là điều kiện tương ứng cho CartOrderProducts
+    (qua `order__`). Tổng cộng 2 query GROUP BY vendor, ngày.
+    """
+    rows = defaultdict(lambda: {
+        "orders": 0, "paid_orders": 0, "units": 0, "paid_units": 0,
+        "gross": Decimal("0"), "paid_gross": Decimal("0"), "discount": Decimal("0"),
+    })
+    paid = Q(paid_status=True)
+    order_totals = (
+        CartOrder.objects.filter(orders, order_status__in=SALES_ORDER_STATUSES)
+        .annotate(day=TruncDate("order_date"))
+        .values("vendor_id", "day")
+        .annotate(
+            n=Count("id"), paid_n=Count("id", filter=paid),
+            gross_sum=Sum("amount"), paid_gross_sum=Sum("amount", filter=paid), discount_sum=Sum("discount"),
+        )
+        .order_by()
+    )
+    for r in order_totals:
+        rows[r["vendor_id"], r["day"]].update(
+            orders=r["n"], paid_orders=r["paid_n"], gross=r["gross_sum"] or Decimal("0"),
+            paid_gross=r["paid_gross_sum"] or Decimal("0"), discount=r["discount_sum"] or Decimal("0"),
+        )
+
+    unit_totals = (
+        CartOrderProducts.objects.filter(lines, order__order_status__in=SALES_ORDER_STATUSES)
+        .annotate(day=TruncDate("order__order_date"))
+        .values("order__vendor_id", "day")
+        .annotate(qty_sum=Sum("qty"), paid_qty_sum=Sum("qty", filter=Q(order__paid_status=True)))
+        .order_by()
+    )
+    for r in unit_totals:
+        row = rows[r["order__vendor_id"], r["day"]]
+        row["units"] = r["qty_sum"] or 0
+        row["paid_units"] = r["paid_qty_sum"] or 0
+    return rows
+
+
+def refresh(vendor_id, days):
+    """Tính lại các ngày `days` của một vendor; ngày không còn đơn thì xoá dòng."""
+    days = sorted(set(days))
+    if not days:
+        return
+    orders = Q()
+    lines = Q()
+    for day in days:
+        start, end = day_bounds(day)
+        orders |= Q(order_date__gte=start, order_date__lt=end)
+        lines |= Q(order__order_date__gte=start, order__order_date__lt=end)
+    rows = aggregate_days(Q(orders, vendor_id=vendor_id), Q(lines, order__vendor_id=vendor_id))
+
+    with transaction.atomic():
+        for day in days:
+            values = rows.get((vendor_id, day))
+            if values is None:
+                VendorDailySales.objects.filter(vendor_id=vendor_id, day=day).delete()
+            else:
+                VendorDailySales.objects.update_or_create(vendor_id=vendor_id, day=day, defaults=values)
+
+
+def refresh_orders(orders):
+    """Cập nhật rollup cho các ngày/vendor của `orders` (gọi sau khi đổi trạng thái)."""
+    days = defaultdict(set)
+    for order in orders:
+        days[order.vendor_id].add(local_day(order.order_date))
+    for vendor_id, vendor_days in days.items():
+        refresh(vendor_id, vendor_days)
+
+
+def rebuild(vendor=None, since=None):
+    """Dựng lại rollup (toàn bộ, hoặc của một vendor / từ ngày `since`). Trả về số dòng."""
+    orders = Q()
+    lines = Q()
+    existing = VendorDailySales.objects.all()
+    if vendor is not None:
+        orders &= Q(vendor=vendor)
+        lines &= Q(order__vendor=vendor)
+        existing = existing.filter(vendor=vendor)
+    if since is not None:
+        start, _ = day_bounds(since)
+        orders &= Q(order_date__gte=start)
+        lines &= Q(order__order_date__gte=start)
+        existing = existing.filter(day__gte=since)
+
+    rows = aggregate_days(orders, lines)
+    with transaction.atomic():
+        existing.delete()
+        VendorDailySales.objects.bulk_create(
+            VendorDailySales(vendor_id=vendor_id, day=day, **values) for (vendor_id, day), values in rows.items()
+        )
+    return len(rows)
+
+
+def _refresh_order(sender, instance, **kwargs):
+    # Đơn pending (giỏ đang checkout) không được tính, bỏ qua để checkout không tốn query
+    if instance.order_status != ORDER_STATUS_PENDING:
+        refresh_orders([instance])
+
+
+post_save.connect(_refresh_order, sender=CartOrder, dispatch_uid="core.rollups.refresh_on_save")
+post_delete.connect(_refresh_order, sender=CartOrder, dispatch_uid="core.rollups.refresh_on_delete")
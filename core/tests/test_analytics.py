@@ -0,0 +1,136 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core import analytics, rollups
+from core.models import CartOrder
+from core.tests.test_vendors import make_vendor
+
+User = get_user_model()
+
+
+class AnalyticsBaseTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(username="seller", email="seller@example.com", password="x")
+        self.seller.role = "vendor"
+        self.seller.save()
+        self.vendor = make_vendor(self.seller)
+        self.other_vendor = make_vendor(
+            User.objects.create_user(username="other", email="other@example.com", password="x")
+        )
+        self.buyer = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+
+    def order(self, amount, when=None, vendor=None, user=None, status="processing", paid=False):
+        order = CartOrder.objects.create(
+            user=user or self.buyer, vendor=vendor or self.vendor, amount=Decimal(amount),
+            order_status=status, paid_status=paid,
+        )
+        if when is not None:
+            CartOrder.objects.filter(pk=order.pk).update(order_date=when)
+            rollups.rebuild(vendor=order.vendor)
+        return order
+
+
+class DashboardKpiTestCase(AnalyticsBaseTestCase):
+    def test_kpis_in_one_aggregate(self):
+        now = timezone.now()
+        self.order("10.00", now)
+        self.order("20.00", now - timedelta(days=365))  # cùng tháng năm trước
+        self.order("99.00", now, status="pending")
+        self.order("40.00", now, status="cancelled")
+        self.order("50.00", now, vendor=self.other_vendor)
+
+        with self.assertNumQueries(2):
+            kpis = analytics.dashboard_kpis(self.vendor)
+
+        self.assertEqual(kpis["revenue"], Decimal("30.00"))
+        self.assertEqual(kpis["orders_count"], 2)
+        self.assertEqual(kpis["monthly_revenue"], Decimal("10.00"))
+
+    def test_kpis_are_cached_per_vendor(self):
+        analytics.dashboard_kpis(self.vendor)
+        with self.assertNumQueries(0):
+            analytics.dashboard_kpis(self.vendor)
+
+    def test_new_customers_are_vendor_buyers(self):
+        late = User.objects.create_user(username="late", email="late@example.com", password="x")
+        stranger = User.objects.create_user(username="stranger", email="s@example.com", password="x")
+        now = timezone.now()
+        self.order("10.00", now - timedelta(days=3))
+        self.order("10.00", now, user=self.buyer)
+        self.order("10.00", now - timedelta(days=1), user=late)
+        self.order("10.00", now, vendor=self.other_vendor, user=stranger)
+
+        self.assertEqual(list(analytics.new_customers(self.vendor)), [late, self.buyer])
+
+    def test_dashboard_renders_kpis(self):
+        self.order("10.00")
+        self.client.force_login(self.seller)
+
+        response = self.client.get(reverse("useradmin:dashboard"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["kpis"]["orders_count"], 1)
+        self.assertEqual(len(response.context["latest_orders"]), 1)
+
+
+class RevenueSeriesTestCase(AnalyticsBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        self.order("10.00", timezone.now() - timedelta(days=2))
+        self.order("20.00")
+        self.order("5.00")
+
+    def test_day_buckets_are_gap_filled(self):
+        start = self.today - timedelta(days=3)
+        series = analytics.revenue_series(self.vendor, start, self.today, "day")
+
+        self.assertEqual([b["start"] for b in series], [start + timedelta(days=i) for i in range(4)])
+        self.assertEqual([b["revenue"] for b in series], [0, Decimal("10.00"), 0, Decimal("25.00")])
+        self.assertEqual([b["orders"] for b in series], [0, 1, 0, 2])
+
+    def test_month_buckets_split_years(self):
+        self.order("7.00", timezone.now() - timedelta(days=365))
+        start = self.today - timedelta(days=400)
+
+        series = analytics.revenue_series(self.vendor, start, self.today, "month")
+
+        self.assertEqual(series[0]["start"], start.replace(day=1))
+        self.assertEqual(series[-1]["start"], self.today.replace(day=1))
+        self.assertEqual(sum(b["revenue"] for b in series), Decimal("42.00"))
+
+    def test_series_is_cached_per_range_and_granularity(self):
+        analytics.revenue_series(self.vendor, self.today, self.today, "week")
+        with self.assertNumQueries(0):
+            analytics.revenue_series(self.vendor, self.today, self.today, "week")
+        with self.assertNumQueries(1):
+            analytics.revenue_series(self.vendor, self.today, self.today, "day")
+
+    def test_endpoint_returns_buckets(self):
+        self.client.force_login(self.seller)
+
+        response = self.client.get(reverse("useradmin:revenue-series"), {
+            "start": (self.today - timedelta(days=13)).isoformat(),
+            "end": self.today.isoformat(),
+            "granularity": "week",
+        })
+
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(len(data["buckets"]), (2, 3))
+        self.assertEqual(sum(Decimal(b["revenue"]) for b in data["buckets"]), Decimal("35.00"))
+
+    def test_endpoint_rejects_bad_parameters(self):
+        self.client.force_login(self.seller)
+        url = reverse("useradmin:revenue-series")
+
+        self.assertEqual(self.client.get(url, {"granularity": "hour"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start": "yesterday"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start": "2000-01-01", "end": "2020-01-01"}).status_code, 400)
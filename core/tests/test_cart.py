@@ -0,0 +1,277 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import pricing
+from core.models import Cart, CartLine, Product, Vendor
+
+User = get_user_model()
+
+
+class CartBaseTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username="buyer",
+            email="buyer@example.com",
+            password="testpassword",
+        )
+        self.vendor = Vendor.objects.create(
+            vid="v-cart",
+            title="Vendor Cart",
+            description="Test vendor",
+            address="HN",
+            contact="0123456789",
+            chat_resp_time=10,
+            shipping_on_time=95,
+            authentic_rating=4.5,
+            days_return=7,
+            warranty_period=12,
+        )
+        self.products = [
+            Product.objects.create(
+                title=f"Cart product {i}",
+                vendor=self.vendor,
+                amount=Decimal("10.00") * (i + 1),
+                stock_count=50,
+                product_status="published",
+            )
+            for i in range(4)
+        ]
+        pricing.invalidate()
+
+    def add(self, product, qty=1):
+        return self.client.get(reverse("core:add-to-cart"), {
+            "id": product.pid,
+            "qty": qty,
+            "price": str(product.amount),
+            "title": product.title,
+            "image": "",
+        })
+
+
+class CartTestCase(CartBaseTestCase):
+    def test_add_to_cart_creates_line_for_anonymous_session(self):
+        response = self.add(self.products[0], qty=2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["totalcartitems"], 1)
+        cart = Cart.objects.get(id=self.client.session["cart_id"])
+        self.assertIsNone(cart.user)
+        line = cart.lines.get()
+        self.assertEqual((line.product_id, line.qty), (self.products[0].pid, 2))
+
+    def test_add_existing_product_updates_quantity(self):
+        self.add(self.products[0], qty=1)
+        self.add(self.products[0], qty=3)
+
+        self.assertEqual(CartLine.objects.count(), 1)
+        self.assertEqual(CartLine.objects.get().qty, 3)
+
+    def test_add_unknown_product_returns_404(self):
+        response = self.client.get(reverse("core:add-to-cart"), {"id": "missing", "qty": 1, "price": "1"})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_mutations_do_not_rewrite_session(self):
+        self.add(self.products[0])
+        session_key = self.client.session.session_key
+        session_data = self.client.session.load()
+
+        self.add(self.products[1])
+        self.add(self.products[2])
+
+        self.assertEqual(self.client.session.session_key, session_key)
+        self.assertEqual(self.client.session.load(), session_data)
+        self.assertEqual(CartLine.objects.count(), 3)
+
+    def test_line_mutation_is_single_write(self):
+        from core import cart as cart_service
+
+        cart = Cart.objects.create(user=self.user)
+        for product in self.products:
+            cart_service.add_line(cart, product.pid, 1)
+
+        for action in (
+            lambda: cart_service.update_line_qty(cart, self.products[0].pid, 5),
+            lambda: cart_service.remove_line(cart, self.products[1].pid),
+        ):
+            with CaptureQueriesContext(connection) as ctx:
+                action()
+            writes = [q["sql"] for q in ctx.captured_queries if not q["sql"].startswith("SELECT")]
+            self.assertEqual(len(writes), 1, writes)
+
+    def test_update_and_delete_views(self):
+        self.client.login(email="buyer@example.com", password="testpassword")
+        self.add(self.products[0], qty=1)
+        self.add(self.products[1], qty=1)
+
+        response = self.client.get(reverse("core:update-cart"), {"id": self.products[0].pid, "qty": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["qty"], 3)
+        self.assertEqual(Decimal(str(response.json()["cart_total"])), Decimal("50.00"))
+
+        response = self.client.get(reverse("core:delete-from-cart"), {"id": self.products[0].pid})
+        self.assertEqual(response.json()["totalcartitems"], 1)
+        self.assertEqual(response.json()["removed"], self.products[0].pid)
+        self.assertEqual(list(CartLine.objects.values_list("product_id", flat=True)), [self.products[1].pid])
+
+    def test_update_product_not_in_cart_returns_404(self):
+        self.client.login(email="buyer@example.com", password="testpassword")
+        response = self.client.get(reverse("core:update-cart"), {"id": self.products[0].pid, "qty": 3})
+        self.assertEqual(response.status_code, 404)
+
+    def test_anonymous_cart_merged_on_login(self):
+        user_cart = Cart.objects.create(user=self.user)
+        CartLine.objects.create(cart=user_cart, product=self.products[0], qty=1)
+
+        self.add(self.products[0], qty=2)
+        self.add(self.products[1], qty=1)
+        anonymous_cart_id = self.client.session["cart_id"]
+
+        self.client.login(email="buyer@example.com", password="testpassword")
+
+        self.assertFalse(Cart.objects.filter(id=anonymous_cart_id).exists())
+        self.assertNotIn("cart_id", self.client.session)
+        lines = {line.product_id: line.qty for line in user_cart.lines.all()}
+        self.assertEqual(lines, {self.products[0].pid: 3, self.products[1].pid: 1})
+
+    def test_anonymous_cart_claimed_when_user_has_no_cart(self):
+        self.add(self.products[0], qty=2)
+        anonymous_cart_id = self.client.session["cart_id"]
+
+        self.client.login(email="buyer@example.com", password="testpassword")
+
+        self.assertEqual(Cart.objects.get(user=self.user).id, anonymous_cart_id)
+
+    def test_cart_count_in_header(self):
+        self.add(self.products[0])
+        self.add(self.products[1])
+        response = self.client.get(reverse("core:index"))
+        self.assertEqual(response.context["cart_count"], 2)
+
+    def test_clear_expired_carts_command(self):
+        old = timezone.now() - timedelta(days=60)
+        stale = Cart.objects.create()
+        CartLine.objects.create(cart=stale, product=self.products[0], qty=1)
+        CartLine.objects.filter(cart=stale).update(updated=old)
+        empty_stale = Cart.objects.create()
+        Cart.objects.filter(id=empty_stale.id).update(date=old)
+        active = Cart.objects.create(user=self.user)
+        CartLine.objects.create(cart=active, product=self.products[0], qty=1)
+
+        call_command("clear_expired_carts", stdout=StringIO())
+
+        self.assertEqual(list(Cart.objects.values_list("id", flat=True)), [active.id])
+
+
+class CartDeltaResponseTestCase(CartBaseTestCase):
+    def test_add_returns_only_changed_line_and_totals(self):
+        self.add(self.products[0], qty=1)
+        response = self.add(self.products[1], qty=2)
+
+        data = response.json()
+        self.assertNotIn("data", data)
+        self.assertEqual(data["line"]["pid"], self.products[1].pid)
+        self.assertEqual(data["line"]["qty"], 2)
+        self.assertEqual(Decimal(str(data["line"]["subtotal"])), Decimal("40.00"))
+        self.assertEqual(Decimal(str(data["cart_total"])), Decimal("50.00"))
+        self.assertEqual(data["totalcartitems"], 2)
+        self.assertEqual(response["ETag"], f'"{data["version"]}"')
+
+    def test_add_returns_full_cart_on_request(self):
+        self.add(self.products[0], qty=1)
+
+        data = self.client.get(reverse("core:add-to-cart"), {
+            "id": self.products[1].pid, "qty": 2, "full": "1",
+        }).json()
+
+        self.assertEqual(set(data["data"]), {self.products[0].pid, self.products[1].pid})
+        self.assertEqual(data["data"][self.products[1].pid]["qty"], 2)
+
+    def test_delete_returns_removed_line_and_totals(self):
+        self.client.login(email="buyer@example.com", password="testpassword")
+        self.add(self.products[0])
+        self.add(self.products[1])
+
+        data = self.client.get(reverse("core:delete-from-cart"), {"id": self.products[0].pid}).json()
+
+        self.assertEqual(set(data), {"totalcartitems", "cart_total", "version", "removed"})
+        self.assertEqual(data["removed"], self.products[0].pid)
+        self.assertEqual(data["totalcartitems"], 1)
+
+    def test_delete_returns_cart_table_on_request(self):
+        self.client.login(email="buyer@example.com", password="testpassword")
+        self.add(self.products[0])
+        self.add(self.products[1])
+
+        data = self.client.get(reverse("core:delete-from-cart"), {"id": self.products[0].pid, "full": "1"}).json()
+
+        self.assertIn(self.products[1].title, data["data"])
+        self.assertNotIn(self.products[0].title, data["data"])
+
+    def test_version_changes_only_when_cart_changes(self):
+        v1 = self.add(self.products[0], qty=1).json()["version"]
+        v2 = self.add(self.products[0], qty=1).json()["version"]
+        v3 = self.add(self.products[0], qty=2).json()["version"]
+
+        self.assertEqual(v1, v2)
+        self.assertNotEqual(v2, v3)
+
+    def test_summary_returns_304_for_matching_etag(self):
+        version = self.add(self.products[0]).json()["version"]
+
+        response = self.client.get(reverse("core:cart-summary"), HTTP_IF_NONE_MATCH=f'"{version}"')
+        self.assertEqual(response.status_code, 304)
+
+        self.add(self.products[1])
+        response = self.client.get(reverse("core:cart-summary"), HTTP_IF_NONE_MATCH=f'"{version}"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["totalcartitems"], 2)
+
+
+class CartPricingTestCase(CartBaseTestCase):
+    def test_client_price_is_ignored(self):
+        self.client.get(reverse("core:add-to-cart"), {
+            "id": self.products[0].pid,
+            "qty": 2,
+            "price": "0.01",
+            "title": "Hacked",
+            "image": "",
+        })
+        self.client.login(email="buyer@example.com", password="testpassword")
+
+        response = self.client.get(reverse("core:cart"))
+
+        item = response.context["cart_data"][self.products[0].pid]
+        self.assertEqual(item["price"], Decimal("10.00"))
+        self.assertEqual(item["title"], "Cart product 0")
+        self.assertEqual(response.context["cart_total_amount"], Decimal("20.00"))
+
+    def test_prices_fetched_in_one_query_and_cached(self):
+        pids = [p.pid for p in self.products]
+        with self.assertNumQueries(1):
+            prices = pricing.get_prices(pids)
+        self.assertEqual(prices[pids[3]], Decimal("40.00"))
+        with self.assertNumQueries(0):
+            pricing.get_prices(pids)
+
+    def test_product_save_invalidates_cached_price(self):
+        pricing.get_prices([self.products[0].pid])
+        self.products[0].amount = Decimal("12.50")
+        self.products[0].save()
+
+        self.assertEqual(pricing.get_prices([self.products[0].pid])[self.products[0].pid], Decimal("12.50"))
+
+    def test_price_lines_skips_missing_products(self):
+        priced, total = pricing.price_lines([(self.products[0].pid, 3), ("missing", 1)])
+        self.assertEqual([line.product_id for line in priced], [self.products[0].pid])
+        self.assertEqual(total, Decimal("30.00"))
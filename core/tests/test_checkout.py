@@ -0,0 +1,413 @@
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import cart as cart_service, checkout as checkout_service, coupons as coupon_service, pricing
+from core.models import CartLine, CartOrder, CartOrderProducts, Coupon, CouponUser, Product, Vendor
+from core.tests.test_cart import CartBaseTestCase
+
+
+class CheckoutBaseTestCase(CartBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_vendor = Vendor.objects.create(
+            vid="v-other",
+            title="Vendor Other",
+            description="Second vendor",
+            address="HCM",
+            contact="0987654321",
+            chat_resp_time=10,
+            shipping_on_time=95,
+            authentic_rating=4.5,
+            days_return=7,
+            warranty_period=12,
+        )
+        self.other_product = Product.objects.create(
+            title="Other product",
+            vendor=self.other_vendor,
+            amount=Decimal("100.00"),
+            stock_count=50,
+            product_status="published",
+        )
+        self.client.login(email="buyer@example.com", password="testpassword")
+        self.add(self.products[0], qty=2)
+        self.add(self.other_product, qty=1)
+        self.proceed()
+
+    def proceed(self):
+        return self.client.post(reverse("core:proceed-to-checkout"))
+
+    def make_coupon(self, vendor, code="SAVE10", **kwargs):
+        return Coupon.objects.create(
+            vendor=vendor,
+            code=code,
+            discount=10,
+            expiry_date=timezone.now() + timedelta(days=1),
+            min_order_amount=kwargs.pop("min_order_amount", Decimal("0")),
+            max_discount_amount=kwargs.pop("max_discount_amount", Decimal("100")),
+            **kwargs,
+        )
+
+
+class CheckoutSplitTestCase(CheckoutBaseTestCase):
+    def test_checkout_creates_one_order_per_vendor(self):
+        response = self.client.get(reverse("core:checkout"))
+
+        self.assertEqual(response.status_code, 200)
+        orders = CartOrder.objects.filter(user=self.user).order_by("id")
+        self.assertEqual(
+            {o.vendor_id: o.amount for o in orders},
+            {self.vendor.pk: Decimal("20.00"), self.other_vendor.pk: Decimal("100.00")},
+        )
+        self.assertEqual(len({o.checkout_ref for o in orders}), 1)
+        self.assertEqual(
+            set(CartOrderProducts.objects.values_list("order__vendor_id", "item")),
+            {(self.vendor.pk, "Cart product 0"), (self.other_vendor.pk, "Other product")},
+        )
+        self.assertEqual(response.context["total"], Decimal("120.00"))
+
+    def test_resplit_reuses_orders_and_drops_vendor_removed_from_cart(self):
+        first_ids = set(CartOrder.objects.values_list("id", flat=True))
+
+        self.proceed()
+        self.assertEqual(set(CartOrder.objects.values_list("id", flat=True)), first_ids)
+
+        CartLine.objects.filter(product=self.other_product).delete()
+        self.proceed()
+        self.assertEqual(list(CartOrder.objects.values_list("vendor_id", flat=True)), [self.vendor.pk])
+
+    def test_coupon_applies_only_to_its_vendor_order(self):
+        self.make_coupon(self.other_vendor)
+
+        response = self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "save10"})
+
+        orders = {o.vendor_id: o for o in CartOrder.objects.all()}
+        self.assertEqual(orders[self.other_vendor.pk].amount, Decimal("90.00"))
+        self.assertIsNone(orders[self.vendor.pk].coupon)
+        self.assertEqual(orders[self.vendor.pk].amount, Decimal("20.00"))
+        self.assertEqual(response.context["total"], Decimal("110.00"))
+
+        # Giỏ không đổi -> coupon được giữ ở lần vào checkout tiếp theo
+        response = self.client.get(reverse("core:checkout"))
+        self.assertEqual(response.context["discount"], Decimal("10.00"))
+
+    def test_coupon_min_amount_checked_against_vendor_subtotal(self):
+        self.make_coupon(self.vendor, min_order_amount=Decimal("50.00"))
+
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+
+        self.assertFalse(CartOrder.objects.filter(coupon__isnull=False).exists())
+
+    def test_coupon_from_vendor_not_in_cart_is_rejected(self):
+        stranger = Vendor.objects.create(
+            vid="v-stranger", title="Stranger", description="", address="", contact="",
+            chat_resp_time=1, shipping_on_time=1, authentic_rating=1, days_return=1, warranty_period=1,
+        )
+        self.make_coupon(stranger)
+
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+
+        self.assertFalse(CartOrder.objects.filter(coupon__isnull=False).exists())
+
+    def test_cart_change_drops_coupon(self):
+        self.make_coupon(self.vendor)
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+
+        self.add(self.products[0], qty=3)
+        orders, dropped = checkout_service.split_cart(self.user, self.user.cart)
+
+        self.assertEqual(dropped, 1)
+        order = next(o for o in orders if o.vendor_id == self.vendor.pk)
+        self.assertIsNone(order.coupon)
+        self.assertEqual(order.amount, Decimal("30.00"))
+
+    def test_cod_checkout_places_every_vendor_order(self):
+        ref = self.client.get(reverse("core:checkout")).context["checkout_ref"]
+
+        response = self.client.post(reverse("core:cod-checkout"), {"ref": ref})
+
+        self.assertRedirects(response, reverse("core:cod-detail", args=[ref]))
+        self.assertEqual(set(CartOrder.objects.values_list("order_status", flat=True)), {"shipped"})
+        self.assertFalse(CartLine.objects.exists())
+        self.other_product.refresh_from_db()
+        self.assertEqual(self.other_product.stock_count, 49)
+
+    def test_cod_accept_does_not_move_placed_orders_backwards(self):
+        ref = self.client.get(reverse("core:checkout")).context["checkout_ref"]
+        self.client.post(reverse("core:cod-checkout"), {"ref": ref})
+
+        response = self.client.post(reverse("core:cod-accept", args=[ref]))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(set(CartOrder.objects.values_list("order_status", flat=True)), {"shipped"})
+        self.assertEqual(self.client.post(reverse("core:cod-accept", args=["nope"])).status_code, 404)
+
+
+class CheckoutMaterializeTestCase(CartBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(email="buyer@example.com", password="testpassword")
+        self.add(self.products[0], qty=2)
+        self.add(self.products[1], qty=1)
+
+    def writes_during(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            response = func()
+        writes = [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith(("INSERT", "UPDATE", "DELETE")) and "django_session" not in q["sql"]
+        ]
+        return response, writes
+
+    def version(self):
+        return self.client.get(reverse("core:cart")).context["cart_version"]
+
+    def test_cart_view_is_read_only(self):
+        response, writes = self.writes_during(lambda: self.client.get(reverse("core:cart")))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(writes, [])
+        self.assertFalse(CartOrder.objects.exists())
+
+    def test_proceed_to_checkout_is_idempotent(self):
+        version = self.version()
+        response = self.client.post(reverse("core:proceed-to-checkout"), {"version": version})
+
+        self.assertRedirects(response, reverse("core:checkout"))
+        order = CartOrder.objects.get()
+        self.assertEqual(order.cart_version, version)
+
+        _, writes = self.writes_during(
+            lambda: self.client.post(reverse("core:proceed-to-checkout"), {"version": version})
+        )
+        self.assertEqual(writes, [])
+        _, writes = self.writes_during(lambda: self.client.get(reverse("core:checkout")))
+        self.assertEqual(writes, [])
+        self.assertEqual(list(CartOrder.objects.values_list("id", flat=True)), [order.id])
+
+    def test_stale_version_sends_user_back_to_cart(self):
+        version = self.version()
+        self.add(self.products[2])
+
+        response = self.client.post(reverse("core:proceed-to-checkout"), {"version": version})
+
+        self.assertRedirects(response, reverse("core:cart"))
+        self.assertFalse(CartOrder.objects.exists())
+
+    def test_version_from_ajax_update_is_accepted(self):
+        response = self.client.get(reverse("core:cart"))
+        self.assertContains(response, 'id="cart-version"')
+        version = self.client.get(
+            reverse("core:update-cart"), {"id": self.products[0].pid, "qty": 4}
+        ).json()["version"]
+
+        response = self.client.post(reverse("core:proceed-to-checkout"), {"version": version})
+
+        self.assertRedirects(response, reverse("core:checkout"))
+        self.assertEqual(CartOrder.objects.get().cart_version, version)
+
+    def test_checkout_get_does_not_rebuild_orders_when_cart_changed(self):
+        self.client.post(reverse("core:proceed-to-checkout"), {"version": self.version()})
+        self.add(self.products[0], qty=5)
+
+        response, writes = self.writes_during(lambda: self.client.get(reverse("core:checkout")))
+
+        self.assertRedirects(response, reverse("core:cart"))
+        self.assertEqual(writes, [])
+        self.assertEqual(CartOrder.objects.get().amount, Decimal("40.00"))
+
+        self.client.post(reverse("core:proceed-to-checkout"), {"version": self.version()})
+        response = self.client.get(reverse("core:checkout"))
+
+        order = CartOrder.objects.get()
+        self.assertEqual(order.amount, Decimal("70.00"))
+        self.assertEqual(order.cart_version, cart_service.cart_version(cart_service.cart_summary(self.user.cart)[0]))
+        self.assertEqual(response.context["total"], Decimal("70.00"))
+
+    def test_checkout_without_proceed_sends_user_to_cart(self):
+        response, writes = self.writes_during(lambda: self.client.get(reverse("core:checkout")))
+
+        self.assertRedirects(response, reverse("core:cart"))
+        self.assertEqual(writes, [])
+        self.assertFalse(CartOrder.objects.exists())
+
+
+class CouponEngineTestCase(CheckoutBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_codes_are_stored_uppercase_and_looked_up_exactly(self):
+        coupon = self.make_coupon(self.vendor, code="  summer5 ")
+
+        self.assertEqual(coupon.code, "SUMMER5")
+        self.assertEqual(coupon_service.get_active_coupon("Summer5"), coupon)
+
+    def test_uppercase_migration_renames_case_only_twins(self):
+        first, second, third = (self.make_coupon(self.vendor, code=c) for c in ("SAVE10", "a", "b"))
+        Coupon.objects.filter(pk=second.pk).update(code="save10")
+        Coupon.objects.filter(pk=third.pk).update(code="Save10")
+        migration = importlib.import_module("core.migrations.0016_uppercase_coupon_codes")
+
+        with self.assertLogs(migration.logger, "WARNING"):
+            migration.uppercase_codes(apps, None)
+
+        codes = dict(Coupon.objects.values_list("pk", "code"))
+        self.assertEqual([codes[c.pk] for c in (first, second, third)], ["SAVE10", "SAVE10-2", "SAVE10-3"])
+
+    def test_active_coupons_are_cached_until_changed(self):
+        coupon = self.make_coupon(self.vendor)
+        coupon_service.get_active_coupon("save10")
+        with self.assertNumQueries(0):
+            self.assertEqual(coupon_service.get_active_coupon("SAVE10"), coupon)
+
+        coupon.active = False
+        coupon.save()
+        self.assertIsNone(coupon_service.get_active_coupon("SAVE10"))
+
+    def test_cache_timeout_never_outlives_expiry(self):
+        coupon = self.make_coupon(self.vendor)
+        coupon.expiry_date = timezone.now() + timedelta(seconds=20)
+
+        self.assertLessEqual(coupon_service._cache_timeout(coupon), 20)
+
+    def test_status_is_stored_and_swept_when_expired(self):
+        live = self.make_coupon(self.vendor, code="LIVE")
+        due = self.make_coupon(self.vendor, code="DUE")
+        paused = self.make_coupon(self.vendor, code="PAUSED", active=False)
+        self.assertEqual((live.status, due.status, paused.status), ("active", "active", "inactive"))
+        Coupon.objects.filter(pk__in=[due.pk, paused.pk]).update(expiry_date=timezone.now() - timedelta(minutes=1))
+
+        out = StringIO()
+        with self.assertNumQueries(1):
+            call_command("expire_coupons", stdout=out)
+
+        self.assertIn("Expired 1 coupons", out.getvalue())
+        self.assertEqual(
+            dict(Coupon.objects.values_list("code", "status")),
+            {"LIVE": "active", "DUE": "expired", "PAUSED": "inactive"},
+        )
+        due.refresh_from_db()
+        due.expiry_date = timezone.now() + timedelta(days=1)
+        due.save(update_fields=["expiry_date"])
+        self.assertEqual(Coupon.objects.get(pk=due.pk).status, "active")
+
+    def test_validate_codes_in_bulk(self):
+        self.make_coupon(self.vendor, code="VENDOR1")
+        self.make_coupon(self.other_vendor, code="BIGONLY", min_order_amount=Decimal("500.00"))
+        self.client.post(reverse("core:proceed-to-checkout"))
+
+        response = self.client.post(reverse("core:validate-coupons"), {"codes": ["vendor1,bigonly", "nope"]})
+
+        results = response.json()["results"]
+        self.assertEqual(list(results), ["VENDOR1", "BIGONLY", "NOPE"])
+        self.assertTrue(results["VENDOR1"]["valid"])
+        self.assertEqual(Decimal(str(results["VENDOR1"]["discount"])), Decimal("2.00"))
+        self.assertFalse(results["BIGONLY"]["valid"])
+        self.assertFalse(results["NOPE"]["valid"])
+        self.assertFalse(CartOrder.objects.filter(coupon__isnull=False).exists())
+
+    def test_once_per_user_coupon_recorded_and_enforced(self):
+        coupon = self.make_coupon(self.vendor)
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+        ref = CartOrder.objects.first().checkout_ref
+        self.client.post(reverse("core:cod-checkout"), {"ref": ref})
+
+        self.assertTrue(CouponUser.objects.filter(coupon=coupon, user=self.user).exists())
+
+        self.add(self.products[0], qty=1)
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+        self.assertFalse(CartOrder.objects.filter(order_status="pending", coupon__isnull=False).exists())
+
+    def test_usage_counters_follow_placed_orders(self):
+        coupon = self.make_coupon(self.vendor, apply_once_per_user=False)
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+        self.client.post(reverse("core:cod-checkout"), {"ref": CartOrder.objects.first().checkout_ref})
+        self.add(self.products[0], qty=1)
+        self.proceed()
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+        ref = CartOrder.objects.get(order_status="pending").checkout_ref
+        self.client.post(reverse("core:cod-checkout"), {"ref": ref})
+
+        coupon.refresh_from_db()
+        self.assertEqual((coupon.usage_count, coupon.orders_count), (1, 2))
+
+        CouponUser.objects.filter(coupon=coupon).delete()
+        CartOrder.objects.filter(coupon=coupon).first().delete()
+        coupon.refresh_from_db()
+        self.assertEqual((coupon.usage_count, coupon.orders_count), (0, 1))
+
+    def test_coupon_disabled_in_another_process_is_rejected_at_placement(self):
+        coupon = self.make_coupon(self.vendor)
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+        # update() không xoá cache, giống như coupon bị tắt ở process khác
+        Coupon.objects.filter(pk=coupon.pk).update(active=False, status="inactive")
+        self.assertIsNotNone(coupon_service.get_active_coupon("SAVE10"))
+        ref = CartOrder.objects.first().checkout_ref
+
+        response = self.client.post(reverse("core:cod-checkout"), {"ref": ref})
+
+        self.assertRedirects(response, reverse("core:checkout"))
+        self.assertEqual(set(CartOrder.objects.values_list("order_status", flat=True)), {"pending"})
+        self.assertFalse(CartOrder.objects.filter(coupon__isnull=False).exists())
+        self.assertFalse(CouponUser.objects.exists())
+
+    def test_concurrent_use_rolls_back_order(self):
+        coupon = self.make_coupon(self.vendor)
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+        # Lượt dùng được ghi bởi request khác sau khi coupon đã được áp dụng
+        CouponUser.objects.create(coupon=coupon, user=self.user)
+        ref = CartOrder.objects.first().checkout_ref
+
+        response = self.client.post(reverse("core:cod-checkout"), {"ref": ref})
+
+        self.assertRedirects(response, reverse("core:checkout"))
+        self.assertEqual(set(CartOrder.objects.values_list("order_status", flat=True)), {"pending"})
+        self.assertFalse(CartOrder.objects.filter(coupon__isnull=False).exists())
+        self.assertTrue(CartLine.objects.exists())
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.orders_count, 0)
+
+
+class OrderTotalsTestCase(CheckoutBaseTestCase):
+    def test_pipeline_rounds_and_caps_discount(self):
+        coupon = self.make_coupon(self.vendor, max_discount_amount=Decimal("5.00"))
+        coupon.discount = 12.5
+
+        totals = pricing.order_totals(Decimal("33.33"), coupon)
+        self.assertEqual(totals.discount, Decimal("4.17"))
+        self.assertEqual(totals.total, Decimal("29.16"))
+
+        self.assertEqual(pricing.order_totals(Decimal("100.00"), coupon).discount, Decimal("5.00"))
+
+    def test_orders_store_subtotal_discount_and_total(self):
+        self.make_coupon(self.other_vendor)
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+
+        order = CartOrder.objects.get(vendor=self.other_vendor)
+        self.assertEqual(
+            (order.subtotal, order.discount, order.total),
+            (Decimal("100.00"), Decimal("10.00"), Decimal("90.00")),
+        )
+
+    def test_reprice_orders_uses_one_aggregate(self):
+        self.client.get(reverse("core:checkout"))
+        orders = list(CartOrder.objects.select_related("coupon"))
+        CartOrder.objects.update(amount=0, subtotal=0)
+
+        with self.assertNumQueries(2):
+            pricing.reprice_orders(orders)
+
+        self.assertEqual(
+            dict(CartOrder.objects.values_list("vendor_id", "amount")),
+            {self.vendor.pk: Decimal("20.00"), self.other_vendor.pk: Decimal("100.00")},
+        )
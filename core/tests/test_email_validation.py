@@ -0,0 +1,118 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core import constants as C
+from core.models import EmailCheck
+from utils import email_validation
+from utils.email_validation import Outcome, ValidatorUnavailable, check_email
+
+
+class FakeValidator:
+    calls = []
+    outcome = Outcome(valid=True, domain_ok=True)
+    error = None
+
+    def check(self, email):
+        FakeValidator.calls.append(email)
+        if FakeValidator.error:
+            raise ValidatorUnavailable(FakeValidator.error)
+        return FakeValidator.outcome
+
+
+@override_settings(
+    EMAIL_VALIDATOR="core.tests.test_email_validation.FakeValidator",
+    EMAIL_VALIDATION_DEFERRED=False,
+)
+class EmailValidationTestCase(TestCase):
+    def setUp(self):
+        FakeValidator.calls = []
+        FakeValidator.outcome = Outcome(valid=True, domain_ok=True)
+        FakeValidator.error = None
+        email_validation.breaker.reset()
+
+    def test_local_heuristics_reject_without_remote_call(self):
+        for email in ("not-an-email", "a@localhost", "a@b..com", "x@mailinator.com"):
+            self.assertFalse(check_email(email), email)
+        self.assertEqual(FakeValidator.calls, [])
+
+    def test_result_is_cached_per_address(self):
+        self.assertTrue(check_email("Buyer@Example.com"))
+        self.assertTrue(check_email("buyer@example.com"))
+
+        self.assertEqual(FakeValidator.calls, ["Buyer@Example.com"])
+        self.assertEqual(EmailCheck.objects.get(key="address:buyer@example.com").verdict, C.EMAIL_VERDICT_VALID)
+
+    def test_invalid_domain_is_cached_for_other_addresses(self):
+        FakeValidator.outcome = Outcome(valid=False, domain_ok=False)
+        self.assertFalse(check_email("a@dead-domain.com"))
+
+        self.assertFalse(check_email("b@dead-domain.com"))
+        self.assertEqual(FakeValidator.calls, ["a@dead-domain.com"])
+
+    def test_validator_failure_accepts_and_opens_breaker(self):
+        FakeValidator.error = "timeout"
+        for i in range(C.EMAIL_BREAKER_THRESHOLD):
+            self.assertTrue(check_email(f"user{i}@example.com"))
+
+        self.assertTrue(check_email("after@example.com"))
+        self.assertEqual(len(FakeValidator.calls), C.EMAIL_BREAKER_THRESHOLD)
+        self.assertEqual(EmailCheck.objects.get(key="address:after@example.com").verdict, C.EMAIL_VERDICT_UNKNOWN)
+
+    def test_breaker_half_opens_after_cooldown(self):
+        FakeValidator.error = "timeout"
+        for i in range(C.EMAIL_BREAKER_THRESHOLD):
+            check_email(f"user{i}@example.com")
+        FakeValidator.error = None
+
+        with mock.patch("utils.email_validation.time.monotonic", return_value=10 ** 9):
+            check_email("later@example.com")
+        self.assertEqual(FakeValidator.calls[-1], "later@example.com")
+        self.assertTrue(email_validation.breaker.allow())
+
+    def test_half_open_lets_one_trial_through(self):
+        for _ in range(C.EMAIL_BREAKER_THRESHOLD):
+            email_validation.breaker.failure()
+
+        with mock.patch("utils.email_validation.time.monotonic", return_value=10 ** 9):
+            self.assertEqual([email_validation.breaker.allow() for _ in range(3)], [True, False, False])
+            email_validation.breaker.failure()
+            self.assertFalse(email_validation.breaker.allow())
+        with mock.patch("utils.email_validation.time.monotonic", return_value=2 * 10 ** 9):
+            self.assertTrue(email_validation.breaker.allow())
+            email_validation.breaker.success()
+            self.assertTrue(email_validation.breaker.allow())
+            self.assertTrue(email_validation.breaker.allow())
+
+    @override_settings(EMAIL_VALIDATION_DEFERRED=True)
+    def test_deferred_mode_skips_remote_and_command_verifies_later(self):
+        FakeValidator.outcome = Outcome(valid=False)
+        self.assertTrue(check_email("later@example.com"))
+        self.assertEqual(FakeValidator.calls, [])
+
+        out = StringIO()
+        call_command("verify_emails", stdout=out)
+
+        self.assertEqual(FakeValidator.calls, ["later@example.com"])
+        self.assertIn("Invalid: later@example.com", out.getvalue())
+        self.assertFalse(check_email("later@example.com"))
+
+    @override_settings(EMAIL_VALIDATION_DEFERRED=True)
+    def test_command_deactivates_accounts_with_invalid_email_and_reports_counts(self):
+        User = get_user_model()
+        bad = User.objects.create_user(email="Bad@example.com", username="bad", password="x")
+        staff = User.objects.create_user(email="staff@example.com", username="staff", password="x", is_staff=True)
+        for email in ("bad@example.com", "staff@example.com"):
+            check_email(email)
+        FakeValidator.outcome = Outcome(valid=False)
+        out = StringIO()
+
+        call_command("verify_emails", stdout=out)
+
+        bad.refresh_from_db()
+        staff.refresh_from_db()
+        self.assertEqual((bad.is_active, staff.is_active), (False, True))
+        self.assertIn("Checked 2 emails (2 invalid); deactivated 1 accounts.", out.getvalue())
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import analytics, order_status
+from core.models import CartOrder, CartOrderProducts, OrderStatusHistory, OutboxEmail, Product, VendorDailySales
+from core.order_status import InvalidTransition
+from core.tests.test_analytics import AnalyticsBaseTestCase
+
+
+class OrderStatusTest(AnalyticsBaseTestCase):
+    """Máy trạng thái đơn hàng: chuyển hàng loạt, lịch sử, hook hoàn kho/email"""
+
+    def move(self, orders, status):
+        ids = [o.id for o in orders]
+        return order_status.transition(CartOrder.objects.filter(id__in=ids), status, changed_by=self.seller)
+
+    def statuses(self, *orders):
+        return [CartOrder.objects.get(pk=o.pk).order_status for o in orders]
+
+    def test_allowed_targets(self):
+        self.assertEqual(order_status.allowed_targets("delivered"), {"refunded"})
+        self.assertEqual(order_status.allowed_targets("cancelled"), set())
+        self.assertEqual(order_status.allowed_targets("pending"), set())
+        self.assertEqual(order_status.allowed_sources("shipped"), {"processing"})
+
+    def test_pending_checkout_drafts_are_never_moved(self):
+        pending = self.order("1.00", status="pending")
+
+        self.assertEqual(self.move([pending], "cancelled"), [])
+        self.assertEqual(self.move([pending], "shipped"), [])
+        self.assertEqual(self.statuses(pending), ["pending"])
+        self.assertFalse(OrderStatusHistory.objects.exists())
+
+    def test_bulk_transition_is_one_update_and_skips_invalid_orders(self):
+        processing, shipped, delivered = self.order("1.00"), self.order("1.00", status="shipped"), self.order(
+            "1.00", status="delivered"
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            moved = self.move([processing, shipped, delivered], "shipped")
+
+        self.assertEqual([o.id for o in moved], [processing.id])
+        self.assertEqual(self.statuses(processing, shipped, delivered), ["shipped", "shipped", "delivered"])
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "cart_order"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_backward_transition_is_skipped(self):
+        delivered = self.order("1.00", status="delivered")
+
+        self.assertEqual(self.move([delivered], "shipped"), [])
+        self.assertEqual(self.statuses(delivered), ["delivered"])
+        for status in ("pending", "processing"):
+            with self.assertRaises(InvalidTransition):
+                self.move([delivered], status)
+
+    def test_history_is_written_and_append_only(self):
+        order = self.order("1.00")
+        self.move([order], "shipped")
+        self.move([order], "delivered")
+
+        history = list(order.status_history.values_list("from_status", "to_status", "changed_by", "vendor"))
+        self.assertEqual(history, [("processing", "shipped", self.seller.id, self.vendor.pk),
+                                   ("shipped", "delivered", self.seller.id, self.vendor.pk)])
+        row = order.status_history.first()
+        row.to_status = "refunded"
+        with self.assertRaises(ValueError):
+            row.save()
+
+    def test_cancel_restocks(self):
+        product = Product.objects.create(title="Mug", vendor=self.vendor, amount=Decimal("5.00"), stock_count=3)
+        processing, shipped = self.order("5.00"), self.order("5.00", status="shipped")
+        for order in (processing, shipped):
+            CartOrderProducts.objects.create(order=order, item="Mug", qty=2, price=Decimal("5.00"), total=Decimal("10.00"))
+
+        self.move([processing, shipped], "cancelled")
+
+        self.assertEqual(Product.objects.get(pk=product.pk).stock_count, 7)
+
+    def test_customer_is_emailed(self):
+        order = self.order("1.00")
+
+        self.move([order], "shipped")
+
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+        self.assertIn(str(order.id), OutboxEmail.objects.get().subject)
+
+    def test_rollup_is_refreshed(self):
+        order = self.order("10.00", timezone.now())
+        self.assertEqual(VendorDailySales.objects.get(vendor=self.vendor).orders, 1)
+
+        self.move([order], "cancelled")
+
+        self.assertFalse(VendorDailySales.objects.exists())
+
+    def test_fulfillment_latency(self):
+        now = timezone.now()
+        fast, slow = self.order("1.00", now - timedelta(hours=2)), self.order("1.00", now - timedelta(hours=6))
+        self.order("1.00", now - timedelta(days=9), vendor=self.other_vendor)
+        self.move([fast, slow], "shipped")
+
+        latency = analytics.fulfillment_latency(self.vendor)
+
+        self.assertEqual(latency["orders"], 2)
+        self.assertAlmostEqual(latency["average"].total_seconds(), 4 * 3600, delta=60)
+        self.assertEqual(analytics.fulfillment_latency(self.vendor, "delivered"), {"orders": 0, "average": None})
+        self.assertEqual(OrderStatusHistory.objects.filter(vendor=self.other_vendor).count(), 0)
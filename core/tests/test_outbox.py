@@ -0,0 +1,94 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import constants as C
+from core.models import OutboxEmail
+from utils import email_service
+
+User = get_user_model()
+
+
+class OutboxTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="mailee", email="mailee@example.com", password="x")
+
+    def test_send_functions_only_queue(self):
+        email_service.send_password_reset_email(self.user, "http://testserver/reset/abc/")
+        email_service.send_activation_email("new@example.com", "new", "uid", "token")
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            list(OutboxEmail.objects.values_list("to", "status")),
+            [(["mailee@example.com"], "pending"), (["new@example.com"], "pending")],
+        )
+
+    def test_worker_sends_batch_over_one_connection(self):
+        for i in range(5):
+            email_service.queue_email(f"Subject {i}", "Body", [f"u{i}@example.com"])
+
+        with mock.patch("utils.email_service.get_connection", wraps=email_service.get_connection) as get_conn:
+            call_command("send_queued_emails", "--batch-size", "10", stdout=StringIO())
+
+        get_conn.assert_called_once()
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(set(OutboxEmail.objects.values_list("status", flat=True)), {C.EMAIL_STATUS_SENT})
+
+    def test_worker_drains_multiple_batches(self):
+        for i in range(5):
+            email_service.queue_email(f"Subject {i}", "Body", [f"u{i}@example.com"])
+
+        call_command("send_queued_emails", "--batch-size", "2", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_claimed_batch_is_not_due_while_sending(self):
+        for i in range(3):
+            email_service.queue_email(f"Subject {i}", "Body", [f"u{i}@example.com"])
+        due_while_sending = []
+
+        def send_messages(messages):
+            due_while_sending.append(OutboxEmail.objects.filter(next_attempt_at__lte=timezone.now()).count())
+            return len(messages)
+
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=send_messages):
+            self.assertEqual(email_service.deliver_outbox(), (3, 0))
+
+        self.assertEqual(due_while_sending, [0, 0, 0])
+        self.assertEqual(set(OutboxEmail.objects.values_list("status", flat=True)), {C.EMAIL_STATUS_SENT})
+
+    def test_failed_send_is_retried_with_backoff(self):
+        email = email_service.queue_email("Subject", "Body", ["u@example.com"])
+
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=OSError("boom")):
+            self.assertEqual(email_service.deliver_outbox(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), (C.EMAIL_STATUS_PENDING, 1, "boom"))
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=C.EMAIL_RETRY_BASE_SECONDS - 5))
+        # Chưa đến hạn thử lại -> lô tiếp theo bỏ qua
+        self.assertEqual(email_service.deliver_outbox(), (0, 0))
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(email_service.deliver_outbox(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_gives_up_after_max_attempts(self):
+        email = email_service.queue_email("Subject", "Body", ["u@example.com"])
+
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=OSError("boom")):
+            email_service.deliver_outbox(max_attempts=1)
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, C.EMAIL_STATUS_FAILED)
+
+    def test_backoff_is_capped(self):
+        self.assertEqual(email_service.retry_delay(1), timedelta(seconds=C.EMAIL_RETRY_BASE_SECONDS))
+        self.assertEqual(email_service.retry_delay(50), timedelta(seconds=C.EMAIL_RETRY_MAX_SECONDS))
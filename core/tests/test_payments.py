@@ -0,0 +1,131 @@
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.urls import reverse
+from paypal.standard.ipn.models import PayPalIPN
+
+from core import payments
+from core.models import CartLine, CartOrder, CouponUser, OutboxEmail, VendorDailySales
+from core.tests.test_checkout import CheckoutBaseTestCase
+
+
+class LocalIPN:
+    """Stand-in cho PayPal: POST IPN vào endpoint thật, postback luôn trả VERIFIED (không gọi mạng)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def send(self, **fields):
+        data = {
+            "txn_type": "web_accept",
+            "payment_status": "Completed",
+            "receiver_email": settings.PAYPAL_RECEIVER_EMAIL,
+            "mc_currency": settings.PAYPAL_CURRENCY,
+            "charset": "windows-1252",
+            "notify_version": "3.9",
+            "payment_date": "23:04:06 Feb 02, 2009 PST",
+        }
+        data.update(fields)
+        with mock.patch.object(PayPalIPN, "_postback", return_value=b"VERIFIED"):
+            return self.client.post(
+                reverse("core:paypal-ipn"), urlencode(data), content_type="application/x-www-form-urlencoded"
+            )
+
+
+class PayPalIPNTestCase(CheckoutBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.response = self.client.get(reverse("core:checkout"))
+        self.ref = self.response.context["checkout_ref"]
+        self.ipn = LocalIPN(self.client_class())
+
+    def pay(self, txn_id="TXN1", gross="120.00", **fields):
+        return self.ipn.send(txn_id=txn_id, mc_gross=gross, invoice=payments.invoice_for(self.ref), **fields)
+
+    def test_checkout_form_uses_unique_invoice_and_grand_total(self):
+        form = self.response.context["payment_button_form"]
+        self.assertEqual(form.initial["invoice"], payments.invoice_for(self.ref))
+        self.assertEqual(form.initial["amount"], Decimal("120.00"))
+
+    def test_valid_ipn_marks_every_order_paid(self):
+        response = self.pay()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(CartOrder.objects.values_list("paid_status", "order_status", "paypal_txn_id")),
+            {(True, "processing", "TXN1")},
+        )
+        self.assertFalse(CartLine.objects.exists())
+        self.other_product.refresh_from_db()
+        self.assertEqual(self.other_product.stock_count, 49)
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
+    def test_payment_updates_sales_rollup(self):
+        self.pay()
+
+        row = VendorDailySales.objects.get(vendor=self.other_vendor)
+        self.assertEqual((row.paid_orders, row.paid_units, row.paid_gross), (1, 1, Decimal("100.00")))
+
+    def test_repeated_ipn_is_idempotent(self):
+        self.pay()
+        self.pay()
+
+        self.other_product.refresh_from_db()
+        self.assertEqual(self.other_product.stock_count, 49)
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+        self.assertEqual(payments.finalize_paypal_payment(self.ref, "TXN1", Decimal("120.00"), "USD"), [])
+
+    def test_amount_mismatch_is_recorded_on_orders(self):
+        self.pay(gross="1.00")
+
+        self.assertFalse(CartOrder.objects.filter(paid_status=True).exists())
+        issues = set(CartOrder.objects.values_list("payment_issue", flat=True))
+        self.assertEqual(issues, {"PayPal TXN1: received 1.00 USD, expected 120.00 USD"})
+
+        self.pay(txn_id="TXN2")
+        self.assertEqual(set(CartOrder.objects.values_list("paid_status", "payment_issue")), {(True, "")})
+
+    def test_currency_mismatch_blocks_finalization(self):
+        self.pay(mc_currency="EUR")
+
+        self.assertEqual(set(CartOrder.objects.values_list("paid_status", "order_status")), {(False, "pending")})
+        self.other_product.refresh_from_db()
+        self.assertEqual(self.other_product.stock_count, 50)
+        self.assertTrue(CartLine.objects.exists())
+
+    def test_cart_change_issues_new_ref_and_old_invoice_is_refused(self):
+        self.add(self.products[0], qty=1)
+        self.proceed()
+
+        new_ref = self.client.get(reverse("core:checkout")).context["checkout_ref"]
+        self.assertNotEqual(new_ref, self.ref)
+        self.assertEqual(set(CartOrder.objects.values_list("checkout_ref", flat=True)), {new_ref})
+
+        self.pay(gross="130.00")
+        self.assertFalse(CartOrder.objects.filter(paid_status=True).exists())
+
+    def test_pending_payment_status_is_ignored(self):
+        self.pay(payment_status="Pending", pending_reason="echeck")
+
+        self.assertFalse(CartOrder.objects.filter(paid_status=True).exists())
+
+    def test_coupon_usage_recorded_on_payment(self):
+        coupon = self.make_coupon(self.other_vendor)
+        self.client.post(reverse("core:checkout"), {"apply_coupon": "1", "code": "SAVE10"})
+
+        self.pay(gross="110.00")
+
+        self.assertTrue(CouponUser.objects.filter(coupon=coupon, user=self.user).exists())
+
+    def test_return_page_only_reads_status(self):
+        response = self.client.get(reverse("core:payment-completed"), {"ref": self.ref})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["paid"])
+        self.assertFalse(CartOrder.objects.filter(paid_status=True).exists())
+
+        self.pay()
+        response = self.client.get(reverse("core:payment-completed"), {"ref": self.ref})
+        self.assertTrue(response.context["paid"])
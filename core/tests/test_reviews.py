@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from core import reviews
+from core.models import Product, ProductRatingCount, ProductReview
+from core.tests.test_analytics import AnalyticsBaseTestCase
+
+
+class ReviewStatsTestCase(AnalyticsBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.a = Product.objects.create(title="A", vendor=self.vendor, sku="sku-a")
+        self.b = Product.objects.create(title="B", vendor=self.vendor, sku="sku-b")
+        self.other = Product.objects.create(title="O", vendor=self.other_vendor, sku="sku-o")
+
+    def review(self, product, rating):
+        return ProductReview.objects.create(user=self.buyer, product=product, review="ok", rating=rating)
+
+    def counts(self, product):
+        return dict(ProductRatingCount.objects.filter(product=product).values_list("rating", "reviews"))
+
+    def test_counts_and_average_follow_reviews(self):
+        self.review(self.a, 5)
+        self.review(self.a, 5)
+        low = self.review(self.a, 2)
+
+        self.assertEqual(self.counts(self.a), {5: 2, 2: 1})
+        self.assertEqual(Product.objects.get(pk=self.a.pk).rating_avg, 4.0)
+
+        low.delete()
+        self.assertEqual(self.counts(self.a), {5: 2})
+        self.assertEqual(Product.objects.get(pk=self.a.pk).rating_avg, 5.0)
+
+    def test_moving_review_refreshes_both_products(self):
+        r = self.review(self.a, 3)
+
+        r.product = self.b
+        r.save()
+
+        self.assertEqual((self.counts(self.a), self.counts(self.b)), ({}, {3: 1}))
+        self.assertEqual(Product.objects.get(pk=self.a.pk).rating_avg, 0.0)
+
+    def test_vendor_summary_reads_only_counts(self):
+        self.review(self.a, 5)
+        self.review(self.b, 4)
+        self.review(self.b, 4)
+        self.review(self.b, 1)
+        self.review(self.other, 1)
+
+        with self.assertNumQueries(1):
+            summary = reviews.vendor_summary(self.vendor)
+
+        self.assertEqual((summary["total"], summary["average"]), (4, 3.5))
+        self.assertEqual(
+            [(bar["rating"], bar["count"], bar["percent"]) for bar in summary["histogram"]],
+            [(5, 1, 25), (4, 2, 50), (3, 0, 0), (2, 0, 0), (1, 1, 25)],
+        )
+
+    def test_rebuild_command(self):
+        self.review(self.a, 4)
+        ProductRatingCount.objects.all().delete()
+
+        out = StringIO()
+        call_command("rebuild_review_stats", stdout=out)
+
+        self.assertEqual(self.counts(self.a), {4: 1})
+        self.assertIn("1 products", out.getvalue())
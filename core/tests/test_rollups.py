@@ -0,0 +1,77 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from core import rollups
+from core.models import CartOrder, CartOrderProducts, VendorDailySales
+from core.tests.test_analytics import AnalyticsBaseTestCase
+
+
+class SalesRollupTestCase(AnalyticsBaseTestCase):
+    def rollup(self, vendor=None):
+        return VendorDailySales.objects.get(vendor=vendor or self.vendor, day=timezone.localdate())
+
+    def test_status_changes_update_day_incrementally(self):
+        order = self.order("30.00")
+        CartOrderProducts.objects.create(order=order, item="A", image="", qty=3, price=10, total=30)
+        order.discount = Decimal("5.00")
+        order.save()
+
+        row = self.rollup()
+        self.assertEqual((row.orders, row.units, row.gross, row.discount), (1, 3, Decimal("30.00"), Decimal("5.00")))
+        self.assertEqual((row.paid_orders, row.unpaid_orders), (0, 1))
+
+        order.paid_status = True
+        order.save()
+        row = self.rollup()
+        self.assertEqual((row.paid_orders, row.paid_units, row.paid_gross), (1, 3, Decimal("30.00")))
+
+        order.order_status = "cancelled"
+        order.save()
+        self.assertFalse(VendorDailySales.objects.exists())
+
+    def test_pending_orders_are_not_counted(self):
+        self.order("30.00", status="pending")
+
+        self.assertFalse(VendorDailySales.objects.exists())
+
+    def test_refresh_only_touches_given_vendor_days(self):
+        self.order("10.00", timezone.now() - timedelta(days=1))
+        self.order("20.00")
+        self.order("50.00", vendor=self.other_vendor)
+        VendorDailySales.objects.update(gross=0)
+
+        rollups.refresh(self.vendor.pk, [timezone.localdate()])
+
+        self.assertEqual(self.rollup().gross, Decimal("20.00"))
+        self.assertEqual(self.rollup(self.other_vendor).gross, 0)
+        self.assertEqual(VendorDailySales.objects.filter(gross=0).count(), 2)
+
+    def test_rebuild_command_matches_incremental_rollup(self):
+        self.order("10.00", paid=True)
+        self.order("20.00", timezone.now() - timedelta(days=2))
+        self.order("50.00", vendor=self.other_vendor)
+        expected = list(VendorDailySales.objects.order_by("vendor", "day").values_list("vendor", "day", *rollups.ROLLUP_FIELDS))
+
+        VendorDailySales.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_sales_rollups", stdout=out)
+
+        self.assertIn("Rebuilt 3 daily rollup rows.", out.getvalue())
+        self.assertEqual(
+            list(VendorDailySales.objects.order_by("vendor", "day").values_list("vendor", "day", *rollups.ROLLUP_FIELDS)),
+            expected,
+        )
+
+    def test_rebuild_for_one_vendor_keeps_others(self):
+        self.order("10.00")
+        self.order("50.00", vendor=self.other_vendor)
+        CartOrder.objects.filter(vendor=self.vendor).update(amount=Decimal("15.00"))
+
+        call_command("rebuild_sales_rollups", "--vendor", self.vendor.vid, stdout=StringIO())
+
+        self.assertEqual(self.rollup().gross, Decimal("15.00"))
+        self.assertEqual(self.rollup(self.other_vendor).gross, Decimal("50.00"))
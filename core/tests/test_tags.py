@@ -1,7 +1,11 @@
+import importlib
+
+from django.apps import apps
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from core.models import Product, Vendor, Category
+from core.models import Product, ProductTag, UUIDTaggedItem, Vendor, Category
+from taggit.models import Tag
 
 User = get_user_model()
 
@@ -77,5 +81,125 @@ class TagListTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Product1")
+
+    def test_slugs_differing_only_in_case(self):
+        Tag.objects.create(name="TAGA upper", slug="TAGA")
+        self.assertEqual(self.client.get(reverse("core:tags", args=["TAGA"])).context["tag"].slug, "TAGA")
+        self.assertEqual(self.client.get(reverse("core:tags", args=["taga"])).context["tag"].slug, "taga")
+        self.assertEqual(self.client.get(reverse("core:tags", args=["Taga"])).status_code, 200)
         
 
+
+class ProductTagTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(
+            vid="v-tag",
+            title="Vendor Tag",
+            description="Test vendor",
+            address="HN",
+            contact="0123456789",
+            chat_resp_time=10,
+            shipping_on_time=95,
+            authentic_rating=4.5,
+            days_return=7,
+            warranty_period=12,
+        )
+        self.products = [
+            Product.objects.create(
+                title=f"Tagged {i}",
+                vendor=self.vendor,
+                amount=10,
+                product_status="published",
+            )
+            for i in range(3)
+        ]
+        for product in self.products:
+            product.tags.add("fresh", "organic")
+
+    def test_tags_stored_with_product_fk(self):
+        links = ProductTag.objects.filter(content_object=self.products[0])
+        self.assertEqual(
+            sorted(links.values_list("tag__name", flat=True)), ["fresh", "organic"]
+        )
+
+    def test_reverse_migration_does_not_duplicate_tag_links(self):
+        migration = importlib.import_module("core.migrations.0011_product_tag")
+
+        migration.copy_product_tags_back(apps, None)
+        migration.copy_product_tags_back(apps, None)
+
+        self.assertEqual(UUIDTaggedItem.objects.count(), ProductTag.objects.count())
+
+    def test_filter_by_tag_uses_product_tag_join(self):
+        qs = Product.objects.filter(tags__slug="fresh")
+        self.assertIn("product_tag", str(qs.query))
+        self.assertNotIn("content_type", str(qs.query))
+        self.assertEqual(qs.count(), 3)
+
+    def test_prefetch_tags_single_query(self):
+        with self.assertNumQueries(2):
+            products = list(Product.objects.filter(vendor=self.vendor).prefetch_related("tags"))
+            names = [sorted(t.name for t in p.tags.all()) for p in products]
+        self.assertEqual(names, [["fresh", "organic"]] * 3)
+
+    def test_deleting_product_removes_tag_links(self):
+        pid = self.products[0].pid
+        self.products[0].delete()
+        self.assertFalse(ProductTag.objects.filter(content_object_id=pid).exists())
+
+
+class ListingTagPrefetchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.vendor = Vendor.objects.create(
+            vid="v-prefetch",
+            title="Vendor Prefetch",
+            description="Test vendor",
+            address="HN",
+            contact="0123456789",
+            chat_resp_time=10,
+            shipping_on_time=95,
+            authentic_rating=4.5,
+            days_return=7,
+            warranty_period=12,
+        )
+        self.category = Category.objects.create(cid="cat-prefetch", title="Prefetch")
+        for i in range(5):
+            product = Product.objects.create(
+                title=f"Prefetch {i}",
+                vendor=self.vendor,
+                category=self.category,
+                amount=10,
+                product_status="published",
+            )
+            product.tags.add("shared", f"own-{i}")
+
+    def assert_tag_list_prefetched(self, products):
+        products = list(products)
+        self.assertEqual(len(products), 5)
+        # Đọc tag_list không được phát sinh thêm query nào
+        with self.assertNumQueries(0):
+            for p in products:
+                self.assertEqual(sorted(t.name for t in p.tag_list), sorted(["shared", f"own-{p.title[-1]}"]))
+
+    def test_product_list_view_prefetches_tags(self):
+        response = self.client.get(reverse("core:product-list"))
+        self.assert_tag_list_prefetched(response.context["products"])
+
+    def test_search_view_prefetches_tags(self):
+        response = self.client.get(reverse("core:search"), {"q": "Prefetch"})
+        self.assert_tag_list_prefetched(response.context["products"])
+
+    def test_tag_list_prefetches_tags(self):
+        response = self.client.get(reverse("core:tags", args=["shared"]))
+        self.assert_tag_list_prefetched(response.context["products"])
+
+    def test_vendor_detail_view_prefetches_tags(self):
+        response = self.client.get(reverse("core:vendor-detail", args=[self.vendor.vid]))
+        self.assert_tag_list_prefetched(response.context["products"])
+
+    def test_tag_prefetch_is_one_query_for_the_page(self):
+        from core.views import with_tag_list
+
+        with self.assertNumQueries(2):
+            list(with_tag_list(Product.objects.filter(vendor=self.vendor)))
@@ -0,0 +1,88 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import vendors
+from core.models import Vendor
+
+User = get_user_model()
+
+
+def make_vendor(user, title="Shop"):
+    return Vendor.objects.create(
+        vid=f"v-{uuid.uuid4().hex[:8]}", user=user, title=title, description="d", address="a",
+        contact="c", chat_resp_time=10, shipping_on_time=90, authentic_rating=4.0,
+        days_return=7, warranty_period=12, vendor_active=True,
+    )
+
+
+class VendorResolutionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="seller", email="seller@example.com", password="x")
+        self.user.role = "vendor"
+        self.user.save()
+        self.vendor = make_vendor(self.user)
+        self.factory = RequestFactory()
+
+    def request(self, user):
+        request = self.factory.get("/")
+        request.user = user
+        return request
+
+    def test_vendor_is_cached_between_requests(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(vendors.vendor_for_user(self.user), self.vendor)
+        with self.assertNumQueries(0):
+            self.assertEqual(vendors.request_vendor(self.request(self.user)), self.vendor)
+
+    def test_deleting_vendor_invalidates_cache(self):
+        vendors.vendor_for_user(self.user)
+        self.vendor.delete()
+
+        self.assertIsNone(vendors.vendor_for_user(self.user))
+
+    def test_anonymous_user_has_no_vendor(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(vendors.request_vendor(self.request(AnonymousUser())))
+
+    def test_saving_vendor_invalidates_cache(self):
+        vendors.vendor_for_user(self.user)
+        self.vendor.title = "Renamed"
+        self.vendor.save()
+
+        self.assertEqual(vendors.vendor_for_user(self.user).title, "Renamed")
+
+    def test_missing_vendor_is_cached_until_created(self):
+        other = User.objects.create_user(username="newseller", email="new@example.com", password="x")
+        self.assertIsNone(vendors.vendor_for_user(other))
+        with self.assertNumQueries(0):
+            self.assertIsNone(vendors.vendor_for_user(other))
+
+        vendor = make_vendor(other)
+        self.assertEqual(vendors.vendor_for_user(other), vendor)
+
+    def test_reassigning_vendor_invalidates_old_owner(self):
+        vendors.vendor_for_user(self.user)
+        other = User.objects.create_user(username="buyer2", email="b2@example.com", password="x")
+        self.vendor.user = other
+        self.vendor.save()
+
+        self.assertIsNone(vendors.vendor_for_user(self.user))
+
+    def test_vendor_page_resolves_vendor_once_per_request(self):
+        self.client.force_login(self.user)
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("useradmin:shop_page"))
+
+        self.assertEqual(response.context["vendor"], self.vendor)
+        lookups = [q for q in ctx.captured_queries if f'FROM "{Vendor._meta.db_table}"' in q["sql"]]
+        self.assertEqual(len(lookups), 1)
@@ -23,6 +23,7 @@ urlpatterns = [
     path("add-to-cart/", add_to_cart, name="add-to-cart"),
     path("delete-from-cart/", delete_item_from_cart, name="delete-from-cart"),
     path("update-cart/", update_cart, name="update-cart"),
+    path("cart/summary/", cart_summary, name="cart-summary"),
     path("ajax-add-review/<int:pid>/", ajax_add_review, name="ajax-add-review"),
     path("products/", product_list_view, name="product-list"),
     path("search/", search_view, name="search"),
@@ -34,9 +35,11 @@ urlpatterns = [
     path("ajax-add-review/<pid>", ajax_add_review, name="ajax-add-review"),
     path("paypal/", include("paypal.standard.ipn.urls")),
     path("checkout/cod/", cod_checkout, name="cod-checkout"),
-    path("checkout/cod/<int:oid>/", cod_detail, name="cod-detail"),
-    path("checkout/cod/<int:oid>/accept/", cod_accept, name="cod-accept"),
-    path("checkout/<int:oid>/", checkout, name="checkout"),
+    path("checkout/cod/<str:ref>/", cod_detail, name="cod-detail"),
+    path("checkout/cod/<str:ref>/accept/", cod_accept, name="cod-accept"),
+    path("checkout/", checkout, name="checkout"),
+    path("checkout/start/", proceed_to_checkout, name="proceed-to-checkout"),
+    path("checkout/coupons/validate/", validate_coupons, name="validate-coupons"),
     path("orders/", order_list, name="orders"),
     path("ajax-add-review/<pid>", ajax_add_review, name="ajax-add-review"),
     # Dashboard URL
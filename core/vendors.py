@@ -0,0 +1,67 @@
+"""Tra cứu vendor của user đang đăng nhập.
+
+`request_vendor(request)` chỉ tra cứu một lần cho mỗi request. Giữa các request
+cache cả đối tượng Vendor theo user (hoặc "không có vendor") với TTL ngắn, nên
+các trang vendor không tốn query nào để tìm vendor. Lưu/xoá Vendor hoặc User
+(qua signal) xoá cache của user liên quan; code đổi Vendor bằng queryset.update()
+phải tự gọi `invalidate`.
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from core.constants import VENDOR_CACHE_TTL
+from core.models import Vendor
+from userauths.models import User
+
+_NO_VENDOR = "none"
+
+
+def _cache_key(user_id):
+    return f"vendor:user:{user_id}"
+
+
+def vendor_for_user(user):
+    """Vendor của user, hoặc None nếu user chưa đăng nhập/chưa tạo hồ sơ vendor."""
+    if user is None or not user.is_authenticated:
+        return None
+    key = _cache_key(user.pk)
+    vendor = cache.get(key)
+    if vendor == _NO_VENDOR:
+        return None
+    if vendor is not None:
+        return vendor
+    vendor = Vendor.objects.filter(user=user).order_by("date").first()
+    cache.set(key, _NO_VENDOR if vendor is None else vendor, VENDOR_CACHE_TTL)
+    return vendor
+
+
+def request_vendor(request):
+    """Vendor của request.user, chỉ tra cứu một lần cho mỗi request."""
+    if not hasattr(request, "_cached_vendor"):
+        request._cached_vendor = vendor_for_user(getattr(request, "user", None))
+    return request._cached_vendor
+
+
+def invalidate(*user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids if user_id is not None])
+
+
+def _invalidate_vendor(sender, instance, **kwargs):
+    invalidate(instance.user_id)
+
+
+def _invalidate_old_owner(sender, instance, **kwargs):
+    # Chuyển vendor sang user khác: xoá luôn cache của user cũ
+    if instance.pk:
+        invalidate(*Vendor.objects.filter(pk=instance.pk).values_list("user_id", flat=True))
+
+
+def _invalidate_user(sender, instance, **kwargs):
+    invalidate(instance.pk)
+
+
+pre_save.connect(_invalidate_old_owner, sender=Vendor, dispatch_uid="core.vendors.invalidate_old_owner")
+post_save.connect(_invalidate_vendor, sender=Vendor, dispatch_uid="core.vendors.invalidate_on_save")
+post_delete.connect(_invalidate_vendor, sender=Vendor, dispatch_uid="core.vendors.invalidate_on_delete")
+post_save.connect(_invalidate_user, sender=User, dispatch_uid="core.vendors.invalidate_on_user_save")
+post_delete.connect(_invalidate_user, sender=User, dispatch_uid="core.vendors.invalidate_on_user_delete")
@@ -4,7 +4,7 @@ from django.contrib import messages
 from django.shortcuts import redirect
 from django.http import JsonResponse
 from urllib3 import request
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import JsonResponse, HttpResponseBadRequest, Http404
 from .models import Product
 from django.template.loader import render_to_string
 from django.db.models import Avg, Count
@@ -15,7 +15,7 @@ from core.models import *
 from core.models import Image
 from core.models import Vendor
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, Prefetch
 from core.models import Category
 import core.constants as C
 from core.constants import TAG_LIMIT
@@ -31,9 +31,9 @@ from django.db.models import Min, Max
 from decimal import Decimal, InvalidOperation
 import calendar
 from django.db.models import Count, Avg
-from django.db.models.functions import ExtractMonth
+from django.db.models.functions import TruncMonth
 from userauths.models import *
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
 from django.db import transaction
 from django.templatetags.static import static
 from django.urls import reverse
@@ -52,6 +52,11 @@ from django.http import HttpRequest
 from dataclasses import dataclass
 from core.forms import *
 from utils.email_service import *
+from core import cart as cart_service
+from core import checkout as checkout_service
+from core import coupons as coupon_service
+from core import pricing
+from core import payments as payment_service
 
 def index(request):
     # Base query: các sản phẩm đã publish
@@ -97,110 +102,99 @@ def index(request):
 
 @login_required
 def cart_view(request):
-    cart_total_amount = 0
-    cart_items = {}
-    if 'cart_data_obj' in request.session:
-        updated_cart_data = {}
-
-        for p_id, item in request.session['cart_data_obj'].items():
-            try:
-                product = Product.objects.get(pid=p_id)
-                price = float(item.get('price', product.amount) or 0)
-                qty = int(item.get('qty', 1))
-                subtotal = qty * price
-            except Product.DoesNotExist:
-                messages.warning(request, _("Product with ID %(pid)s is no longer available.") % {"pid": p_id})
-                continue
-            except (ValueError, TypeError):
-                price = 0
-                qty = 0
-                subtotal = 0
-
-            item['subtotal'] = subtotal
-            cart_items[p_id] = item
-            updated_cart_data[p_id] = item
-            cart_total_amount += subtotal
-
-        # Cập nhật lại session giỏ hàng
-        request.session['cart_data_obj'] = updated_cart_data
-
-        # Nếu giỏ rỗng sau khi lọc -> return luôn, tránh StopIteration
-        if not cart_items:
-            messages.warning(request, _("Your cart is empty"))
-            return redirect("core:index")
-
-        # Lấy vendor từ sản phẩm đầu tiên
-        first_product_id = next(iter(cart_items))
-        product = Product.objects.get(pid=first_product_id)
-        vendor = product.vendor
-
-        # Tạo hoặc cập nhật đơn hàng
-        order, created = CartOrder.objects.get_or_create(
-            user=request.user,
-            order_status='pending',
-            defaults={
-                "vendor": vendor,
-                "amount": Decimal(cart_total_amount)
-            }
-        )
-        if not created:
-            order.amount = Decimal(cart_total_amount)
-            order.save()
+    """Trang giỏ hàng chỉ đọc; đơn hàng được tạo ở bước proceed_to_checkout."""
+    cart = cart_service.get_cart(request)
+    # Sản phẩm bị xoá sẽ tự mất khỏi giỏ (CartLine.product on_delete=CASCADE)
+    cart_items = cart_service.cart_items(cart)
+    if cart_items:
+        cart_total_amount = cart_service.cart_total(cart_items)
 
         return render(request, "core/cart.html", {
             "cart_data": cart_items,
             'totalcartitems': len(cart_items),
             'cart_total_amount': cart_total_amount,
-            'order': order
+            'cart_version': cart_service.items_version(cart_items),
         })
 
     messages.warning(request, _("Your cart is empty"))
     return redirect("core:index")
 
 
-def add_to_cart(request):
-    cart_product = {}
-
-    cart_product[str(request.GET['id'])] = {
-        'title': request.GET['title'],
-        'qty': request.GET['qty'],
-        'price': request.GET['price'],
-        'image': request.GET['image'],
-        'pid': request.GET['id'],
-    }
+@require_POST
+@login_required
+def proceed_to_checkout(request):
+    """
+    Tạo (hoặc tái sử dụng) các đơn pending cho giỏ hiện tại rồi chuyển sang checkout.
+    Idempotent theo version giỏ: bấm lại hoặc gửi lại form không ghi thêm gì.
+    """
+    cart = cart_service.get_cart(request)
+    priced, _total = cart_service.cart_summary(cart)
+    if not priced:
+        messages.warning(request, _("Your cart is empty"))
+        return redirect("core:index")
+    version = request.POST.get("version")
+    if version and version != cart_service.cart_version(priced):
+        messages.warning(request, _("Your cart has changed. Please review it before checking out."))
+        return redirect("core:cart")
 
-    if 'cart_data_obj' in request.session:
-        if str(request.GET['id']) in request.session['cart_data_obj']:
+    _orders, dropped = checkout_service.materialize(request.user, cart)
+    if dropped:
+        messages.info(request, _("Cart changed. Coupon has been removed."))
+    return redirect("core:checkout")
 
-            cart_data = request.session['cart_data_obj']
-            cart_data[str(request.GET['id'])]['qty'] = int(cart_product[str(request.GET['id'])]['qty'])
-            cart_data.update(cart_data)
-            request.session['cart_data_obj'] = cart_data
-        else:
-            cart_data = request.session['cart_data_obj']
-            cart_data.update(cart_product)
-            request.session['cart_data_obj'] = cart_data
+def _wants_full_cart(request):
+    """Payload cũ (cả giỏ, O(cart)) chỉ trả khi client xin rõ bằng full=1."""
+    return request.GET.get("full") in ("1", "true")
 
-    else:
-        request.session['cart_data_obj'] = cart_product
-    return JsonResponse({"data":request.session['cart_data_obj'], 'totalcartitems': len(request.session['cart_data_obj'])})
+def add_to_cart(request):
+    product_id = str(request.GET['id'])
+    if not Product.objects.filter(pid=product_id).exists():
+        return JsonResponse({"success": False, "error": _("Product not found")}, status=404)
+    try:
+        qty = max(int(request.GET.get('qty', 1)), 1)
+    except (TypeError, ValueError):
+        qty = 1
+
+    # Chỉ lưu pid + qty; title/price/image client gửi lên bị bỏ qua
+    cart = cart_service.get_cart(request, create=True)
+    cart_service.add_line(cart, product_id, qty)
+
+    # Mặc định chỉ trả dòng vừa đổi + tổng + version; JS cũ cần cả giỏ thì gửi full=1
+    state = cart_service.cart_state(cart, product_id)
+    if _wants_full_cart(request):
+        state["data"] = cart_service.cart_items(cart)
+    return JsonResponse(state, headers={"ETag": f'"{state["version"]}"'})
 
 @login_required
 def delete_item_from_cart(request):
     product_id = str(request.GET['id'])
-    if 'cart_data_obj' in request.session:
-        if product_id in request.session['cart_data_obj']:
-            cart_data = request.session['cart_data_obj']
-            del request.session['cart_data_obj'][product_id]
-            request.session['cart_data_obj'] = cart_data
+    cart = cart_service.get_cart(request)
+    if cart is not None:
+        cart_service.remove_line(cart, product_id)
+
+    # Client xoá dòng `removed`; JS cũ thay cả bảng bằng `data` thì gửi full=1
+    state = cart_service.cart_state(cart)
+    state["removed"] = product_id
+    if _wants_full_cart(request):
+        cart_items = cart_service.cart_items(cart)
+        state["data"] = render_to_string("core/async/cart-table.html", {
+            "cart_data": cart_items,
+            "totalcartitems": len(cart_items),
+            "cart_total_amount": cart_service.cart_total(cart_items),
+            "cart_version": state["version"],
+        })
+    return JsonResponse(state, headers={"ETag": f'"{state["version"]}"'})
 
-    cart_total_amount = 0
-    if 'cart_data_obj' in request.session:
-        for p_id, item in request.session['cart_data_obj'].items():
-            cart_total_amount += int(item['qty']) * float(item['price'])
+def _cart_etag(request):
+    cart = cart_service.get_cart(request)
+    priced, _ = cart_service.cart_summary(cart)
+    return cart_service.cart_version(priced)
 
-    context = render_to_string("core/async/cart-table.html", {"cart_data":request.session['cart_data_obj'], 'totalcartitems': len(request.session['cart_data_obj']), 'cart_total_amount':cart_total_amount})
-    return JsonResponse({"data": context, 'totalcartitems': len(request.session['cart_data_obj'])})
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=_cart_etag)
+def cart_summary(request):
+    """Tổng giỏ + version; client gửi If-None-Match để nhận 304 khi giỏ không đổi."""
+    return JsonResponse(cart_service.cart_state(cart_service.get_cart(request)))
 
 
 @login_required
@@ -208,7 +202,7 @@ def update_cart(request):
     product_id = str(request.GET.get("id"))
     product_qty = int(request.GET.get("qty", 1))
 
-    cart = request.session.get("cart_data_obj", {})
+    cart = cart_service.get_cart(request)
     try:
         product = Product.objects.get(pid=product_id)
     except Product.DoesNotExist:
@@ -223,22 +217,24 @@ def update_cart(request):
     elif product_qty > product.stock_count:
         product_qty = product.stock_count
         message = _("Chỉ còn %(count)d sản phẩm trong kho.") % {"count": product.stock_count}
-    if product_id in cart:
-        price = float(cart[product_id]["price"])
-        cart[product_id]["qty"] = product_qty
-        cart[product_id]["subtotal"] = product_qty * price
-        request.session["cart_data_obj"] = cart
+    if cart is None or not cart_service.update_line_qty(cart, product_id, product_qty):
+        return JsonResponse(
+          {"success": False, "error": _("Product is not in your cart")},
+          status=404
+        )
 
-    cart_total_amount = sum(float(item["subtotal"]) for item in cart.values())
+    state = cart_service.cart_state(cart, product_id)
 
     return JsonResponse({
         "success": True,
-        "subtotal": cart[product_id]["subtotal"],
-        "cart_total": cart_total_amount,
-        "qty": cart[product_id]["qty"],
+        "subtotal": state["line"]["subtotal"],
+        "cart_total": state["cart_total"],
+        "qty": state["line"]["qty"],
+        "totalcartitems": state["totalcartitems"],
+        "version": state["version"],
         "stock": product.stock_count,
         "message": message,
-    })
+    }, headers={"ETag": f'"{state["version"]}"'})
 
 @login_required
 def ajax_add_review(request, pid):
@@ -294,7 +290,7 @@ def customer_dashboard(request):
     # Thống kê số đơn hàng (đÃ CHỐT) theo tháng
     monthly = (
         base_qs.exclude(order_status=CART_STATUS)
-        .annotate(month=ExtractMonth('order_date'))
+        .annotate(month=TruncMonth('order_date'))
         .values('month')
         .annotate(count=Count('id'))
         .order_by('month')
@@ -306,7 +302,8 @@ def customer_dashboard(request):
         # row['month'] có thể là None nếu DB trả về kỳ lạ; an toàn thêm check
         m = row['month']
         if m:
-            month.append(calendar.month_name[m])
+            # Nhóm theo cả năm và tháng để không gộp cùng tháng của các năm khác nhau
+            month.append(f"{calendar.month_name[m.month]} {m.year}")
             total_orders.append(row['count'])
 
     # Xử lý thêm địa chỉ
@@ -360,106 +357,92 @@ def make_address_default(request):
 
 def search_view(request):
     return render(request, "core/search.html")
-def apply_coupon_to_order(request, order, code, subtotal):
+def apply_coupon_to_order(request, orders, code):
     """
-    Xử lý logic áp dụng coupon cho một order.
+    Xử lý logic áp dụng coupon: coupon chỉ giảm giá cho đơn của vendor phát hành nó.
     """
-    code = code.strip()
-    try:
-        coupon = Coupon.objects.get(code__iexact=code, active=True)
-
-        # Hết hạn
-        if coupon.expiry_date < timezone.now():
-            messages.warning(request, _("Coupon has expired."))
-        elif subtotal < coupon.min_order_amount:
-            messages.warning(
-                request,
-                _("Minimum order amount should be $%(amount)s") % {"amount": coupon.min_order_amount}
-            )
-        elif order.coupon == coupon and coupon.apply_once_per_user:
-            messages.warning(request, _("You have already applied this coupon."))
-        else:
-            order.coupon = coupon
-            order.save()
-            messages.success(
-                request,
-                _("Coupon '%(code)s' applied successfully.") % {"code": coupon.code}
-            )
-    except Coupon.DoesNotExist:
+    check = next(iter(coupon_service.validate_codes([code], request.user, orders).values()), None)
+    if check is None:
         messages.error(request, _("Invalid coupon code."))
+    elif not check.valid:
+        messages.warning(request, check.error)
+    else:
+        checkout_service.apply_coupon(orders, check.coupon)
+        messages.success(
+            request,
+            _("Coupon '%(code)s' applied successfully.") % {"code": check.coupon.code}
+        )
+
+
+@require_POST
+@login_required
+def validate_coupons(request):
+    """
+    Kiểm tra nhiều mã coupon một lần cho các đơn pending của user (không ghi gì).
+    Nhận `codes` (lặp lại hoặc phân tách bằng dấu phẩy), trả về kết quả theo từng mã.
+    """
+    codes = [c for raw in request.POST.getlist("codes") for c in raw.split(",")]
+    if not codes:
+        return JsonResponse({"error": _("No coupon codes given.")}, status=400)
+    orders = list(checkout_service.pending_orders(request.user))
+    results = coupon_service.validate_codes(codes, request.user, orders)
+    data = {}
+    for code, check in results.items():
+        entry = {"valid": check.valid, "message": check.error}
+        if check.valid:
+            entry["order_id"] = check.order.id
+            entry["discount"] = pricing.order_totals(check.order.subtotal, check.coupon).discount
+        data[code] = entry
+    return JsonResponse({"results": data})
 
-def checkout(request, oid):
-    order = get_object_or_404(CartOrder, id=oid, user=request.user)
-    with transaction.atomic():
-      if order.coupon:
-        order.coupon = None
-        order.save()
-        messages.info(request,_("Cart changed. Coupon has been removed."))
-      # Xóa toàn bộ sản phẩm cũ của order (nếu có)
-      CartOrderProducts.objects.filter(order=order).delete()
-
-      # Tạo lại CartOrderProducts từ session
-      cart = request.session.get('cart_data_obj', {})
-      for pid, item in cart.items():
-          try:
-              product = Product.objects.get(pid=pid)
-              qty = int(item.get('qty', 1))
-              price = Decimal(str(item.get('price', 0)))
-              CartOrderProducts.objects.create(
-                  order=order,
-                  item=product.title,
-                  image=product.primary_image_url,
-                  qty=qty,
-                  price=price,
-                  total=qty * price
-              )
-          except Product.DoesNotExist:
-              messages.warning(request,("Some products in your cart are no longer available and have been removed."))
-              continue
-
-      # Tính toán giá
-      order_items = CartOrderProducts.objects.filter(order=order)
-      subtotal = sum([i.total for i in order_items])
-      tax = Decimal('0')
-      shipping = Decimal('0')
-      discount = Decimal('0')
-      total = subtotal
-      order.amount = total
-      order.save()
-      # Xử lý áp dụng coupon
-      if request.method == "POST" and "apply_coupon" in request.POST:
-          code = request.POST.get("code", "").strip()
-          try:
-              coupon = Coupon.objects.get(code__iexact=code, active=True)
-              apply_coupon_to_order(request, order, code, subtotal)
-          except Coupon.DoesNotExist:
-              messages.error(request,  _("Invalid coupon code."))
-
-      # Tính lại tổng nếu có coupon
-      if order.coupon:
-          coupon = order.coupon
-          discount = subtotal * Decimal(str(coupon.discount)) / Decimal('100')
-          if discount > coupon.max_discount_amount:
-              discount = coupon.max_discount_amount
-          total = subtotal - discount + tax + shipping
-          order.amount = total
-          order.save()
-    host = request.get_host()
+@login_required
+def checkout(request):
+    cart = cart_service.get_cart(request)
+    # Chỉ đọc: đơn được tạo ở proceed_to_checkout (POST). Giỏ đổi sau đó thì
+    # quay về trang giỏ để xác nhận lại thay vì tạo lại đơn trên GET.
+    orders = checkout_service.current_orders(request.user, cart)
+    if not orders:
+        messages.warning(request, _("Your cart has changed. Please review it before checking out."))
+        return redirect("core:cart")
+
+    # Xử lý áp dụng coupon
+    if request.method == "POST" and "apply_coupon" in request.POST:
+        apply_coupon_to_order(request, orders, request.POST.get("code", ""))
+
+    # Tổng tiền đã được pipeline pricing.order_totals lưu sẵn trên từng đơn
+    groups = [
+        {
+            "order": order,
+            "items": order.items,
+            "subtotal": order.subtotal,
+            "discount": order.discount,
+        }
+        for order in orders
+    ]
+    subtotal = sum((o.subtotal for o in orders), Decimal('0'))
+    discount = sum((o.discount for o in orders), Decimal('0'))
+    tax = sum((o.tax for o in orders), Decimal('0'))
+    shipping = sum((o.shipping for o in orders), Decimal('0'))
+    total = sum((o.amount for o in orders), Decimal('0'))
+
+    ref = orders[0].checkout_ref
     paypal_dict = {
         'business': settings.PAYPAL_RECEIVER_EMAIL,
-        'amount': subtotal,
-        'item_name': "Order-Item-No-" + str(order.id),
-        'invoice': "INVOICE_NO-3",
-        'currency_code': "USD",
-        'notify_url': 'http://{}/{}'.format(host, reverse("core:paypal-ipn")),
-        'return_url': 'http://{}/{}'.format(host, reverse("core:payment-completed")),
-        'cancel_url': 'http://{}/{}'.format(host, reverse("core:payment-failed")),
+        'amount': total,
+        'item_name': "Order-Item-No-" + ref,
+        # Invoice riêng cho từng lần checkout; IPN dùng nó để tìm lại các đơn
+        'invoice': payment_service.invoice_for(ref),
+        'currency_code': settings.PAYPAL_CURRENCY,
+        'notify_url': request.build_absolute_uri(reverse("core:paypal-ipn")),
+        'return_url': request.build_absolute_uri(reverse("core:payment-completed") + "?ref=" + ref),
+        'cancel_url': request.build_absolute_uri(reverse("core:payment-failed")),
     }
     paypal_payment_button = PayPalPaymentsForm(initial=paypal_dict)
 
     context = {
-      "order": order,
-      "order_items": order_items,
+      "orders": orders,
+      "groups": groups,
+      "checkout_ref": ref,
       "subtotal": subtotal,
       "tax": tax,
       "shipping": shipping,
@@ -470,16 +453,20 @@ def checkout(request, oid):
     return render(request, "core/checkout.html", context)
 
 @login_required
-def payment_completed_view(request, oid):
-    order = CartOrder.objects.get(oid=oid)
-
-    if order.paid_status == False:
-        order.paid_status = True
-        order.order_status = 'processing'
-        order.save()
+def payment_completed_view(request):
+    """
+    Trang PayPal redirect về sau khi thanh toán. Chỉ hiển thị trạng thái:
+    việc đánh dấu đã thanh toán do IPN (core.payments) thực hiện.
+    """
+    ref = request.GET.get("ref", "")
+    orders = list(CartOrder.objects.filter(user=request.user, checkout_ref=ref).order_by("id")) if ref else []
+    if not orders:
+        raise Http404
 
     context = {
-        "order": order,
+        "orders": orders,
+        "checkout_ref": ref,
+        "paid": all(order.paid_status for order in orders),
     }
     return render(request, 'core/payment-completed.html',  context)
 
@@ -541,7 +528,7 @@ def category_product_list_view(request, cid):
 def product_detail_view(request, pid):
     #product = Product.objects.get(pid = pid)
     # Lấy product theo pid, nếu không tìm thấy -> raise 404
-    product = get_object_or_404(Product, pid=pid)
+    product = get_object_or_404(with_tag_list(Product.objects.all()), pid=pid)
     related_products = Product.objects.filter(category=product.category).exclude(pid=pid)[:4]
     address = None
     if request.user.is_authenticated:
@@ -670,7 +657,7 @@ def vendor_detail_view(request, vid):
     if order == 'desc':
         sort_field = f'-{sort_field}'
 
-    products = products.order_by(sort_field)
+    products = with_tag_list(products.order_by(sort_field))
 
     categories = Category.objects.all()
 
@@ -701,7 +688,7 @@ def search_view(request):
             Q(title__icontains=query) | Q(description__icontains=query)
         ).order_by("-date")
     page_number = request.GET.get("page", DEFAULT_PAGE)
-    paginator = Paginator(products, PRODUCTS_PER_PAGE)
+    paginator = Paginator(with_tag_list(products), PRODUCTS_PER_PAGE)
     page_obj = paginator.get_page(page_number)
 
     context = {
@@ -730,93 +717,88 @@ def get_rating_counts(product):
 @login_required
 def cod_checkout(request):
     """
-    Người dùng chọn COD:
-    - Giữ amount đã tính sẵn trong order
+    Người dùng chọn COD cho toàn bộ các đơn (mỗi vendor một đơn) cùng checkout_ref:
+    - Giữ amount đã tính sẵn trong từng order
     - Đặt order_status='shipped'
     - paid_status=False (chưa thu tiền)
-    - Xoá giỏ trong session
+    - Xoá giỏ
     - Điều hướng sang trang chi tiết COD
     """
-    oid = request.POST.get("oid")
-    order = get_object_or_404(CartOrder, id=oid, user=request.user)
+    ref = request.POST.get("ref", "")
+    orders = list(checkout_service.pending_orders(request.user, ref).prefetch_related("order_products"))
 
     # Đảm bảo có item
-    if not order.order_products.exists():
+    if not ref or not orders or not all(order.order_products.all() for order in orders):
         messages.error(request, _("Your cart is empty or order has no items."))
         return redirect("core:cart")
 
-    # Nếu vì lý do gì đó amount chưa set, tính lại nhanh từ dòng hàng
-    if not order.amount or order.amount <= 0:
-        amt = order.order_products.aggregate(total=Sum('total'))['total'] or Decimal("0")
-        order.amount = amt.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-    for item in order.order_products.all():
-      try:
-          # Map từ tên sản phẩm (item) sang Product
-        product = Product.objects.get(title=item.item)
-      except Product.DoesNotExist:
-        continue  # bỏ qua nếu không tìm thấy
-
-      if product.stock_count is not None:
-          # stock_count nên là IntegerField, không phải CharField
-          current_stock = int(product.stock_count or 0)
-          new_stock = max(0, current_stock - item.qty)
-          product.stock_count = new_stock
-          if new_stock == 0:
-              product.in_stock = False
-              product.product_status = 'draft'
-          product.save(update_fields=["stock_count", "in_stock",'product_status'])
-
-    # Cập nhật trạng thái COD theo yêu cầu
-    order.paid_status = False
-    order.order_status = 'shipped'   # <-- theo yêu cầu
-    order.save(update_fields=["amount", "paid_status", "order_status"])
-
-    #Gửi email thông báo đặt hàng thành công
-    send_order_email(request.user, order)
-    
+    try:
+        with transaction.atomic():
+            # Ghi lượt dùng coupon trước; vượt giới hạn thì rollback toàn bộ
+            coupon_service.record_usage(request.user, orders)
+            _place_cod_orders(orders)
+            #Gửi email thông báo đặt hàng thành công (qua outbox, cùng transaction)
+            for order in orders:
+                send_order_email(request.user, order)
+    except coupon_service.CouponUsageError as exc:
+        order = next(o for o in orders if o.coupon_id == exc.coupon.id)
+        checkout_service.remove_coupon(order)
+        messages.warning(request, exc.message)
+        return redirect("core:checkout")
+
     # Xoá giỏ + dấu băng nếu có
-    request.session['cart_data_obj'] = {}
+    cart_service.clear_cart(cart_service.get_cart(request))
     request.session.pop('frozen_order_id', None)
-    request.session.modified = True
 
-    return redirect("core:cod-detail", oid=order.id)
+    return redirect("core:cod-detail", ref=ref)
+
+
+def _place_cod_orders(orders):
+    """Trừ tồn kho và chuyển các đơn sang trạng thái COD (shipped, chưa thanh toán)."""
+    # Nếu vì lý do gì đó tổng tiền chưa set, tính lại từ dòng hàng (1 aggregate)
+    unpriced = [o for o in orders if not o.amount or o.amount <= 0]
+    if unpriced:
+        pricing.reprice_orders(unpriced)
+    checkout_service.reserve_stock(orders)
+    for order in orders:
+        # Cập nhật trạng thái COD theo yêu cầu
+        order.paid_status = False
+        order.order_status = 'shipped'   # <-- theo yêu cầu
+        order.save(update_fields=["paid_status", "order_status"])
 
 
 @login_required
-def cod_detail(request, oid):
+def cod_detail(request, ref):
     """
-    Màn hình chi tiết đơn COD (hoá đơn rút gọn) + nút Accept
+    Màn hình chi tiết các đơn COD cùng checkout_ref (hoá đơn rút gọn) + nút Accept
     """
-    order = get_object_or_404(CartOrder, id=oid, user=request.user)
-    items = order.order_products.all()
-    order_items = CartOrderProducts.objects.filter(order=order)
-    subtotal = sum([i.total for i in order_items])
-    discount = Decimal('0.00')
-    if order.coupon:
-      coupon = order.coupon
-      discount = subtotal * Decimal(str(coupon.discount)) / Decimal('100')
-      if discount > coupon.max_discount_amount:
-        discount = coupon.max_discount_amount
+    orders = list(
+        CartOrder.objects.filter(user=request.user, checkout_ref=ref)
+        .select_related("vendor", "coupon").prefetch_related("order_products").order_by("id")
+    )
+    if not orders:
+        raise Http404
+    groups = [
+        {"order": order, "items": order.order_products.all(), "discount": order.discount}
+        for order in orders
+    ]
     return render(request, "core/cod_detail.html", {
-        "order": order,
-        "order_items": items,
-        "discount": discount,
+        "checkout_ref": ref,
+        "groups": groups,
+        "total": sum((o.amount for o in orders), Decimal('0')),
     })
 
 
 @require_POST
 @login_required
-def cod_accept(request, oid):
+def cod_accept(request, ref):
     """
-    Người dùng xác nhận đã nhận hàng (Accept):
-    - Đánh dấu order_status='completed'
-    - Tuỳ yêu cầu nghiệp vụ: coi như đã thu tiền -> paid_status=True
+    Người dùng xác nhận hoá đơn COD (Accept). Đơn đã được đặt (shipped, chưa thu
+    tiền) ở cod_checkout; từ đây trạng thái chỉ đổi qua core.order_status (vendor),
+    nên bước này không ghi gì.
     """
-    order = get_object_or_404(CartOrder, id=oid, user=request.user)
-
-    order.order_status = 'processing'
-    order.paid_status = False
-    order.save(update_fields=["order_status", "paid_status"])
+    if not CartOrder.objects.filter(user=request.user, checkout_ref=ref).exists():
+        raise Http404
 
     messages.success(request, _("Thanks! Your COD order is completed."))
     # Điều hướng đến trang lịch sử đơn hàng (đổi route cho phù hợp dự án của bạn)
@@ -844,6 +826,10 @@ def build_products_qs(request):
         qs = qs.filter(vendor_id__in=vendors)
 
     return qs.select_related("category", "vendor").order_by("-pid")
+
+def with_tag_list(qs):
+    """Prefetch tag của cả trang trong 1 query, gán vào `product.tag_list` (list thường)."""
+    return qs.prefetch_related(Prefetch("tags", to_attr="tag_list"))
 # --------------------------------
 def _get_int(request: HttpRequest, key: str, default: int, *, min_value: Optional[int]=None, max_value: Optional[int]=None) -> int:
     """Đọc param int an toàn từ query string: rỗng/sai -> default; kẹp min/max nếu có."""
@@ -887,8 +873,8 @@ def product_list_view(request):
     vendors_all = Vendor.objects.all().order_by("title")
     min_max_price = Product.objects.aggregate(Min("amount"), Max("amount"))
 
-    # 2) Lọc sản phẩm
-    qs = build_products_qs(request)
+    # 2) Lọc sản phẩm (prefetch tag chỉ cho trang hiện tại)
+    qs = with_tag_list(build_products_qs(request))
 
     # 3) Phân trang
     page_number, per_page = _get_pagination_params(request)
@@ -909,7 +895,7 @@ def product_list_view(request):
 
 def filter_product(request):
     # 1) Lọc sản phẩm dùng chung
-    qs = build_products_qs(request)
+    qs = with_tag_list(build_products_qs(request))
 
     # 2) Phân trang
     page_number, per_page = _get_pagination_params(request)
@@ -936,11 +922,17 @@ def tag_list(request, tag_slug=None):
     
     tag = None
     if tag_slug:
-        tag = get_object_or_404(Tag, slug=tag_slug)
-        products = products.filter(tags__in=[tag])
+        # slug chỉ unique phân biệt hoa thường: ưu tiên khớp chính xác, nếu không lấy tag cũ nhất
+        tag = (
+            Tag.objects.filter(slug=tag_slug).first()
+            or Tag.objects.filter(slug__iexact=tag_slug).order_by("id").first()
+        )
+        if tag is None:
+            raise Http404("Tag not found")
+        products = products.filter(tags=tag)
     
     context = {
-        "products": products,
+        "products": with_tag_list(products),
         "tag": tag,
     }
     
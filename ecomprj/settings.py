@@ -80,6 +80,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 'core.context_processor.wishlist_count',
+                'core.context_processor.cart_count',
             ],
         },
     },
@@ -102,6 +103,16 @@ DATABASES = {
     }
 }
 
+# Cache coupon/vendor (core.coupons, core.vendors) phải dùng chung giữa các worker để
+# xoá cache khi sửa có hiệu lực ngay; không cấu hình thì mỗi process có LocMemCache riêng
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -129,6 +140,13 @@ EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True').lower() in ('true', '1',
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL')
+# Validator kiểm tra email từ xa (dotted path, để trống = chỉ kiểm tra cục bộ)
+EMAIL_VALIDATOR = os.environ.get(
+    'EMAIL_VALIDATOR',
+    'utils.email_validation.AbstractApiValidator' if os.environ.get('ABSTRACT_API_KEY') else '',
+)
+# True: không gọi validator khi đăng ký, để lệnh verify_emails kiểm tra sau
+EMAIL_VALIDATION_DEFERRED = os.environ.get('EMAIL_VALIDATION_DEFERRED', 'False').lower() in ('true', '1', 't')
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -166,6 +184,8 @@ DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# File export chạy nền (core.exports) – không public, tải qua view có kiểm tra quyền
+EXPORT_ROOT = os.environ.get('EXPORT_ROOT', os.path.join(BASE_DIR, "exports"))
 TEMPLATES[0]['OPTIONS']['context_processors'] += [
     'django.template.context_processors.media',
 ]
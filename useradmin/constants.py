@@ -26,3 +26,19 @@ FORM_CHECK_INPUT_CLASS = 'form-check-input'
 
 DATETIME_LOCAL_TYPE = 'datetime-local'
 TEXT_TRANSFORM_UPPERCASE = 'text-transform: uppercase;'
+
+ORDER_PAGE_SIZES = (20, 30, 40)
+ORDER_KEYSET = ('-order_date', '-id')
+
+PRODUCT_PAGE_SIZES = (20, 50, 100)
+# Khoá sort trên URL -> cột (mỗi cột có index (vendor, cột, pid))
+PRODUCT_SORT_FIELDS = {
+    'title': 'title',
+    'amount': 'amount',
+    'date': 'date',
+    'discount': 'discount_percent',
+}
+PRODUCT_LIST_FIELDS = ('pid', 'vendor', 'title', 'amount', 'old_price', 'discount_percent', 'product_status', 'date')
+
+REVIEW_PAGE_SIZES = (20, 50, 100)
+REVIEW_KEYSET = ('-date', '-id')
@@ -2,7 +2,7 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from django.utils.translation import gettext as _
 from functools import wraps
-from core.models import Vendor
+from core.vendors import request_vendor
 
 def vendor_required(redirect_url="useradmin:dashboard"):
     def decorator(view_func):
@@ -19,13 +19,12 @@ def vendor_profile_required(redirect_url="useradmin:dashboard"):
     def decorator(view_func):
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
-            try:
-                vendor = Vendor.objects.get(user=request.user)
-                kwargs['vendor'] = vendor
-                return view_func(request, *args, **kwargs)
-            except Vendor.DoesNotExist:
+            vendor = request_vendor(request)
+            if vendor is None:
                 messages.warning(request, _("Bạn cần tạo hồ sơ vendor trước."))
                 return redirect(redirect_url)
+            kwargs['vendor'] = vendor
+            return view_func(request, *args, **kwargs)
         return _wrapped_view
     return decorator
 
@@ -36,15 +35,14 @@ def vendor_auth_required(redirect_to_create=False):
             if request.user.role != "vendor":
                 messages.error(request, _("Bạn cần có role vendor để truy cập tính năng này."))
                 return redirect("core:index")
-            
-            try:
-                vendor = Vendor.objects.get(user=request.user)
-                kwargs['vendor'] = vendor
-                return view_func(request, *args, **kwargs)
-            except Vendor.DoesNotExist:
+
+            vendor = request_vendor(request)
+            if vendor is None:
                 messages.warning(request, _("Bạn cần tạo hồ sơ vendor trước."))
                 if redirect_to_create:
                     return redirect("useradmin:create-vendor")
                 return redirect("useradmin:dashboard")
+            kwargs['vendor'] = vendor
+            return view_func(request, *args, **kwargs)
         return _wrapped_view
     return decorator
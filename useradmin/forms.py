@@ -1,3 +1,5 @@
+import copy
+
 from core.models import Product, Coupon
 from django import forms
 from decimal import Decimal
@@ -154,6 +156,46 @@ class AddProductForm(forms.ModelForm):
             raise forms.ValidationError(_("Manufacture date cannot be in the future"))
         return mfd
 
+class ProductImportForm(forms.Form):
+    """Một dòng import: cùng field và rule với AddProductForm nhưng không query DB mỗi dòng.
+
+    `categories` là dict {cid hoặc tên danh mục viết thường: Category} đã tải sẵn.
+    """
+    EXCLUDED_FIELDS = ('image', 'category')
+    model_fields = {f.name: f for f in Product._meta.concrete_fields}
+
+    clean_amount = AddProductForm.clean_amount
+    clean_stock_count = AddProductForm.clean_stock_count
+    clean_old_price = AddProductForm.clean_old_price
+    clean_life = AddProductForm.clean_life
+    clean_mfd = AddProductForm.clean_mfd
+
+    def __init__(self, data, categories):
+        super().__init__(data)
+        self.categories = categories
+        for name, field in AddProductForm.base_fields.items():
+            if name not in self.EXCLUDED_FIELDS:
+                self.fields[name] = copy.deepcopy(field)
+                # Form thường không chạy validate của model (max_length, max_digits...) như ModelForm
+                model_field = self.model_fields.get(name)
+                if model_field is not None:
+                    self.fields[name].validators.extend(model_field.validators)
+        self.fields['category'] = forms.CharField(required=False)
+        self.fields['image_url'] = forms.URLField(required=False)
+
+    def clean_category(self):
+        value = (self.cleaned_data.get('category') or '').strip()
+        if not value:
+            return None
+        category = self.categories.get(value) or self.categories.get(value.lower())
+        if category is None:
+            raise forms.ValidationError(_("Unknown category: %(value)s") % {'value': value})
+        return category
+
+    def clean_tags(self):
+        tags = self.cleaned_data.get('tags') or ''
+        return list(dict.fromkeys(t.strip() for t in tags.split(',') if t.strip()))
+
 class CouponForm(forms.ModelForm):
     class Meta:
         model = Coupon
@@ -0,0 +1,127 @@
+"""Thao tác hàng loạt trên product của vendor.
+
+Mỗi thao tác là một câu `UPDATE product SET ... WHERE pid IN (...) AND
+vendor_id = ...`; điều kiện trạng thái (chỉ publish sản phẩm có giá và tồn
+kho, chỉ restore sản phẩm đã xoá...) nằm trong WHERE nên không cần đọc từng
+product. queryset.update() không gọi save() và không phát signal, vì vậy khi
+đổi giá phải tự tính lại discount_percent trong cùng câu UPDATE và xoá cache
+giá (pricing.invalidate).
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, IntegerField, Value
+from django.db.models.functions import Cast, Greatest, Round
+from django.utils import timezone
+
+from core import pricing
+from core.constants import (
+    BULK_ADJUST_PERCENT_MAX,
+    BULK_ADJUST_PERCENT_MIN,
+    MAX_DIGITS_AMOUNT,
+    PRODUCT_STATUS_DELETED,
+    PRODUCT_STATUS_DRAFT,
+    PRODUCT_STATUS_PUBLISHED,
+)
+from core.models import Product
+
+PRICE_ACTIONS = ("adjust_price",)
+PERCENT_ACTIONS = ("adjust_price", "adjust_stock")
+MIN_PRICE = Decimal("0.01")
+# Giá lớn nhất lưu được trong Product.amount (max_digits=MAX_DIGITS_AMOUNT, 2 chữ số thập phân)
+MAX_PRICE = Decimal(10) ** (MAX_DIGITS_AMOUNT - 2) - MIN_PRICE
+
+
+class BulkActionError(ValueError):
+    """Thao tác hoặc tham số không hợp lệ."""
+
+
+def _publish(products, percent):
+    return products.filter(amount__gt=0, stock_count__gt=0).exclude(
+        product_status__in=[PRODUCT_STATUS_DELETED, PRODUCT_STATUS_PUBLISHED]
+    ).update(status=True, in_stock=True, product_status=PRODUCT_STATUS_PUBLISHED, updated=timezone.now())
+
+
+def _unpublish(products, percent):
+    return products.filter(product_status=PRODUCT_STATUS_PUBLISHED).update(
+        status=False, in_stock=False, product_status=PRODUCT_STATUS_DRAFT, updated=timezone.now()
+    )
+
+
+def _delete(products, percent):
+    return products.exclude(product_status=PRODUCT_STATUS_DELETED).update(
+        status=False, in_stock=False, product_status=PRODUCT_STATUS_DELETED, updated=timezone.now()
+    )
+
+
+def _restore(products, percent):
+    # Giống restore_product: khôi phục thành draft
+    return products.filter(product_status=PRODUCT_STATUS_DELETED).update(
+        status=False, in_stock=False, product_status=PRODUCT_STATUS_DRAFT, updated=timezone.now()
+    )
+
+
+def _factor(percent):
+    return Value((Decimal(100) + percent) / Decimal(100))
+
+
+def _adjust_price(products, percent):
+    new_amount = Round(F("amount") * _factor(percent), 2)
+    # Giá mới vượt max_digits thì từ chối cả thao tác thay vì để UPDATE lỗi/tràn số
+    products = products.alias(new_amount=new_amount)
+    too_high = products.filter(new_amount__gt=MAX_PRICE).count()
+    if too_high:
+        raise BulkActionError(f"{too_high} products would exceed the maximum price of {MAX_PRICE}")
+    amount = Cast(
+        Greatest(new_amount, Value(MIN_PRICE)),
+        DecimalField(max_digits=MAX_DIGITS_AMOUNT, decimal_places=2),
+    )
+    # Điều kiện lặp lại trong WHERE để giá đổi giữa lúc kiểm tra và lúc UPDATE không tràn
+    return products.filter(new_amount__lte=MAX_PRICE).update(
+        amount=amount,
+        discount_percent=Product.discount_percent_expression(amount=amount),
+        updated=timezone.now(),
+    )
+
+
+def _adjust_stock(products, percent):
+    return products.update(
+        stock_count=Cast(Greatest(Round(F("stock_count") * _factor(percent)), Value(0)), IntegerField()),
+        updated=timezone.now(),
+    )
+
+
+ACTIONS = {
+    "publish": _publish,
+    "unpublish": _unpublish,
+    "delete": _delete,
+    "restore": _restore,
+    "adjust_price": _adjust_price,
+    "adjust_stock": _adjust_stock,
+}
+
+
+def parse_percent(value):
+    try:
+        percent = Decimal(str(value))
+    except (ArithmeticError, ValueError, TypeError):
+        raise BulkActionError("percent must be a number")
+    if not percent.is_finite() or not BULK_ADJUST_PERCENT_MIN <= percent <= BULK_ADJUST_PERCENT_MAX:
+        raise BulkActionError(
+            f"percent must be between {BULK_ADJUST_PERCENT_MIN} and {BULK_ADJUST_PERCENT_MAX}"
+        )
+    return percent
+
+
+def apply(vendor, action, pids, percent=None):
+    """Áp dụng `action` cho các product `pids` của vendor. Trả về số product đã cập nhật."""
+    if action not in ACTIONS:
+        raise BulkActionError(f"unknown action: {action}")
+    if action in PERCENT_ACTIONS:
+        percent = parse_percent(percent)
+    pids = list(dict.fromkeys(pids))
+    if not pids:
+        return 0
+    updated = ACTIONS[action](Product.objects.filter(vendor=vendor, pid__in=pids), percent)
+    if action in PRICE_ACTIONS:
+        pricing.invalidate(pids)
+    return updated
@@ -0,0 +1,205 @@
+"""Import product hàng loạt từ CSV/JSON cho một vendor.
+
+Các dòng được xử lý theo lô IMPORT_BATCH_SIZE: validate bằng ProductImportForm
+(cùng rule với AddProductForm, không query mỗi dòng), ghi bằng một
+`bulk_create`, gắn tag bằng bulk_create trên bảng product_tag và đưa ảnh
+(`image_url`) vào hàng đợi ProductImageImport để worker `ingest_product_images`
+tải sau. Dòng lỗi không chặn các dòng khác; lỗi được báo theo số dòng. File hỏng
+giữa chừng (ImportFileError) không rollback các lô đã ghi: lỗi mang theo kết quả
+của các dòng trước đó để báo lại cho vendor.
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import shortuuid
+from django.db import transaction
+from django.utils.text import slugify
+from django.utils.translation import gettext as _
+from taggit.models import Tag
+
+from core.constants import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_MAX_REPORTED_ERRORS,
+    PRODUCT_STATUS_DRAFT,
+    PRODUCT_STATUS_PUBLISHED,
+)
+from core.models import Category, Product, ProductImageImport, ProductTag
+from useradmin.forms import ProductImportForm
+
+PRODUCT_FIELDS = (
+    'title', 'description', 'amount', 'old_price', 'specifications', 'type',
+    'stock_count', 'life', 'mfd', 'digital', 'category',
+)
+SKU_PREFIX = "sku"
+SKU_LENGTH = 7
+
+
+class ImportFileError(ValueError):
+    """File import không đọc được (sai định dạng, sai encoding...).
+
+    Lỗi giữa file: `result` là ImportResult của các dòng trước chỗ lỗi, đã được ghi vào DB.
+    """
+    result = None
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    failed: int = 0
+    images_queued: int = 0
+    # [(số dòng, {field: [lỗi]})], tối đa IMPORT_MAX_REPORTED_ERRORS phần tử
+    errors: List[Tuple[int, Dict[str, List[str]]]] = field(default_factory=list)
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, errors))
+
+
+def read_rows(uploaded, file_format=None):
+    """Các dòng (dict) của file CSV (có header) hoặc JSON (danh sách object).
+
+    Đọc lần lượt từng dòng; raise ImportFileError khi file không đọc được.
+    """
+    name = getattr(uploaded, 'name', '') or ''
+    file_format = file_format or ('json' if name.lower().endswith('.json') else 'csv')
+    if file_format not in ('csv', 'json'):
+        raise ImportFileError(_("Unsupported import format."))
+    text = io.TextIOWrapper(uploaded, encoding='utf-8-sig', newline='')
+    try:
+        if file_format == 'json':
+            data = json.load(text)
+            if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+                raise ImportFileError(_("JSON import must be a list of objects."))
+            for row in data:
+                yield _normalize_json_row(row)
+        else:
+            yield from csv.DictReader(text)
+    except (UnicodeDecodeError, csv.Error, json.JSONDecodeError) as e:
+        raise ImportFileError(str(e)) from e
+
+
+def _normalize_json_row(row):
+    # JSON có thể cho tags dạng list; form nhận chuỗi phân cách bằng dấu phẩy như form thêm product
+    tags = row.get('tags')
+    if isinstance(tags, list):
+        row = {**row, 'tags': ','.join(str(tag) for tag in tags)}
+    return row
+
+
+def load_categories():
+    """{cid: Category, tên viết thường: Category} (1 query cho cả lần import)."""
+    categories = {}
+    for category in Category.objects.all():
+        categories.setdefault(category.title.strip().lower(), category)
+        categories[category.cid] = category
+    return categories
+
+
+def _unique_skus(count):
+    """`count` sku chưa có trong DB (1 query mỗi vòng, thường chỉ 1 vòng)."""
+    skus = set()
+    while len(skus) < count:
+        candidates = {
+            SKU_PREFIX + shortuuid.ShortUUID(alphabet="1234567890").random(length=SKU_LENGTH)
+            for _ in range(count - len(skus))
+        } - skus
+        taken = set(Product.objects.filter(sku__in=candidates).values_list('sku', flat=True))
+        skus |= candidates - taken
+    return list(skus)
+
+
+def attach_tags(tag_names_by_pid):
+    """Gắn tag cho nhiều product: tạo tag thiếu và các dòng product_tag bằng bulk_create."""
+    names = {name for names in tag_names_by_pid.values() for name in names}
+    if not names:
+        return
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = names - tags.keys()
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slugify(name, allow_unicode=True) or name) for name in missing],
+            ignore_conflicts=True,
+        )
+        tags.update((tag.name, tag) for tag in Tag.objects.filter(name__in=missing))
+        # Trùng slug với tag khác tên: để taggit tự sinh slug riêng
+        for name in missing - tags.keys():
+            tags[name] = Tag.objects.get_or_create(name=name)[0]
+    ProductTag.objects.bulk_create(
+        [
+            ProductTag(content_object_id=pid, tag_id=tags[name].pk)
+            for pid, names in tag_names_by_pid.items()
+            for name in names
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _build_product(vendor, cleaned, publish):
+    product = Product(vendor=vendor, **{name: cleaned.get(name) for name in PRODUCT_FIELDS})
+    # Cùng quy tắc publish với add_product
+    if publish and product.amount > 0 and product.stock_count > 0:
+        product.status = True
+        product.in_stock = True
+        product.product_status = PRODUCT_STATUS_PUBLISHED
+    else:
+        product.status = False
+        product.in_stock = False
+        product.product_status = PRODUCT_STATUS_DRAFT
+    product.digital = bool(product.digital)
+    # bulk_create không gọi save()
+    product.discount_percent = Product.compute_discount_percent(product.amount, product.old_price)
+    return product
+
+
+def _import_batch(vendor, batch, categories, publish, result):
+    products = []
+    tags = {}
+    images = []
+    for row_number, row in batch:
+        form = ProductImportForm(row, categories)
+        if not form.is_valid():
+            result.add_error(row_number, {name: list(errors) for name, errors in form.errors.items()})
+            continue
+        product = _build_product(vendor, form.cleaned_data, publish)
+        products.append(product)
+        tags[product.pid] = form.cleaned_data['tags']
+        if form.cleaned_data.get('image_url'):
+            images.append(ProductImageImport(product=product, url=form.cleaned_data['image_url']))
+    if not products:
+        return
+
+    for product, sku in zip(products, _unique_skus(len(products))):
+        product.sku = sku
+    with transaction.atomic():
+        Product.objects.bulk_create(products)
+        attach_tags(tags)
+        ProductImageImport.objects.bulk_create(images)
+    result.created += len(products)
+    result.images_queued += len(images)
+
+
+def import_products(vendor, rows, publish=False, batch_size=IMPORT_BATCH_SIZE):
+    """Import các dòng (dict) thành product của vendor. Trả về ImportResult."""
+    result = ImportResult()
+    categories = load_categories()
+    batch = []
+    try:
+        for row_number, row in enumerate(rows, start=1):
+            batch.append((row_number, row))
+            if len(batch) >= batch_size:
+                _import_batch(vendor, batch, categories, publish, result)
+                batch = []
+    except ImportFileError as e:
+        # Các lô trước đã commit: ghi nốt các dòng đã đọc để "mọi dòng trước chỗ lỗi
+        # đã được xử lý", rồi báo kết quả đó kèm lỗi
+        if batch:
+            _import_batch(vendor, batch, categories, publish, result)
+        e.result = result
+        raise
+    if batch:
+        _import_batch(vendor, batch, categories, publish, result)
+    return result
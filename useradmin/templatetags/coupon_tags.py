@@ -1,41 +1,31 @@
 from django import template
 from django.utils import timezone
-from django.utils.translation import gettext as _
+from django.utils.translation import gettext as _, gettext_lazy
 from datetime import datetime, date
 
+from core.constants import COUPON_STATUS_ACTIVE, COUPON_STATUS_EXPIRED, COUPON_STATUS_INACTIVE
+
 register = template.Library()
 
+STATUS_BADGES = {
+    COUPON_STATUS_ACTIVE: (gettext_lazy('Active'), 'bg-success'),
+    COUPON_STATUS_INACTIVE: (gettext_lazy('Inactive'), 'bg-secondary'),
+    COUPON_STATUS_EXPIRED: (gettext_lazy('Expired'), 'bg-danger'),
+}
+STATUS_CLASSES = {
+    COUPON_STATUS_ACTIVE: 'text-success',
+    COUPON_STATUS_INACTIVE: 'text-secondary',
+    COUPON_STATUS_EXPIRED: 'text-danger',
+}
+
 @register.inclusion_tag('useradmin/components/coupon_status_badge.html')
 def coupon_status_badge(coupon):
     """
-    Hiển thị badge trạng thái của coupon
+    Hiển thị badge trạng thái của coupon (đọc coupon.status đã lưu sẵn)
     """
-    now = timezone.now()
-    
-    # Normalize expiry_date để so sánh
-    if isinstance(coupon.expiry_date, datetime):
-        expiry_datetime = coupon.expiry_date
-    else:
-        # Nếu là date, convert thành datetime với timezone
-        expiry_datetime = timezone.make_aware(
-            datetime.combine(coupon.expiry_date, datetime.min.time())
-        )
-    
-    if coupon.active and expiry_datetime > now:
-        status = 'active'
-        status_text = _('Active')
-        badge_class = 'bg-success'
-    elif not coupon.active:
-        status = 'inactive'
-        status_text = _('Inactive')
-        badge_class = 'bg-secondary'
-    else:
-        status = 'expired'
-        status_text = _('Expired')
-        badge_class = 'bg-danger'
-    
+    status_text, badge_class = STATUS_BADGES[coupon.status]
     return {
-        'status': status,
+        'status': coupon.status,
         'status_text': status_text,
         'badge_class': badge_class,
         'coupon': coupon
@@ -128,80 +118,23 @@ def coupon_usage_count(coupon):
 @register.filter
 def is_coupon_expired(coupon):
     """
-    Kiểm tra xem coupon đã hết hạn chưa
-    SỬA LỖI: Handle cả datetime và date
+    Kiểm tra xem coupon đã hết hạn chưa (status do lệnh expire_coupons cập nhật)
     """
-    now = timezone.now()
-    
-    # Normalize expiry_date để so sánh
-    if isinstance(coupon.expiry_date, datetime):
-        # Nếu là datetime
-        if timezone.is_naive(coupon.expiry_date):
-            # Nếu datetime naive, make it aware
-            expiry_datetime = timezone.make_aware(coupon.expiry_date)
-        else:
-            # Nếu datetime đã có timezone
-            expiry_datetime = coupon.expiry_date
-    elif isinstance(coupon.expiry_date, date):
-        # Nếu là date, convert thành datetime cuối ngày
-        expiry_datetime = timezone.make_aware(
-            datetime.combine(coupon.expiry_date, datetime.max.time())
-        )
-    else:
-        # Fallback: không thể xác định type
-        return False
-    
-    return expiry_datetime <= now
+    return coupon.status == COUPON_STATUS_EXPIRED
 
 @register.filter
 def coupon_status_class(coupon):
     """
     Trả về CSS class cho status coupon
     """
-    now = timezone.now()
-    
-    # Normalize expiry_date để so sánh
-    if isinstance(coupon.expiry_date, datetime):
-        if timezone.is_naive(coupon.expiry_date):
-            expiry_datetime = timezone.make_aware(coupon.expiry_date)
-        else:
-            expiry_datetime = coupon.expiry_date
-    elif isinstance(coupon.expiry_date, date):
-        expiry_datetime = timezone.make_aware(
-            datetime.combine(coupon.expiry_date, datetime.max.time())
-        )
-    else:
-        return 'text-secondary'
-    
-    if coupon.active and expiry_datetime > now:
-        return 'text-success'
-    elif not coupon.active:
-        return 'text-secondary'
-    else:
-        return 'text-danger'
+    return STATUS_CLASSES.get(coupon.status, 'text-secondary')
 
 @register.filter
 def days_until_expiry(coupon):
     """
     Trả về số ngày còn lại đến khi hết hạn
     """
-    now = timezone.now()
-    
-    # Normalize expiry_date
-    if isinstance(coupon.expiry_date, datetime):
-        if timezone.is_naive(coupon.expiry_date):
-            expiry_datetime = timezone.make_aware(coupon.expiry_date)
-        else:
-            expiry_datetime = coupon.expiry_date
-    elif isinstance(coupon.expiry_date, date):
-        expiry_datetime = timezone.make_aware(
-            datetime.combine(coupon.expiry_date, datetime.max.time())
-        )
-    else:
-        return 0
-    
-    delta = expiry_datetime - now
-    return delta.days
+    return (coupon.expiry_date - timezone.now()).days
 
 @register.filter
 def format_expiry_date(coupon):
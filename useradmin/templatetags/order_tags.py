@@ -1,19 +1,18 @@
 from django import template
 from django.utils.translation import gettext as _
 
+from core.constants import ORDER_STATUS_CHOICES
+from core.order_status import allowed_targets
+
 register = template.Library()
 
 @register.inclusion_tag('useradmin/components/order_status_select.html')
 def order_status_select(order):
-    """Render order status selection dropdown"""
+    """Render order status selection dropdown (chỉ các trạng thái được phép chuyển tới)"""
+    targets = allowed_targets(order.order_status)
     return {
         'order': order,
-        'status_choices': [
-            ('pending', _('Pending')),
-            ('processing', _('Processing')),
-            ('shipped', _('Shipped')),
-            ('delivered', _('Delivered')),
-        ]
+        'status_choices': [(value, _(label)) for value, label in ORDER_STATUS_CHOICES if value in targets],
     }
 
 @register.inclusion_tag('useradmin/components/order_info_card.html', takes_context=True)
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Coupon
+from core.tests.test_analytics import AnalyticsBaseTestCase
+
+
+class CouponListTest(AnalyticsBaseTestCase):
+    """Trang coupon đọc bộ đếm lưu sẵn, tìm theo tiền tố mã"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.seller)
+        self.url = reverse("useradmin:coupons")
+
+    def coupon(self, code, vendor=None, **fields):
+        fields.setdefault("expiry_date", timezone.now() + timedelta(days=1))
+        return Coupon.objects.create(
+            vendor=vendor or self.vendor, code=code, discount=10,
+            min_order_amount=Decimal("0"), max_discount_amount=Decimal("10"), **fields,
+        )
+
+    def codes(self, **params):
+        return [c.code for c in self.client.get(self.url, params).context["coupons"]]
+
+    def test_search_matches_code_prefix_only(self):
+        self.coupon("SUMMER10")
+        self.coupon("SUMMER20")
+        self.coupon("WINTERSUM")
+        self.coupon("SUMMEROTHER", vendor=self.other_vendor)
+
+        self.assertEqual(self.codes(search="summer"), ["SUMMER20", "SUMMER10"])
+        self.assertEqual(self.codes(search="10"), [])
+
+    def test_used_inactive_coupons_are_hidden_unless_requested(self):
+        self.coupon("LIVE", usage_count=2, orders_count=3)
+        self.coupon("RETIRED", active=False, orders_count=1)
+        self.coupon("PAUSED", active=False)
+
+        self.assertEqual(self.codes(), ["PAUSED", "LIVE"])
+        self.assertEqual(self.codes(show_deleted="true", status="deleted"), ["RETIRED"])
+        live = self.client.get(self.url).context["coupons"][1]
+        self.assertEqual((live.usage_count, live.orders_count), (2, 3))
+
+    def test_status_filter_and_badge_read_stored_status(self):
+        self.coupon("LIVE")
+        self.coupon("OLD", expiry_date=timezone.now() - timedelta(days=1))
+        self.coupon("OFF", active=False)
+
+        self.assertEqual(self.codes(status="expired"), ["OLD"])
+        self.assertEqual(self.codes(status="active"), ["LIVE"])
+        self.assertEqual(self.codes(status="inactive"), ["OFF"])
+        self.assertContains(self.client.get(self.url, {"status": "expired"}), "bg-danger")
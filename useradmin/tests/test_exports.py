@@ -0,0 +1,103 @@
+import csv
+import io
+import shutil
+import tempfile
+from importlib.util import find_spec
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from core.constants import JOB_STATUS_DONE
+from core.models import CartOrderProducts, ExportJob, OutboxEmail, Product
+from core.tests.test_analytics import AnalyticsBaseTestCase
+
+
+class VendorExportTest(AnalyticsBaseTestCase):
+    """Export CSV/XLSX stream và export chạy nền"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.seller)
+        for i in range(3):
+            order = self.order("10.00")
+            CartOrderProducts.objects.create(order=order, item=f"Item {i}", image="", qty=1, price=10, total=10)
+        self.order("99.00", status="pending")
+        self.order("50.00", vendor=self.other_vendor)
+        Product.objects.create(title="Mine", vendor=self.vendor, amount=5)
+        Product.objects.create(title="Theirs", vendor=self.other_vendor, amount=5)
+        self.export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_root)
+
+    def read_csv(self, response):
+        content = b"".join(response.streaming_content).decode()
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_orders_csv_is_streamed_and_scoped(self):
+        response = self.client.get(reverse("useradmin:export", args=["orders"]))
+
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][0], "Order ID")
+        self.assertEqual(len(rows), 4)
+
+    def test_items_and_products_csv(self):
+        items = self.read_csv(self.client.get(reverse("useradmin:export", args=["order_items"])))
+        products = self.read_csv(self.client.get(reverse("useradmin:export", args=["products"])))
+
+        self.assertEqual([row[2] for row in items[1:]], ["Item 0", "Item 1", "Item 2"])
+        self.assertEqual([row[1] for row in products[1:]], ["Mine"])
+
+    def test_unknown_kind_or_format(self):
+        self.assertEqual(self.client.get(reverse("useradmin:export", args=["users"])).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse("useradmin:export", args=["orders"]), {"format": "pdf"}).status_code, 400
+        )
+
+    def test_xlsx_is_hidden_and_rejected_without_openpyxl(self):
+        with mock.patch("core.exports.find_spec", return_value=None):
+            response = self.client.get(reverse("useradmin:export", args=["orders"]), {"format": "xlsx"})
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post(reverse("useradmin:export", args=["products"]), {"format": "xlsx"})
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(ExportJob.objects.exists())
+
+            page = self.client.get(reverse("useradmin:orders"))
+            self.assertNotContains(page, "format=xlsx")
+            self.assertContains(page, 'name="format" value="csv"')
+
+    @skipUnless(find_spec("openpyxl"), "openpyxl is not installed")
+    def test_orders_xlsx(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get(reverse("useradmin:export", args=["orders"]), {"format": "xlsx"})
+
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(workbook.active.max_row, 4)
+
+    def test_background_export_writes_file_and_notifies(self):
+        with override_settings(EXPORT_ROOT=self.export_root):
+            response = self.client.post(reverse("useradmin:export", args=["orders"]), {"format": "csv"})
+            self.assertRedirects(response, reverse("useradmin:orders"), fetch_redirect_response=False)
+
+            call_command("run_exports", stdout=StringIO())
+
+        job = ExportJob.objects.get()
+        self.assertEqual((job.status, job.rows), (JOB_STATUS_DONE, 3))
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, [self.seller.email])
+        self.assertIn(job.download_url, email.body)
+
+        download = self.client.get(reverse("useradmin:export-download", args=[job.id]))
+        self.assertEqual(b"".join(download.streaming_content).decode().count("\n"), 4)
+
+    def test_download_is_limited_to_owner(self):
+        job = ExportJob.objects.create(
+            vendor=self.other_vendor, user=self.other_vendor.user, kind="orders", file_format="csv",
+            status=JOB_STATUS_DONE, file_path=__file__,
+        )
+
+        self.assertEqual(self.client.get(reverse("useradmin:export-download", args=[job.id])).status_code, 404)
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import CartOrder
+from core.tests.test_analytics import AnalyticsBaseTestCase
+from utils.pagination import encode_cursor
+
+
+class VendorOrderListTest(AnalyticsBaseTestCase):
+    """Danh sách đơn của vendor: phân trang keyset, lọc trạng thái/thanh toán, JSON"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.seller)
+        now = timezone.now()
+        # 5 đơn cùng thời điểm để kiểm tra keyset phân biệt bằng id
+        self.orders = [self.order("10.00", now) for _ in range(5)]
+        self.orders += [self.order("20.00", now - timedelta(days=i + 1), status="shipped", paid=True) for i in range(20)]
+        self.order("99.00", now, status="pending")
+        self.order("99.00", now, vendor=self.other_vendor)
+        self.url = reverse("useradmin:orders")
+
+    def fetch(self, **params):
+        return self.client.get(self.url, {"format": "json", **params}).json()
+
+    def test_pages_cover_all_orders_once_in_order(self):
+        seen = []
+        data = self.fetch()
+        while True:
+            seen += [o["id"] for o in data["orders"]]
+            if not data["next"]:
+                break
+            data = self.fetch(after=data["next"])
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        self.assertEqual(seen[:5], sorted([o.pk for o in self.orders[:5]], reverse=True))
+
+    def test_previous_cursor_returns_previous_page(self):
+        first = self.fetch()
+        second = self.fetch(after=first["next"])
+
+        back = self.fetch(before=second["previous"])
+
+        self.assertEqual([o["id"] for o in back["orders"]], [o["id"] for o in first["orders"]])
+        self.assertIsNone(back["previous"])
+
+    def test_filters(self):
+        self.assertEqual(len(self.fetch(status="processing", per_page=40)["orders"]), 5)
+        self.assertEqual(len(self.fetch(paid="1", per_page=40)["orders"]), 20)
+        self.assertEqual(self.fetch(status="pending", per_page=40)["orders"], [])
+        self.assertEqual(self.fetch(status="bogus", per_page=40)["orders"], [])
+
+    def test_invalid_cursor_restarts_from_first_page(self):
+        self.assertEqual(self.fetch(after="not-a-cursor")["orders"], self.fetch()["orders"])
+
+    def test_wrong_typed_cursor_restarts_from_first_page(self):
+        first = self.fetch()["orders"]
+        for values in (["x", "y"], [None, 1], [timezone.now(), "y"], [1], [[1], {}]):
+            with self.subTest(values=values):
+                for key in ("after", "before"):
+                    response = self.client.get(self.url, {"format": "json", key: encode_cursor(values)})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.json()["orders"], first)
+
+    def test_html_page_is_limited(self):
+        response = self.client.get(self.url, {"paid": "0"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["orders"]), 5)
+        self.assertFalse(response.context["page"].has_next)
+        self.assertIn("paid=0", response.context["filter_query"])
+
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context["orders"]), 20)
+        self.assertTrue(response.context["page"].has_next)
+
+
+class OrderStatusViewTest(AnalyticsBaseTestCase):
+    """Đổi trạng thái đơn từ dashboard: chỉ POST, theo máy trạng thái, chỉ đơn của vendor"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.seller)
+
+    def status_of(self, order):
+        return CartOrder.objects.get(pk=order.pk).order_status
+
+    def test_change_status_follows_transitions(self):
+        order = self.order("10.00")
+        url = reverse("useradmin:change_order_status", args=[order.id])
+
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.client.post(url, {"status": "delivered"})
+        self.client.post(url, {"status": "shipped"})
+
+        self.assertEqual(self.status_of(order), "delivered")
+        self.assertEqual(order.status_history.count(), 1)
+
+    def test_pending_checkout_cannot_be_moved(self):
+        draft = self.order("10.00", status="pending")
+
+        self.client.post(reverse("useradmin:change_order_status", args=[draft.id]), {"status": "shipped"})
+        response = self.client.post(reverse("useradmin:bulk-order-status"), {"status": "cancelled", "ids": [draft.id]},
+                                    headers={"x-requested-with": "XMLHttpRequest"})
+
+        self.assertEqual(response.json()["updated"], [])
+        self.assertEqual(self.status_of(draft), "pending")
+
+    def test_detail_offers_only_allowed_targets(self):
+        order = self.order("10.00", status="shipped")
+
+        response = self.client.get(reverse("useradmin:order_detail", args=[order.id]))
+
+        self.assertEqual([value for value, _ in response.context["status_choices"]], ["delivered", "cancelled"])
+        self.assertContains(response, 'value="delivered"')
+        self.assertNotContains(response, 'value="processing"')
+
+    def test_cannot_change_other_vendors_order(self):
+        theirs = self.order("10.00", vendor=self.other_vendor)
+
+        self.client.post(reverse("useradmin:change_order_status", args=[theirs.id]), {"status": "shipped"})
+
+        self.assertEqual(self.status_of(theirs), "processing")
+
+    def test_bulk_status(self):
+        a, b = self.order("10.00"), self.order("10.00", status="delivered")
+        theirs = self.order("10.00", vendor=self.other_vendor)
+        url = reverse("useradmin:bulk-order-status")
+
+        response = self.client.post(url, {"status": "shipped", "ids": [a.id, b.id, theirs.id]},
+                                    headers={"x-requested-with": "XMLHttpRequest"})
+
+        self.assertEqual(response.json()["updated"], [a.id])
+        self.assertEqual([self.status_of(o) for o in (a, b, theirs)], ["shipped", "delivered", "processing"])
+        response = self.client.post(url, {"status": "pending", "ids": [a.id]},
+                                    headers={"x-requested-with": "XMLHttpRequest"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, {"status": "delivered", "ids": [a.id]})
+        self.assertRedirects(response, reverse("useradmin:orders"), fetch_redirect_response=False)
+        self.assertEqual(self.status_of(a), "delivered")
@@ -0,0 +1,114 @@
+from decimal import Decimal
+
+from django.urls import reverse
+
+from core import pricing
+from core.constants import PRODUCT_STATUS_DELETED, PRODUCT_STATUS_DRAFT, PRODUCT_STATUS_PUBLISHED
+from core.models import Product
+from core.tests.test_analytics import AnalyticsBaseTestCase
+from useradmin import product_actions
+from useradmin.product_actions import BulkActionError
+
+
+class ProductActionsTest(AnalyticsBaseTestCase):
+    """Thao tác hàng loạt trên product bằng một câu UPDATE"""
+
+    def setUp(self):
+        super().setUp()
+        pricing.invalidate()
+        self.skus = iter(range(1000, 2000))
+
+    def product(self, amount="10.00", stock=5, status=PRODUCT_STATUS_DRAFT, vendor=None):
+        return Product.objects.create(
+            title="P", vendor=vendor or self.vendor, amount=Decimal(amount), stock_count=stock,
+            product_status=status, sku=f"sku{next(self.skus)}",
+        )
+
+    def statuses(self, *products):
+        return [Product.objects.get(pk=p.pk).product_status for p in products]
+
+    def test_publish_skips_products_without_price_or_stock(self):
+        ok, empty, deleted = self.product(), self.product(stock=0), self.product(status=PRODUCT_STATUS_DELETED)
+
+        with self.assertNumQueries(1):
+            updated = product_actions.apply(self.vendor, "publish", [ok.pid, empty.pid, deleted.pid])
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(self.statuses(ok, empty, deleted),
+                         [PRODUCT_STATUS_PUBLISHED, PRODUCT_STATUS_DRAFT, PRODUCT_STATUS_DELETED])
+        self.assertTrue(Product.objects.get(pk=ok.pk).in_stock)
+
+    def test_other_vendors_products_are_untouched(self):
+        mine, theirs = self.product(), self.product(vendor=self.other_vendor)
+
+        self.assertEqual(product_actions.apply(self.vendor, "delete", [mine.pid, theirs.pid]), 1)
+        self.assertEqual(self.statuses(mine, theirs), [PRODUCT_STATUS_DELETED, PRODUCT_STATUS_DRAFT])
+
+    def test_delete_and_restore(self):
+        published = self.product(status=PRODUCT_STATUS_PUBLISHED)
+
+        product_actions.apply(self.vendor, "delete", [published.pid])
+        self.assertEqual(product_actions.apply(self.vendor, "restore", [published.pid]), 1)
+        self.assertEqual(product_actions.apply(self.vendor, "restore", [published.pid]), 0)
+        self.assertEqual(self.statuses(published), [PRODUCT_STATUS_DRAFT])
+
+    def test_adjust_price_rounds_floors_and_invalidates_cache(self):
+        a, b = self.product("19.99"), self.product("0.01")
+        self.assertEqual(pricing.get_prices([a.pid])[a.pid], Decimal("19.99"))
+
+        product_actions.apply(self.vendor, "adjust_price", [a.pid, b.pid], percent="-15")
+
+        self.assertEqual(pricing.get_prices([a.pid, b.pid]), {a.pid: Decimal("16.99"), b.pid: Decimal("0.01")})
+
+    def test_adjust_price_recomputes_discount(self):
+        p = Product.objects.get(pk=self.product("80.00").pk)
+        Product.objects.filter(pk=p.pk).update(old_price=Decimal("100.00"))
+
+        product_actions.apply(self.vendor, "adjust_price", [p.pid], percent="-25")
+
+        self.assertEqual(Product.objects.get(pk=p.pk).discount_percent, Decimal("40.00"))
+
+    def test_adjust_price_rejects_prices_beyond_max_digits(self):
+        big, small = self.product("9999999.99"), self.product("10.00")
+
+        with self.assertRaises(BulkActionError):
+            product_actions.apply(self.vendor, "adjust_price", [big.pid, small.pid], percent="1000")
+
+        self.assertEqual(Product.objects.get(pk=big.pk).amount, Decimal("9999999.99"))
+        self.assertEqual(Product.objects.get(pk=small.pk).amount, Decimal("10.00"))
+        self.assertEqual(product_actions.apply(self.vendor, "adjust_price", [big.pid], percent="900"), 1)
+        self.assertEqual(Product.objects.get(pk=big.pk).amount, product_actions.MAX_PRICE - Decimal("0.09"))
+
+    def test_adjust_stock_never_goes_negative(self):
+        a, b = self.product(stock=10), self.product(stock=3)
+
+        product_actions.apply(self.vendor, "adjust_stock", [a.pid], percent="25")
+        product_actions.apply(self.vendor, "adjust_stock", [b.pid], percent="-99")
+
+        self.assertEqual(Product.objects.get(pk=a.pk).stock_count, 13)
+        self.assertEqual(Product.objects.get(pk=b.pk).stock_count, 0)
+
+    def test_invalid_action_or_percent(self):
+        p = self.product()
+        for action, percent in (("explode", None), ("adjust_price", "abc"), ("adjust_price", "-100"),
+                                ("adjust_stock", "NaN"), ("adjust_stock", None)):
+            with self.assertRaises(BulkActionError):
+                product_actions.apply(self.vendor, action, [p.pid], percent=percent)
+
+    def test_bulk_view(self):
+        a, b = self.product(), self.product()
+        self.client.force_login(self.seller)
+        url = reverse("useradmin:dashboard-bulk-products")
+
+        response = self.client.post(url, {"action": "publish", "pids": [a.pid, b.pid]},
+                                    headers={"x-requested-with": "XMLHttpRequest"})
+        self.assertEqual(response.json()["updated"], 2)
+
+        response = self.client.post(url, {"action": "adjust_price", "pids": [a.pid], "percent": "x"},
+                                    headers={"x-requested-with": "XMLHttpRequest"})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(url, {"action": "unpublish", "pids": [a.pid]})
+        self.assertRedirects(response, reverse("useradmin:dashboard-products"), fetch_redirect_response=False)
+        self.assertEqual(self.statuses(a, b), [PRODUCT_STATUS_DRAFT, PRODUCT_STATUS_PUBLISHED])
+        self.assertEqual(self.client.get(url).status_code, 405)
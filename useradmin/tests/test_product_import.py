@@ -0,0 +1,147 @@
+import json
+from io import BytesIO, StringIO
+from unittest import mock
+
+from cloudinary import CloudinaryResource
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.constants import (
+    JOB_STATUS_DONE, JOB_STATUS_FAILED, JOB_STATUS_PENDING, PRODUCT_STATUS_DRAFT, PRODUCT_STATUS_PUBLISHED,
+)
+from core.models import Category, Image, Product, ProductImageImport
+from core.tests.test_analytics import AnalyticsBaseTestCase
+from useradmin.product_import import import_products, read_rows
+
+HEADER = "title,amount,old_price,stock_count,category,tags,image_url\n"
+
+
+def csv_file(*lines, name="products.csv"):
+    return SimpleUploadedFile(name, (HEADER + "".join(f"{line}\n" for line in lines)).encode())
+
+
+class ProductImportTest(AnalyticsBaseTestCase):
+    """Import product hàng loạt từ CSV/JSON"""
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(cid="cat-1", title="Skin Care")
+
+    def test_valid_rows_are_created_with_tags_and_images(self):
+        result = import_products(self.vendor, read_rows(csv_file(
+            'Cream,10.00,12.00,5,skin care,"soft, face",https://example.com/a.jpg',
+            "Soap,3.50,,0,cat-1,face,",
+        )), publish=True)
+
+        self.assertEqual((result.created, result.failed, result.images_queued), (2, 0, 1))
+        cream = Product.objects.get(title="Cream")
+        soap = Product.objects.get(title="Soap")
+        self.assertEqual((cream.product_status, cream.category), (PRODUCT_STATUS_PUBLISHED, self.category))
+        self.assertEqual(soap.product_status, PRODUCT_STATUS_DRAFT)  # hết hàng -> draft như add_product
+        self.assertEqual(sorted(cream.tags.names()), ["face", "soft"])
+        self.assertEqual(list(soap.tags.names()), ["face"])
+        self.assertNotEqual(cream.sku, soap.sku)
+        self.assertEqual(ProductImageImport.objects.get().product, cream)
+
+    def test_invalid_rows_are_reported_without_blocking_others(self):
+        result = import_products(self.vendor, read_rows(csv_file(
+            "Good,10.00,,1,,,",
+            ",10.00,,1,,,",
+            "Free,0,,1,,,",
+            "Lost,1.00,,1,Unknown,,",
+        )))
+
+        self.assertEqual((result.created, result.failed), (1, 3))
+        self.assertEqual([row for row, _ in result.errors], [2, 3, 4])
+        self.assertIn("title", result.errors[0][1])
+        self.assertIn("amount", result.errors[1][1])
+        self.assertIn("category", result.errors[2][1])
+
+    def test_model_limits_are_enforced_per_row(self):
+        result = import_products(self.vendor, read_rows(csv_file(
+            f"{'x' * 300},1.00,,1,,,",
+            "Huge,123456789012.50,,1,,,",
+            "Fine,1.00,,1,,,",
+        )))
+
+        self.assertEqual((result.created, result.failed), (1, 2))
+        self.assertIn("title", result.errors[0][1])
+        self.assertIn("amount", result.errors[1][1])
+        self.assertEqual(list(Product.objects.values_list("title", flat=True)), ["Fine"])
+
+    def test_queries_do_not_grow_with_rows(self):
+        def count(rows):
+            lines = [f"P{i},1.00,,1,cat-1,tag{rows}-{i % 3},https://example.com/{i}.jpg" for i in range(rows)]
+            with CaptureQueriesContext(connection) as ctx:
+                import_products(self.vendor, read_rows(csv_file(*lines)))
+            return len(ctx.captured_queries)
+
+        self.assertEqual(count(5), count(30))
+
+    def test_json_rows(self):
+        data = [{"title": "Json", "amount": 2, "stock_count": 3, "tags": ["a", "b"]}]
+
+        result = import_products(self.vendor, read_rows(BytesIO(json.dumps(data).encode()), "json"))
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(sorted(Product.objects.get(title="Json").tags.names()), ["a", "b"])
+
+    def test_import_view(self):
+        self.client.force_login(self.seller)
+
+        response = self.client.post(reverse("useradmin:dashboard-import-products"), {
+            "file": csv_file("Viewed,1.00,,1,,,", ",1,,1,,,"),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["result"].created, 1)
+        self.assertEqual(Product.objects.get(title="Viewed").vendor, self.vendor)
+
+    def test_file_error_midway_reports_rows_already_imported(self):
+        # Byte UTF-8 hỏng nằm sau vài chunk đọc của TextIOWrapper
+        body = (HEADER + "".join(f"Row {i},1.00,,1,,,\n" for i in range(600))).encode() + b"\xff\xfe,1,,1,,,\n"
+        self.client.force_login(self.seller)
+
+        response = self.client.post(reverse("useradmin:dashboard-import-products"), {
+            "file": SimpleUploadedFile("products.csv", body),
+        })
+
+        result = response.context["result"]
+        self.assertGreater(result.created, 0)
+        self.assertEqual(Product.objects.filter(vendor=self.vendor).count(), result.created)
+        message = str(list(response.context["messages"])[0])
+        self.assertIn(f"after row {result.created}", message)
+        self.assertIn(f"{result.created} products from earlier rows were imported", message)
+
+    def test_images_are_ingested_by_worker(self):
+        import_products(self.vendor, read_rows(csv_file(
+            "A,1.00,,1,,,https://example.com/a.jpg",
+            "B,1.00,,1,,,https://example.com/b.jpg",
+        )))
+
+        def fake_upload(url):
+            if url.endswith("b.jpg"):
+                raise OSError("404")
+            return CloudinaryResource("products/a", format="jpg", version="1", type="upload", resource_type="image")
+
+        with mock.patch("core.product_images.upload", side_effect=fake_upload):
+            call_command("ingest_product_images", "--max-attempts", "2", stdout=StringIO())
+            # Lỗi được thử lại sau backoff, không ngay trong lần chạy này
+            self.assertEqual(
+                list(ProductImageImport.objects.order_by("id").values_list("status", "attempts")),
+                [(JOB_STATUS_DONE, 1), (JOB_STATUS_PENDING, 1)],
+            )
+            self.assertGreater(ProductImageImport.objects.get(status=JOB_STATUS_PENDING).next_attempt_at, timezone.now())
+            ProductImageImport.objects.update(next_attempt_at=timezone.now())
+            call_command("ingest_product_images", "--max-attempts", "2", stdout=StringIO())
+
+        self.assertEqual(
+            list(ProductImageImport.objects.order_by("id").values_list("status", "attempts")),
+            [(JOB_STATUS_DONE, 1), (JOB_STATUS_FAILED, 2)],
+        )
+        image = Image.objects.get()
+        self.assertEqual((image.object_id, image.is_primary), (Product.objects.get(title="A").pid, True))
@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.constants import DEFAULT_CATEGORY_IMAGE, PRODUCT_STATUS_DELETED
+from core.models import Product
+from core.tests.test_analytics import AnalyticsBaseTestCase
+from utils.pagination import encode_cursor
+
+
+class ProductListTest(AnalyticsBaseTestCase):
+    """Bảng product của vendor: discount lưu sẵn, sort theo whitelist, phân trang keyset"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.seller)
+        self.url = reverse("useradmin:dashboard-products")
+
+    def product(self, title, amount="10.00", old_price="0", **fields):
+        return Product.objects.create(
+            title=title, vendor=fields.pop("vendor", self.vendor), amount=Decimal(amount),
+            old_price=Decimal(old_price), sku=f"sku-{title}", **fields,
+        )
+
+    def test_discount_percent_is_kept_in_sync_on_save(self):
+        p = self.product("A", "75.00", "100.00")
+        self.assertEqual(p.discount_percent, Decimal("25.00"))
+
+        p.amount = Decimal("120.00")
+        p.save(update_fields=["amount"])
+        self.assertEqual(Product.objects.get(pk=p.pk).discount_percent, Decimal("0"))
+
+    def test_sort_by_stored_discount_and_whitelist(self):
+        self.product("Small", "90.00", "100.00")
+        self.product("Big", "50.00", "100.00")
+        self.product("None")
+
+        response = self.client.get(self.url, {"sort": "discount", "order": "desc"})
+        self.assertEqual([p.title for p in response.context["all_products"]], ["Big", "Small", "None"])
+
+        response = self.client.get(self.url, {"sort": "vendor__user__password"})
+        self.assertEqual(response.context["sort_by"], "title")
+        self.assertEqual([p.title for p in response.context["all_products"]], ["Big", "None", "Small"])
+
+    def test_pages_follow_cursor_and_skip_deleted(self):
+        for i in range(25):
+            self.product(f"P{i:02d}")
+        self.product("Gone", product_status=PRODUCT_STATUS_DELETED)
+        self.product("Other", vendor=self.other_vendor)
+
+        first = self.client.get(self.url, {"per_page": 20}).context["page"]
+        second = self.client.get(self.url, {"per_page": 20, "after": first.next_cursor}).context["page"]
+
+        titles = [p.title for p in first] + [p.title for p in second]
+        self.assertEqual(titles, [f"P{i:02d}" for i in range(25)])
+        self.assertFalse(second.has_next)
+
+    def test_wrong_typed_cursor_restarts_from_first_page(self):
+        self.product("A")
+
+        for values in (["x", "y"], [None, "pid"], ["A"]):
+            with self.subTest(values=values):
+                response = self.client.get(self.url, {"sort": "amount", "after": encode_cursor(values)})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([p.title for p in response.context["page"]], ["A"])
+
+    def test_queries_do_not_grow_with_rows(self):
+        def count(rows):
+            Product.objects.all().delete()
+            for i in range(rows):
+                self.product(f"P{rows}-{i}")
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(self.url)
+            self.assertEqual({p.image_url for p in response.context["all_products"]}, {DEFAULT_CATEGORY_IMAGE})
+            return len(ctx.captured_queries)
+
+        self.client.get(self.url)  # cache vendor/session trước khi đếm
+        self.assertEqual(count(2), count(20))
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Product, ProductReview
+from core.tests.test_analytics import AnalyticsBaseTestCase
+from utils.pagination import encode_cursor
+
+
+class VendorReviewsTest(AnalyticsBaseTestCase):
+    """Trang review của vendor: lọc qua product__vendor, lọc sao/ngày, phân trang"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.seller)
+        self.url = reverse("useradmin:reviews")
+        self.product = Product.objects.create(title="Mine", vendor=self.vendor, sku="sku-m")
+        self.other = Product.objects.create(title="Theirs", vendor=self.other_vendor, sku="sku-t")
+
+    def review(self, rating, product=None, days_ago=0):
+        review = ProductReview.objects.create(
+            user=self.buyer, product=product or self.product, review="ok", rating=rating,
+        )
+        if days_ago:
+            ProductReview.objects.filter(pk=review.pk).update(date=timezone.now() - timedelta(days=days_ago))
+        return review
+
+    def ids(self, **params):
+        return [r.id for r in self.client.get(self.url, params).context["reviews"]]
+
+    def test_only_vendor_reviews_with_rating_and_date_filters(self):
+        old = self.review(5, days_ago=10)
+        recent = self.review(2)
+        self.review(5, product=self.other)
+
+        self.assertEqual(self.ids(), [recent.id, old.id])
+        self.assertEqual(self.ids(rating=5), [old.id])
+        since = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(self.ids(**{"from": since}), [recent.id])
+        self.assertEqual(self.ids(**{"to": since}), [old.id])
+        self.assertEqual(self.ids(rating="bogus", to="not-a-date"), [recent.id, old.id])
+
+    def test_pagination_and_histogram(self):
+        for i in range(25):
+            self.review(i % 5 + 1)
+
+        response = self.client.get(self.url, {"per_page": 20})
+        page = response.context["page"]
+        rest = self.client.get(self.url, {"per_page": 20, "after": page.next_cursor}).context["page"]
+
+        self.assertEqual((len(page), len(rest), rest.has_next), (20, 5, False))
+        self.assertEqual(response.context["summary"]["total"], 25)
+        self.assertEqual({bar["count"] for bar in response.context["summary"]["histogram"]}, {5})
+
+    def test_wrong_typed_cursor_restarts_from_first_page(self):
+        review = self.review(5)
+
+        for values in (["x", "y"], [None, 1], ["2024-01-01T00:00:00+00:00", "y"]):
+            with self.subTest(values=values):
+                self.assertEqual(self.ids(before=encode_cursor(values)), [review.id])
+
+    def test_queries_do_not_grow_with_rows(self):
+        def count(rows):
+            ProductReview.objects.all().delete()
+            for i in range(rows):
+                self.review(4)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(self.url)
+            return len(ctx.captured_queries)
+
+        self.client.get(self.url)  # cache vendor/session trước khi đếm
+        self.assertEqual(count(2), count(15))
@@ -5,15 +5,21 @@ app_name = "useradmin"
 
 urlpatterns = [
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("analytics/revenue/", views.revenue_series, name="revenue-series"),
     path("products/", views.products, name="dashboard-products"),
     path("add-products/", views.add_product, name="dashboard-add-products"),
+    path("import-products/", views.import_products, name="dashboard-import-products"),
     path("edit-products/<pid>/", views.edit_product, name="dashboard-edit-products"),
     path("delete-products/<pid>/", views.delete_product, name="dashboard-delete-products"),
     path("restore-products/<pid>/", views.restore_product, name="dashboard-restore-products"),
+    path("products/bulk/", views.bulk_product_action, name="dashboard-bulk-products"),
     path("orders/", views.orders, name="orders"),
     path("order_detail/<id>/", views.order_detail, name="order_detail"),
     path("change_order_status/<oid>/", views.change_order_status, name="change_order_status"),
+    path("orders/status/", views.bulk_order_status, name="bulk-order-status"),
     path("shop_page/", views.shop_page, name="shop_page"),
+    path("export/jobs/<int:job_id>/", views.export_download, name="export-download"),
+    path("export/<str:kind>/", views.export_data, name="export"),
     path("reviews/", views.reviews, name="reviews"),
     path("vendor/create/", views.create_vendor, name="create-vendor"),
     path("coupons/", views.coupons, name="coupons"),
@@ -1,37 +1,63 @@
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse, FileResponse, Http404
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Sum, F, DecimalField, Case, When, Value, Avg, Q, Count
-from django.db.models.functions import Cast, Coalesce
+from django.db.models import Sum, F, Q, Count
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from userauths.models import User
-from core.models import CartOrder, CartOrderProducts, Product, Category, ProductReview, Image, Vendor, Coupon, CouponUser
+from core.models import CartOrder, CartOrderProducts, Product, Category, ProductReview, Image, Vendor, Coupon, CouponUser, ExportJob
 from useradmin.forms import AddProductForm, CouponForm
+from useradmin import product_actions, product_import
 from .constants import *
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.db import transaction
 from django.utils.translation import gettext as _
-import datetime
 from .decorators import vendor_required, vendor_profile_required, vendor_auth_required
+from core import analytics, exports, order_status, rollups
+from core import coupons as coupon_service
+from core import reviews as review_stats
+from core.vendors import request_vendor
+from utils.pagination import InvalidCursor, keyset_page
+from utils.params import getlist
+from urllib.parse import urlencode
+from django.urls import reverse
+import os
 from django.utils import timezone
+import datetime
 from core.constants import (
+    BULK_ACTION_MAX_ORDERS,
+    BULK_ACTION_MAX_PRODUCTS,
+    COUPON_STATUS_ACTIVE,
+    COUPON_STATUS_EXPIRED,
+    COUPON_STATUS_INACTIVE,
+    DEFAULT_CATEGORY_IMAGE,
+    EXPORT_FORMAT_CHOICES,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_XLSX,
+    JOB_STATUS_DONE,
+    ORDER_STATUS_CHOICES,
+    SERIES_DEFAULT_DAYS,
     PRODUCT_STATUS_DELETED,
     PRODUCT_STATUS_DRAFT, 
     PRODUCT_STATUS_PUBLISHED,
     PRODUCT_STATUS_DISABLED,
     PRODUCT_STATUS_REJECTED,
-    PRODUCT_STATUS_IN_REVIEW
+    PRODUCT_STATUS_IN_REVIEW,
+    RATING,
 )
 
+def _page_size(request, sizes):
+    """per_page trong `sizes`, mặc định là phần tử đầu."""
+    try:
+        per_page = int(request.GET.get('per_page', sizes[0]))
+    except ValueError:
+        return sizes[0]
+    return per_page if per_page in sizes else sizes[0]
+
 @login_required
 def dashboard(request):
-    has_vendor = False
-    try:
-        vendor = Vendor.objects.get(user=request.user)
-        has_vendor = True
-    except Vendor.DoesNotExist:
-        vendor = None
+    vendor = request_vendor(request)
+    has_vendor = vendor is not None
 
     if request.user.role == "vendor":
         if not has_vendor:
@@ -47,12 +73,8 @@ def dashboard(request):
             "error_message": _("You need to login with vendor privileges.")
         })
 
-    revenue = CartOrder.objects.filter(vendor=vendor).aggregate(price=Sum(AMOUNT))
-    total_orders_count = CartOrder.objects.filter(vendor=vendor).count()
-    all_products = Product.objects.filter(vendor=vendor)
-    all_categories = Category.objects.all()
-    new_customers = User.objects.all().order_by("-id")[:6]
-    latest_orders = CartOrder.objects.filter(vendor=vendor).select_related(
+    kpis = analytics.dashboard_kpis(vendor)
+    latest_orders = analytics.placed_orders(vendor).select_related(
         'user',
         'user__profile'
     ).annotate(
@@ -60,23 +82,12 @@ def dashboard(request):
         full_name=F(FULL_NAME),
         email=F(EMAIL),
         phone=F(PHONE),
-        total=Cast(
-            Coalesce(F(AMOUNT), Value(0)),
-            output_field=DecimalField(max_digits=MAX_DIGITS_DECIMAL, decimal_places=DECIMAL_PLACES)
-        )
     ).order_by('-order_date')[:10]
 
-    this_month = datetime.datetime.now().month
-    monthly_revenue = CartOrder.objects.filter(vendor=vendor, order_date__month=this_month).aggregate(price=Sum(AMOUNT))
-
     context = {
-        "monthly_revenue": monthly_revenue,
-        "revenue": revenue,
-        "all_products": all_products,
-        "all_categories": all_categories,
-        "new_customers": new_customers,
+        "kpis": kpis,
+        "new_customers": analytics.new_customers(vendor),
         "latest_orders": latest_orders,
-        "total_orders_count": total_orders_count,
         "has_vendor": has_vendor,
         "vendor": vendor,
     }
@@ -86,50 +97,44 @@ def dashboard(request):
 @vendor_auth_required()
 def products(request, vendor):
     sort_by = request.GET.get('sort', 'title')
-    order = request.GET.get('order', 'asc')
+    if sort_by not in PRODUCT_SORT_FIELDS:
+        sort_by = 'title'
+    order = 'desc' if request.GET.get('order') == 'desc' else 'asc'
     show_deleted = request.GET.get('show_deleted', 'false') == 'true'
-
-    if order == 'desc':
-        sort_by = '-' + sort_by
+    per_page = _page_size(request, PRODUCT_PAGE_SIZES)
 
     # Filter products based on show_deleted parameter
-    if show_deleted:
-        all_products = Product.objects.filter(vendor=vendor)
-    else:
-        all_products = Product.objects.filter(vendor=vendor).exclude(product_status=PRODUCT_STATUS_DELETED)
-
-    all_products = all_products.annotate(
-        display_price=Cast(
-            Coalesce('amount', Value(0)),
-            output_field=DecimalField(max_digits=MAX_DIGITS_DECIMAL, decimal_places=DECIMAL_PLACES)
-        ),
-        display_old_price=Cast(
-            Coalesce('old_price', Value(0)),
-            output_field=DecimalField(max_digits=MAX_DIGITS_DECIMAL, decimal_places=DECIMAL_PLACES)
-        ),
-        discount_percent=Case(
-            When(
-                old_price__gt=0,
-                then=Cast(
-                    (Cast(Coalesce(F('old_price'), Value(0)), DecimalField(max_digits=MAX_DIGITS_DECIMAL, decimal_places=DECIMAL_PLACES)) -
-                     Cast(Coalesce(F('amount'), Value(0)), DecimalField(max_digits=MAX_DIGITS_DECIMAL, decimal_places=DECIMAL_PLACES))) * 100.0 /
-                    Cast(Coalesce(F('old_price'), Value(1)), DecimalField(max_digits=MAX_DIGITS_DECIMAL, decimal_places=DECIMAL_PLACES)),
-                    output_field=DecimalField(max_digits=MAX_DIGITS_DECIMAL, decimal_places=DECIMAL_PLACES)
-                )
-            ),
-            default=Value(0),
-            output_field=DecimalField(max_digits=MAX_DIGITS_DECIMAL, decimal_places=DECIMAL_PLACES)
+    all_products = Product.objects.filter(vendor=vendor).only(*PRODUCT_LIST_FIELDS)
+    if not show_deleted:
+        all_products = all_products.exclude(product_status=PRODUCT_STATUS_DELETED)
+
+    # Chỉ sắp xếp theo các cột có index (vendor, cột, pid); pid để thứ tự là duy nhất
+    prefix = '-' if order == 'desc' else ''
+    ordering = (prefix + PRODUCT_SORT_FIELDS[sort_by], prefix + 'pid')
+    try:
+        page = keyset_page(
+            all_products, ordering, per_page,
+            after=request.GET.get('after'), before=request.GET.get('before'),
         )
-    ).order_by(sort_by)
+    except InvalidCursor:
+        page = keyset_page(all_products, ordering, per_page)
 
-    all_categories = Category.objects.all()
+    images = Image.primary_url_map('Product', [p.pid for p in page], default=DEFAULT_CATEGORY_IMAGE)
+    for p in page:
+        p.image_url = images[p.pid]
 
+    filters = {'sort': sort_by, 'order': order, 'per_page': per_page}
+    if show_deleted:
+        filters['show_deleted'] = 'true'
     context = {
-        "all_products": all_products,
-        "all_categories": all_categories,
-        'sort_by': request.GET.get('sort', 'title'),
-        'order': request.GET.get('order', 'asc'),
+        "all_products": page,
+        "page": page,
+        'sort_by': sort_by,
+        'order': order,
         'show_deleted': show_deleted,
+        'per_page': per_page,
+        'page_sizes': PRODUCT_PAGE_SIZES,
+        'filter_query': urlencode(filters),
         'vendor': vendor,
         'PRODUCT_STATUS_DELETED': PRODUCT_STATUS_DELETED,
         'PRODUCT_STATUS_DRAFT': PRODUCT_STATUS_DRAFT,
@@ -137,6 +142,7 @@ def products(request, vendor):
         'PRODUCT_STATUS_DISABLED': PRODUCT_STATUS_DISABLED,
         'PRODUCT_STATUS_REJECTED': PRODUCT_STATUS_REJECTED,
         'PRODUCT_STATUS_IN_REVIEW': PRODUCT_STATUS_IN_REVIEW,
+        'xlsx_export': exports.xlsx_available(),
     }
     return render(request, "useradmin/products.html", context)
 
@@ -212,6 +218,36 @@ def add_product(request, vendor):
     }
     return render(request, "useradmin/add-products.html", context)
 
+@login_required
+@vendor_auth_required()
+def import_products(request, vendor):
+    result = None
+    if request.method == "POST":
+        uploaded = request.FILES.get('file')
+        if uploaded is None:
+            messages.error(request, _("Please choose a CSV or JSON file to import."))
+        else:
+            try:
+                result = product_import.import_products(
+                    vendor, product_import.read_rows(uploaded), publish='publish' in request.POST,
+                )
+            except product_import.ImportFileError as e:
+                result = e.result
+                if result is not None and (result.created or result.failed):
+                    messages.error(request, _(
+                        "Cannot read the import file after row {}: {}. {} products from earlier rows were imported, {} rows failed."
+                    ).format(result.created + result.failed, e, result.created, result.failed))
+                else:
+                    messages.error(request, _("Cannot read the import file: {}").format(e))
+            else:
+                messages.success(request, _("Imported {} products, {} rows failed.").format(result.created, result.failed))
+
+    context = {
+        'result': result,
+        'vendor': vendor,
+    }
+    return render(request, "useradmin/import-products.html", context)
+
 @login_required
 @vendor_auth_required()
 def edit_product(request, pid, vendor):
@@ -324,10 +360,36 @@ def delete_product(request, pid, vendor):
         messages.error(request, "Product not found")
         return redirect("useradmin:dashboard-products")
 
+@login_required
+@vendor_auth_required()
+@require_POST
+def bulk_product_action(request, vendor):
+    """Publish/unpublish/xoá/khôi phục/đổi giá/đổi tồn kho cho nhiều product bằng một câu UPDATE."""
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    action = request.POST.get('action', '')
+    pids = getlist(request.POST, 'pids')
+    try:
+        if len(pids) > BULK_ACTION_MAX_PRODUCTS:
+            raise product_actions.BulkActionError(
+                _("You can update at most {} products at once.").format(BULK_ACTION_MAX_PRODUCTS)
+            )
+        updated = product_actions.apply(vendor, action, pids, percent=request.POST.get('percent'))
+    except product_actions.BulkActionError as e:
+        if is_ajax:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        messages.error(request, str(e))
+        return redirect('useradmin:dashboard-products')
+
+    message = _("{} of {} selected products updated.").format(updated, len(set(pids)))
+    if is_ajax:
+        return JsonResponse({'success': True, 'updated': updated, 'message': message})
+    messages.success(request, message)
+    return redirect('useradmin:dashboard-products')
+
 @login_required
 @vendor_auth_required()
 def orders(request, vendor):
-    orders = CartOrder.objects.filter(vendor=vendor).select_related(
+    orders = analytics.placed_orders(vendor).select_related(
         'user',
         'user__profile'
     ).annotate(
@@ -335,11 +397,59 @@ def orders(request, vendor):
         full_name=F(FULL_NAME),
         email=F(EMAIL),
         phone=F(PHONE),
-    ).order_by(f'-{ORDER_DATE}')
+    )
+
+    # Lọc theo (vendor, order_status, order_date) và (vendor, order_date) đều có index
+    status = request.GET.get('status', '')
+    if status in analytics.PLACED_ORDER_STATUSES:
+        orders = orders.filter(order_status=status)
+    elif status:
+        # pending (đơn nháp của checkout) hay trạng thái lạ: không có đơn nào, không lặng lẽ bỏ lọc
+        orders = orders.none()
+    paid = request.GET.get('paid', '')
+    if paid in ('1', '0'):
+        orders = orders.filter(paid_status=paid == '1')
+    else:
+        paid = ''
+    per_page = _page_size(request, ORDER_PAGE_SIZES)
 
+    try:
+        page = keyset_page(
+            orders, ORDER_KEYSET, per_page,
+            after=request.GET.get('after'), before=request.GET.get('before'),
+        )
+    except InvalidCursor:
+        page = keyset_page(orders, ORDER_KEYSET, per_page)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'orders': [{
+                'id': order.id,
+                'name': order.full_name,
+                'email': order.email,
+                'phone': order.phone,
+                'amount': order.amount,
+                'order_status': order.order_status,
+                'paid_status': order.paid_status,
+                'order_date': order.order_date,
+            } for order in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+
+    filters = {key: value for key, value in (('status', status), ('paid', paid), ('per_page', per_page)) if value}
     context = {
-        'orders': orders,
+        'orders': page,
+        'page': page,
+        'status': status,
+        'paid': paid,
+        'per_page': per_page,
+        'page_sizes': ORDER_PAGE_SIZES,
+        'status_choices': [(value, label) for value, label in ORDER_STATUS_CHOICES if value in analytics.PLACED_ORDER_STATUSES],
+        'bulk_status_choices': [(value, label) for value, label in ORDER_STATUS_CHOICES if order_status.allowed_sources(value)],
+        'filter_query': urlencode(filters),
         'vendor': vendor,
+        'xlsx_export': exports.xlsx_available(),
     }
     return render(request, "useradmin/orders.html", context)
 
@@ -368,11 +478,9 @@ def order_detail(request, id, vendor):
             'order_items': order_items,
             'vendor': vendor,
             'status_choices': [
-                ('pending', _('Pending')),
-                ('processing', _('Processing')),
-                ('shipped', _('Shipped')),
-                ('delivered', _('Delivered')),
-            ]
+                (value, _(label)) for value, label in ORDER_STATUS_CHOICES
+                if value in order_status.allowed_targets(order.order_status)
+            ],
         }
         return render(request, "useradmin/order_detail.html", context)
 
@@ -382,56 +490,124 @@ def order_detail(request, id, vendor):
 
 @login_required
 @vendor_auth_required()
-@csrf_exempt
+@require_POST
 def change_order_status(request, oid, vendor):
+    order = CartOrder.objects.filter(id=oid).first()
+    if order is None:
+        messages.error(request, _("Order not found."))
+        return redirect("useradmin:orders")
+    if order.vendor_id != vendor.pk:
+        messages.error(request, _("You don't have permission to change this order status."))
+        return redirect("useradmin:orders")
+
+    new_status = request.POST.get("status", "")
+    current_status = order.order_status
     try:
-        order = CartOrder.objects.get(id=oid)
+        changed = order_status.transition(
+            CartOrder.objects.filter(id=order.id), new_status, changed_by=request.user
+        )
+    except order_status.InvalidTransition:
+        changed = []
+    if changed:
+        messages.success(request, _("Order status changed from '{}' to '{}'").format(current_status, new_status))
+    else:
+        messages.error(request, _("Cannot change order status from '{}' to '{}'.").format(current_status, new_status))
+    return redirect("useradmin:order_detail", order.id)
 
-        if order.vendor != vendor:
-            messages.error(request, _("You don't have permission to change this order status."))
-            return redirect("useradmin:orders")
+@login_required
+@vendor_auth_required()
+@require_POST
+def bulk_order_status(request, vendor):
+    """Chuyển trạng thái nhiều đơn bằng một câu UPDATE có điều kiện; đơn không chuyển được bị bỏ qua."""
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    ids = getlist(request.POST, 'ids')
+    status = request.POST.get('status', '')
+    error = None
+    if len(ids) > BULK_ACTION_MAX_ORDERS:
+        error = _("You can update at most {} orders at once.").format(BULK_ACTION_MAX_ORDERS)
+    elif not all(i.isdigit() for i in ids):
+        error = _("Invalid order ids.")
+    else:
+        try:
+            changed = order_status.transition(
+                CartOrder.objects.filter(vendor=vendor, id__in=ids), status, changed_by=request.user
+            )
+        except order_status.InvalidTransition:
+            error = _("Invalid order status.")
+    if error:
+        if is_ajax:
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        messages.error(request, error)
+        return redirect('useradmin:orders')
+
+    message = _("{} of {} selected orders updated.").format(len(changed), len(set(ids)))
+    if is_ajax:
+        return JsonResponse({'success': True, 'updated': [o.id for o in changed], 'message': message})
+    messages.success(request, message)
+    return redirect('useradmin:orders')
 
-        if request.method == "POST":
-            new_status = request.POST.get("status")
-            current_status = order.order_status
-
-            status_order = {
-                'pending': 1,
-                'processing': 2,
-                'shipped': 3,
-                'delivered': 4
-            }
-
-            if current_status == 'delivered' and new_status != 'delivered':
-                messages.error(
-                    request, 
-                    _("Cannot change status of delivered order. Please create a return/exchange request.")
-                )
-            elif status_order.get(current_status, 0) > status_order.get(new_status, 0):
-                messages.error(
-                    request, 
-                    _("Cannot change order status from '{}' to '{}'. Only forward progression is allowed.").format(
-                        current_status, new_status
-                    )
-                )
-            else:
-                order.order_status = new_status
-                order.save()
-                messages.success(request, _("Order status changed from '{}' to '{}'").format(
-                    current_status, new_status
-                ))
+@login_required
+@vendor_auth_required()
+def revenue_series(request, vendor):
+    """Chuỗi doanh thu theo ngày/tuần/tháng cho biểu đồ (JSON, đã lấp các bucket trống)."""
+    granularity = request.GET.get('granularity', 'day')
+    try:
+        end = datetime.date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = (
+            datetime.date.fromisoformat(request.GET['start']) if request.GET.get('start')
+            else end - datetime.timedelta(days=SERIES_DEFAULT_DAYS - 1)
+        )
+        series = analytics.revenue_series(vendor, start, end, granularity)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
-        return redirect("useradmin:order_detail", order.id)
-    except CartOrder.DoesNotExist:
-        messages.error(request, _("Order not found."))
-        return redirect("useradmin:orders")
+    return JsonResponse({
+        'success': True,
+        'granularity': granularity,
+        'start': start,
+        'end': end,
+        'buckets': series,
+    })
 
 @login_required
-def shop_page(request):
-    try:
-        vendor = Vendor.objects.get(user=request.user)
-        has_vendor = True
+@vendor_auth_required()
+def export_data(request, vendor, kind):
+    """Export CSV/XLSX; GET stream ngay, POST tạo ExportJob chạy nền (email khi xong)."""
+    if kind not in exports.EXPORTS:
+        raise Http404
+    file_format = request.POST.get('format') or request.GET.get('format') or EXPORT_FORMAT_CSV
+    if file_format not in dict(EXPORT_FORMAT_CHOICES):
+        return JsonResponse({'success': False, 'error': _("Unsupported export format.")}, status=400)
+    if file_format == EXPORT_FORMAT_XLSX and not exports.xlsx_available():
+        return JsonResponse({'success': False, 'error': _("XLSX export is not available.")}, status=400)
+
+    if request.method == 'POST':
+        job = ExportJob.objects.create(vendor=vendor, user=request.user, kind=kind, file_format=file_format)
+        job.download_url = request.build_absolute_uri(reverse('useradmin:export-download', args=[job.id]))
+        job.save(update_fields=['download_url'])
+        messages.success(request, _("Your export is being prepared. We will email you when it is ready."))
+        return redirect('useradmin:dashboard-products' if kind == 'products' else 'useradmin:orders')
+
+    name = exports.filename(kind, file_format, vendor)
+    if file_format == EXPORT_FORMAT_CSV:
+        response = StreamingHttpResponse(exports.csv_stream(kind, vendor), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{name}"'
+        return response
+    return FileResponse(exports.xlsx_tempfile(kind, vendor), as_attachment=True, filename=name)
+
+@login_required
+@vendor_auth_required()
+def export_download(request, vendor, job_id):
+    job = get_object_or_404(ExportJob, id=job_id, vendor=vendor, status=JOB_STATUS_DONE)
+    if not os.path.exists(job.file_path):
+        raise Http404
+    return FileResponse(open(job.file_path, 'rb'), as_attachment=True, filename=os.path.basename(job.file_path))
 
+@login_required
+def shop_page(request):
+    vendor = request_vendor(request)
+    has_vendor = vendor is not None
+    if has_vendor:
         try:
             vendor_image = Image.objects.get(
                 object_type='vendor',
@@ -444,25 +620,12 @@ def shop_page(request):
 
         products = Product.objects.filter(vendor=vendor)
 
-        revenue = CartOrder.objects.filter(
-            vendor=vendor,
-            paid_status=True
-        ).aggregate(price=Sum(AMOUNT))
-
-        total_sales = CartOrderProducts.objects.filter(
-            order__vendor=vendor,
-            order__paid_status=True
-        ).aggregate(qty=Sum("qty"))
+        paid = analytics.paid_totals(vendor)
+        revenue = {'price': paid["revenue"]}
+        total_sales = {'qty': paid["units"]}
 
-        vendor_ratings = ProductReview.objects.filter(
-            product__vendor=vendor
-        ).aggregate(
-            avg_rating=Coalesce(Avg('rating'), Value(0.0))
-        )
-
-    except Vendor.DoesNotExist:
-        vendor = None
-        has_vendor = False
+        vendor_ratings = {'avg_rating': review_stats.vendor_summary(vendor)['average']}
+    else:
         vendor_image_url = None
         products = []
         revenue = {'price': 0}
@@ -484,11 +647,55 @@ def shop_page(request):
 @login_required
 @vendor_auth_required()
 def reviews(request, vendor):
-    vendor_products = Product.objects.filter(vendor=vendor).values_list('pid', flat=True)
-    reviews = ProductReview.objects.filter(product__pid__in=vendor_products)
+    """Review của các product thuộc vendor: lọc theo sao/ngày, phân trang keyset."""
+    reviews = ProductReview.objects.filter(product__vendor=vendor).select_related('user', 'product')
 
+    rating = request.GET.get('rating', '')
+    if rating in {str(value) for value, _label in RATING}:
+        reviews = reviews.filter(rating=int(rating))
+    else:
+        rating = ''
+    try:
+        date_from = datetime.date.fromisoformat(request.GET['from']) if request.GET.get('from') else None
+    except ValueError:
+        date_from = None
+    try:
+        date_to = datetime.date.fromisoformat(request.GET['to']) if request.GET.get('to') else None
+    except ValueError:
+        date_to = None
+    if date_from:
+        reviews = reviews.filter(date__gte=rollups.day_bounds(date_from)[0])
+    if date_to:
+        reviews = reviews.filter(date__lt=rollups.day_bounds(date_to)[1])
+    per_page = _page_size(request, REVIEW_PAGE_SIZES)
+
+    try:
+        page = keyset_page(
+            reviews, REVIEW_KEYSET, per_page,
+            after=request.GET.get('after'), before=request.GET.get('before'),
+        )
+    except InvalidCursor:
+        page = keyset_page(reviews, REVIEW_KEYSET, per_page)
+
+    filters = {
+        key: value for key, value in (
+            ('rating', rating),
+            ('from', date_from.isoformat() if date_from else ''),
+            ('to', date_to.isoformat() if date_to else ''),
+            ('per_page', per_page),
+        ) if value
+    }
     context = {
-        'reviews': reviews,
+        'reviews': page,
+        'page': page,
+        'summary': review_stats.vendor_summary(vendor),
+        'rating': rating,
+        'date_from': date_from,
+        'date_to': date_to,
+        'per_page': per_page,
+        'page_sizes': REVIEW_PAGE_SIZES,
+        'rating_choices': RATING,
+        'filter_query': urlencode(filters),
         'vendor': vendor,
     }
     return render(request, "useradmin/reviews.html", context)
@@ -496,12 +703,9 @@ def reviews(request, vendor):
 @login_required
 @vendor_required(redirect_url="core:index")
 def create_vendor(request):
-    try:
-        vendor = Vendor.objects.get(user=request.user)
+    if request_vendor(request) is not None:
         messages.info(request, _("You already have a vendor account"))
         return redirect('useradmin:dashboard')
-    except Vendor.DoesNotExist:
-        pass
 
     if request.method == 'POST':
         title = request.POST.get('title')
@@ -553,37 +757,19 @@ def coupons(request, vendor):
     status_filter = request.GET.get('status', '')
     show_deleted = request.GET.get('show_deleted', 'false') == 'true'
     
-    if show_deleted:
-        coupons_list = Coupon.objects.filter(vendor=vendor)
-    else:
-        coupons_list = Coupon.objects.filter(vendor=vendor).annotate(
-            usage_count=Count('couponuser'),
-            orders_count=Count('cart_orders')
-        ).exclude(
-            Q(active=False) & Q(orders_count__gt=0)
-        )
-    
+    # usage_count/orders_count là bộ đếm lưu sẵn trên coupon, không cần join CouponUser/CartOrder
+    coupons_list = Coupon.objects.filter(vendor=vendor)
     if not show_deleted:
-        pass
-    else:
-        coupons_list = coupons_list.annotate(
-            usage_count=Count('couponuser'),
-            orders_count=Count('cart_orders')
-        )
-    
+        coupons_list = coupons_list.exclude(active=False, orders_count__gt=0)
+
     if search_query:
-        coupons_list = coupons_list.filter(
-            Q(code__icontains=search_query) |
-            Q(min_order_amount__icontains=search_query)
-        )
+        # Mã lưu chữ hoa; tìm theo tiền tố để dùng index (vendor, code)
+        coupons_list = coupons_list.filter(code__istartswith=coupon_service.normalize_code(search_query))
     
     current_time = timezone.now()
-    if status_filter == 'active':
-        coupons_list = coupons_list.filter(active=True, expiry_date__gt=current_time)
-    elif status_filter == 'inactive':
-        coupons_list = coupons_list.filter(active=False)
-    elif status_filter == 'expired':
-        coupons_list = coupons_list.filter(expiry_date__lte=current_time)
+    # status lưu sẵn (index (vendor, status)), lệnh expire_coupons chuyển coupon quá hạn sang expired
+    if status_filter in (COUPON_STATUS_ACTIVE, COUPON_STATUS_INACTIVE, COUPON_STATUS_EXPIRED):
+        coupons_list = coupons_list.filter(status=status_filter)
     elif status_filter == 'deleted' and show_deleted:
         coupons_list = coupons_list.filter(active=False, orders_count__gt=0)
     
@@ -709,8 +895,8 @@ def coupon_detail(request, vendor, coupon_id):
     
     coupon_users = CouponUser.objects.filter(coupon=coupon).select_related('user')
     
-    total_usage = coupon_users.count()
-    is_expired = coupon.expiry_date <= timezone.now()
+    total_usage = coupon.usage_count
+    is_expired = coupon.status == COUPON_STATUS_EXPIRED
     
     context = {
         'coupon': coupon,
@@ -1,56 +1,159 @@
 import os
-from django.core.mail import send_mail
-import requests
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
 import logging
 from django.utils.translation import gettext_lazy as _
 
+from core import constants as C
+from core.models import OutboxEmail
+from utils.email_validation import check_email
+
 logger = logging.getLogger(__name__)
 
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    """Ghi email vào outbox; worker `send_queued_emails` sẽ gửi (request không chờ SMTP).
+
+    Nằm trong transaction của request: nếu request rollback thì email cũng không được gửi.
+    """
+    if from_email is None:
+        from_email = os.environ.get("DEFAULT_FROM_EMAIL", "no-reply@example.com")
+    return OutboxEmail.objects.create(
+        subject=str(subject),
+        body=str(message),
+        from_email=from_email,
+        to=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """Backoff luỹ thừa cho lần thử lại thứ `attempts`."""
+    return timedelta(seconds=min(
+        C.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), C.EMAIL_RETRY_MAX_SECONDS
+    ))
+
+
+def _mark_failed_attempt(email, error, now, max_attempts):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = C.EMAIL_STATUS_FAILED
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def _claim_batch(batch_size, now):
+    """Nhận một lô email đến hạn trong một transaction ngắn.
+
+    next_attempt_at được đẩy lên EMAIL_CLAIM_SECONDS nên worker khác không lấy
+    lại lô này trong lúc đang gửi; nếu worker chết giữa chừng, lô tự đến hạn lại.
+    """
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=C.EMAIL_STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        if batch:
+            OutboxEmail.objects.filter(id__in=[email.id for email in batch]).update(
+                next_attempt_at=now + timedelta(seconds=C.EMAIL_CLAIM_SECONDS)
+            )
+    return batch
+
+
+def deliver_outbox(batch_size=C.EMAIL_BATCH_SIZE, max_attempts=C.EMAIL_MAX_ATTEMPTS):
+    """Gửi một lô email đến hạn qua một kết nối SMTP dùng chung.
+
+    Lô được nhận bằng SELECT ... FOR UPDATE SKIP LOCKED trong transaction ngắn
+    (có thể chạy nhiều worker song song); việc gửi SMTP nằm ngoài transaction nên
+    SMTP chậm không giữ khoá dòng. Trả về (số đã gửi, số lỗi).
+    """
+    now = timezone.now()
+    sent = failed = 0
+    batch = _claim_batch(batch_size, now)
+    if not batch:
+        return 0, 0
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Không kết nối được SMTP: cả lô thử lại sau
+        logger.warning("SMTP connection failed: %s", e)
+        for email in batch:
+            _mark_failed_attempt(email, e, now, max_attempts)
+        failed = len(batch)
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email, email.to, connection=connection
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    logger.warning("Sending outbox email %s failed: %s", email.pk, e)
+                    _mark_failed_attempt(email, e, now, max_attempts)
+                    failed += 1
+                else:
+                    email.status = C.EMAIL_STATUS_SENT
+                    email.sent_at = timezone.now()
+                    sent += 1
+        finally:
+            connection.close()
+
+    OutboxEmail.objects.bulk_update(
+        batch, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+    )
+    return sent, failed
+
 def send_activation_email(email, username, uidb64, token):
     DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "no-reply@example.com")
     SITE_URL = os.environ.get("SITE_URL", "http://localhost:8000")
     activation_link = f"{SITE_URL}/user/activate/{uidb64}/{token}/"
     subject = "Kích hoạt tài khoản của bạn"
     message = f"Xin chào {username},\n\nVui lòng nhấn vào liên kết sau để kích hoạt tài khoản:\n{activation_link}\n\nCảm ơn!"
-    send_mail(subject, message, DEFAULT_FROM_EMAIL, [email])
+    queue_email(subject, message, [email], DEFAULT_FROM_EMAIL)
 
 
 def is_valid_email(email):
-    API_KEY = os.environ.get("ABSTRACT_API_KEY")
-    if not API_KEY:
-        logger.error("ABSTRACT_API_KEY is not configured in environment.")
-        return False
-    url = f"https://emailvalidation.abstractapi.com/v1/?api_key={API_KEY}&email={email}"
-    try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        # Kiểm tra email hợp lệ, tồn tại mailbox
-        if data.get("is_valid_format", {}).get("value") and data.get("is_smtp_valid", {}).get("value"):
-            return True
-        return False
-    except requests.RequestException:
-        return False
-
-def send_order_email(user, order):
-    """Gửi email thông báo đặt hàng thành công (COD)."""
+    """Kiểm tra email khi đăng ký: heuristic cục bộ + cache + validator từ xa có circuit breaker.
+
+    Chỉ trả về False khi chắc chắn email sai; API lỗi không làm từ chối người dùng.
+    """
+    return check_email(email)
+
+def send_order_email(user, order, payment_method="Cash on Delivery (COD)"):
+    """Gửi email thông báo đặt hàng thành công (mặc định COD)."""
     subject = _("Order Confirmation - Thank you for your purchase!")
     message = _(
         f"Hello {user.username},\n\n"
         f"Your order #{order.id} has been placed successfully.\n"
         f"We will ship your items soon.\n\n"
         f"Total Amount: {order.amount}\n"
-        f"Payment Method: Cash on Delivery (COD)\n\n"
+        f"Payment Method: {payment_method}\n\n"
         f"Thank you for shopping with us!"
     )
     DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "no-reply@example.com")
     recipient_list = [user.email]
-    try:
-        send_mail(subject, message, DEFAULT_FROM_EMAIL, recipient_list, fail_silently=True)
-    except Exception as e:
-        # log lỗi nếu cần
-        print("Email sending failed:", e)
-        
+    queue_email(subject, message, recipient_list, DEFAULT_FROM_EMAIL)
+
+
+def send_order_status_email(user, order):
+    """Báo cho khách khi đơn chuyển trạng thái (shipped, delivered, cancelled...)."""
+    subject = _("Your order #{} is now {}").format(order.id, order.get_order_status_display())
+    message = _(
+        f"Hello {user.username},\n\n"
+        f"The status of your order #{order.id} has changed to: {order.get_order_status_display()}.\n\n"
+        f"Thank you for shopping with us!"
+    )
+    DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "no-reply@example.com")
+    queue_email(subject, message, [user.email], DEFAULT_FROM_EMAIL)
+
+
 def send_password_reset_email(user, reset_link):
     """
     Gửi email reset password.
@@ -66,10 +169,5 @@ def send_password_reset_email(user, reset_link):
     )
     DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "no-reply@example.com")
     recipient_list = [user.email]
-
-    try:
-        send_mail(subject, message, DEFAULT_FROM_EMAIL, recipient_list, fail_silently=False)
-    except Exception as e:
-        # log lỗi nếu muốn
-        print("Failed to send password reset email:", e)
+    queue_email(subject, message, recipient_list, DEFAULT_FROM_EMAIL)
         
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""Kiểm tra email khi đăng ký mà không để API bên ngoài quyết định độ trễ.
+
+Thứ tự kiểm tra trong `check_email`:
+1. Heuristic cục bộ (cú pháp, domain, domain dùng một lần): sai là từ chối ngay.
+2. Kết quả đã cache trong bảng email_check (theo domain và theo địa chỉ, có TTL).
+3. Validator từ xa (settings.EMAIL_VALIDATOR) với timeout ngắn, đặt sau circuit
+   breaker: API lỗi liên tiếp thì ngắt một thời gian và bỏ qua bước này.
+
+Khi không xác định được (API lỗi, breaker đang ngắt hoặc bật
+EMAIL_VALIDATION_DEFERRED) email được chấp nhận và lưu verdict "unknown";
+lệnh `verify_emails` kiểm tra lại các địa chỉ này sau.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core import constants as C
+from core.models import EmailCheck
+
+logger = logging.getLogger(__name__)
+
+_TTL = {
+    C.EMAIL_VERDICT_VALID: C.EMAIL_CHECK_VALID_TTL,
+    C.EMAIL_VERDICT_INVALID: C.EMAIL_CHECK_INVALID_TTL,
+    C.EMAIL_VERDICT_UNKNOWN: C.EMAIL_CHECK_UNKNOWN_TTL,
+}
+
+
+@dataclass(frozen=True)
+class Outcome:
+    """Kết quả của validator từ xa; domain_ok=None nếu validator không biết về domain."""
+    valid: bool
+    domain_ok: Optional[bool] = None
+
+
+class ValidatorUnavailable(Exception):
+    """Validator từ xa không trả lời được (timeout, lỗi mạng, lỗi HTTP...)."""
+
+
+class AbstractApiValidator:
+    """Validator dùng Abstract Email Validation API (cần ABSTRACT_API_KEY)."""
+
+    url = "https://emailvalidation.abstractapi.com/v1/"
+
+    def __init__(self, api_key=None, timeout=C.EMAIL_VALIDATOR_TIMEOUT):
+        self.api_key = api_key or os.environ.get("ABSTRACT_API_KEY")
+        self.timeout = timeout
+
+    def check(self, email):
+        if not self.api_key:
+            raise ValidatorUnavailable("ABSTRACT_API_KEY is not configured")
+        try:
+            response = requests.get(
+                self.url, params={"api_key": self.api_key, "email": email}, timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise ValidatorUnavailable(str(e)) from e
+        valid = bool(
+            data.get("is_valid_format", {}).get("value") and data.get("is_smtp_valid", {}).get("value")
+        )
+        mx_found = data.get("is_mx_found", {}).get("value")
+        return Outcome(valid=valid, domain_ok=None if mx_found is None else bool(mx_found))
+
+
+class CircuitBreaker:
+    """Ngắt sau `threshold` lỗi liên tiếp, thử lại sau `cooldown` giây (trong từng process).
+
+    Hết cooldown thì chỉ một request được thử (half-open); các request khác vẫn bị
+    chặn cho tới khi lần thử đó báo success/failure (hoặc quá thêm một cooldown).
+    """
+
+    def __init__(self, threshold=C.EMAIL_BREAKER_THRESHOLD, cooldown=C.EMAIL_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._trial_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.cooldown:
+                return False
+            if self._trial_at is not None and now - self._trial_at < self.cooldown:
+                return False
+            self._trial_at = now
+            return True
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_at = None
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_at is not None or self._failures >= self.threshold:
+                # Lần thử half-open lỗi: ngắt lại thêm một cooldown
+                self._opened_at = time.monotonic()
+                self._trial_at = None
+
+    def reset(self):
+        self.success()
+
+
+breaker = CircuitBreaker()
+
+
+def get_validator():
+    path = getattr(settings, "EMAIL_VALIDATOR", "")
+    return import_string(path)() if path else None
+
+
+def local_check(email):
+    """Heuristic không cần mạng; trả về False nếu chắc chắn sai."""
+    try:
+        validate_email(email)
+    except ValidationError:
+        return False
+    domain = email.rsplit("@", 1)[1].lower()
+    if "." not in domain or ".." in domain or domain.startswith(("-", ".")):
+        return False
+    return domain not in C.DISPOSABLE_EMAIL_DOMAINS
+
+
+def _keys(email):
+    email = email.strip().lower()
+    return f"address:{email}", f"domain:{email.rsplit('@', 1)[1]}"
+
+
+def _cached_verdicts(keys):
+    return dict(
+        EmailCheck.objects.filter(key__in=keys, expires_at__gt=timezone.now()).values_list("key", "verdict")
+    )
+
+
+def _store(key, verdict):
+    EmailCheck.objects.update_or_create(
+        key=key,
+        defaults={"verdict": verdict, "expires_at": timezone.now() + timedelta(seconds=_TTL[verdict])},
+    )
+
+
+def verify_remote(email, validator=None):
+    """Gọi validator từ xa qua circuit breaker, cache kết quả. Trả về verdict."""
+    address_key, domain_key = _keys(email)
+    validator = validator or get_validator()
+    if validator is None or not breaker.allow():
+        _store(address_key, C.EMAIL_VERDICT_UNKNOWN)
+        return C.EMAIL_VERDICT_UNKNOWN
+    try:
+        outcome = validator.check(email)
+    except ValidatorUnavailable as e:
+        breaker.failure()
+        logger.warning("Email validator unavailable: %s", e)
+        _store(address_key, C.EMAIL_VERDICT_UNKNOWN)
+        return C.EMAIL_VERDICT_UNKNOWN
+    breaker.success()
+
+    verdict = C.EMAIL_VERDICT_VALID if outcome.valid else C.EMAIL_VERDICT_INVALID
+    _store(address_key, verdict)
+    if outcome.domain_ok is not None:
+        _store(domain_key, C.EMAIL_VERDICT_VALID if outcome.domain_ok else C.EMAIL_VERDICT_INVALID)
+    return verdict
+
+
+def check_email(email, defer=None):
+    """True nếu email có thể dùng để đăng ký; chỉ False khi chắc chắn sai."""
+    if not email or not local_check(email):
+        return False
+    address_key, domain_key = _keys(email)
+    cached = _cached_verdicts([address_key, domain_key])
+    if cached.get(domain_key) == C.EMAIL_VERDICT_INVALID:
+        return False
+    verdict = cached.get(address_key)
+    if verdict in (C.EMAIL_VERDICT_VALID, C.EMAIL_VERDICT_INVALID):
+        return verdict == C.EMAIL_VERDICT_VALID
+    if verdict is None:
+        if defer is None:
+            defer = getattr(settings, "EMAIL_VALIDATION_DEFERRED", False)
+        if defer:
+            _store(address_key, C.EMAIL_VERDICT_UNKNOWN)
+            return True
+        verdict = verify_remote(email)
+    return verdict != C.EMAIL_VERDICT_INVALID
+
+
+def pending_addresses(limit=None):
+    """Các địa chỉ đang có verdict unknown, cần kiểm tra lại."""
+    keys = EmailCheck.objects.filter(
+        key__startswith="address:", verdict=C.EMAIL_VERDICT_UNKNOWN
+    ).order_by("checked_at").values_list("key", flat=True)
+    if limit:
+        keys = keys[:limit]
+    return [key.split(":", 1)[1] for key in keys]
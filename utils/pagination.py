@@ -0,0 +1,135 @@
+"""Phân trang keyset (seek) cho các danh sách lớn.
+
+Thay vì OFFSET (chậm dần theo số trang), trang tiếp theo được lọc bằng điều
+kiện `(cột sắp xếp) < (giá trị của dòng cuối trang trước)` trên đúng index của
+thứ tự sắp xếp. Cursor là giá trị các cột sắp xếp của dòng biên, mã hoá base64.
+"""
+import base64
+import datetime
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder cắt datetime còn mili giây; cursor cần giữ nguyên micro giây
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class InvalidCursor(ValueError):
+    """Cursor không giải mã được hoặc không khớp kiểu các cột sắp xếp."""
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), cls=_CursorEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, fields):
+    """Giá trị của cursor, đã chuyển về kiểu của từng field sắp xếp (`fields`).
+
+    Raise InvalidCursor nếu cursor sai số phần tử, có null hoặc giá trị sai kiểu.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor("cursor does not match ordering")
+    converted = []
+    for model_field, value in zip(fields, values):
+        if value is None or isinstance(value, (list, dict)):
+            raise InvalidCursor(f"invalid value for {model_field.name}")
+        try:
+            value = model_field.to_python(value)
+        except (ValidationError, ValueError, TypeError) as e:
+            raise InvalidCursor(f"invalid value for {model_field.name}") from e
+        if value is None:
+            raise InvalidCursor(f"invalid value for {model_field.name}")
+        converted.append(value)
+    return converted
+
+
+@dataclass
+class KeysetPage:
+    object_list: List = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _seek(ordering, values, forward):
+    """Q cho các dòng đứng sau (forward) hoặc trước cursor theo `ordering`."""
+    condition = Q()
+    for i, name in enumerate(ordering):
+        column = name.lstrip("-")
+        descending = name.startswith("-")
+        op = "lt" if descending == forward else "gt"
+        term = Q(**{f"{column}__{op}": values[i]})
+        for prev_name, prev_value in zip(ordering[:i], values[:i]):
+            term &= Q(**{prev_name.lstrip("-"): prev_value})
+        condition |= term
+    return condition
+
+
+def _flip(name):
+    return name[1:] if name.startswith("-") else f"-{name}"
+
+
+def keyset_page(queryset, ordering, per_page, after=None, before=None):
+    """Một trang của `queryset` theo `ordering` (các cột phải xác định thứ tự duy nhất,
+    ví dụ kết thúc bằng khoá chính). Raise InvalidCursor nếu cursor sai.
+    """
+    ordering = list(ordering)
+    columns = [name.lstrip("-") for name in ordering]
+    opts = queryset.model._meta
+    fields = [opts.pk if column == "pk" else opts.get_field(column) for column in columns]
+
+    def cursor_of(obj):
+        return encode_cursor(getattr(obj, column) for column in columns)
+
+    if before:
+        values = decode_cursor(before, fields)
+        rows = list(
+            queryset.filter(_seek(ordering, values, forward=False))
+            .order_by(*[_flip(name) for name in ordering])[:per_page + 1]
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return KeysetPage(
+            rows,
+            next_cursor=cursor_of(rows[-1]) if rows else None,
+            previous_cursor=cursor_of(rows[0]) if rows and has_more else None,
+        )
+
+    if after:
+        queryset = queryset.filter(_seek(ordering, decode_cursor(after, fields), forward=True))
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    return KeysetPage(
+        rows,
+        next_cursor=cursor_of(rows[-1]) if rows and has_more else None,
+        previous_cursor=cursor_of(rows[0]) if rows and after else None,
+    )